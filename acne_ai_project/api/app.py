@@ -1,27 +1,143 @@
 
 import os
 import sys
+import time
+PROCESS_START = time.perf_counter()
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Flask, request, jsonify
+import threading
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
-from inference.pipeline import AcnePipeline
+from inference.pipeline import AcnePipeline, load_config
+from inference.metrics import MetricsRegistry
+from inference.profiling import Deadline
 import cv2
 import numpy as np
 
 app = Flask(__name__)
 CORS(app)
 
-# Initialize Pipeline (Loads models)
+# Per-process concurrency limit (each gunicorn worker has its own). Every waiting
+# request holds a gunicorn thread, so there must be fewer slots than threads for
+# requests to queue (and for the 429/503 paths to be reachable at all)
+config = load_config()
+serving_config = config.get('serving', {})
+threads_per_worker = serving_config.get('threads_per_worker', 16)
+inference_slots = threading.BoundedSemaphore(
+    max(1, min(serving_config.get('max_concurrent_requests', 4), threads_per_worker)))
+queue_timeout_s = serving_config.get('queue_timeout_s', 5)
+max_queued_requests = serving_config.get('max_queued_requests', 16)
+queued = {"requests": 0}
+queued_lock = threading.Lock()
+
+# Per-request latency budget, counted from arrival (0 = no deadline)
+max_inference_time_ms = config.get('deployment', {}).get('max_inference_time_ms', 0)
+
+# Initialize Pipeline (models load lazily; warmup runs in the background so
+# /health answers immediately and /ready flips once every model is loaded)
 try:
     pipeline = AcnePipeline()
 except Exception as e:
     print(f"Error initializing pipeline: {e}")
     pipeline = None
 
+# HTTP-level metrics; the pipeline keeps its own stage/outcome registry
+api_metrics = MetricsRegistry()
+http_responses = api_metrics.counter("http_responses_total", "API responses by endpoint and status code.")
+api_metrics.gauge("queued_requests", "Requests waiting for an inference slot.", lambda: queued["requests"])
+
+startup = {"import_s": round(time.perf_counter() - PROCESS_START, 3)}
+startup_lock = threading.Lock()
+
+def warmup_pipeline():
+    try:
+        load_times = pipeline.warmup()
+        startup["ready_s"] = round(time.perf_counter() - PROCESS_START, 3)
+        startup["load_times_s"] = load_times
+        print(f"Pipeline ready after {startup['ready_s']}s: {load_times}")
+    except Exception as e:
+        startup["warmup_error"] = str(e)
+        print(f"Error warming up pipeline: {e}")
+
+def record_first_request():
+    if "time_to_first_request_s" in startup:
+        return
+    with startup_lock:
+        if "time_to_first_request_s" not in startup:
+            startup["time_to_first_request_s"] = round(time.perf_counter() - PROCESS_START, 3)
+            print(f"Time to first request: {startup['time_to_first_request_s']}s")
+
+# ACNE_API_WARMUP=0 skips it, e.g. when the benchmark swaps in its own models
+if pipeline is not None and serving_config.get('warmup_on_start', True) \
+        and os.environ.get("ACNE_API_WARMUP", "1") != "0":
+    threading.Thread(target=warmup_pipeline, name="pipeline-warmup", daemon=True).start()
+
+@app.before_request
+def mark_arrival():
+    g.request_start = time.perf_counter()
+
+def request_deadline():
+    # Counted from arrival, so upload parsing and queueing for a slot use up the budget
+    return Deadline(max_inference_time_ms, start=g.request_start) if max_inference_time_ms else None
+
+def shed(status, message):
+    response = jsonify({"error": message})
+    response.headers["Retry-After"] = str(max(1, int(queue_timeout_s)))
+    return response, status
+
+def acquire_inference_slot(deadline):
+    """
+    Admission control. Returns None once an inference slot is held, otherwise the
+    error response to send: 429 when max_queued_requests are already waiting,
+    503 when no slot freed up within queue_timeout_s or before the deadline.
+    """
+    if inference_slots.acquire(blocking=False):
+        return None
+    with queued_lock:
+        if queued["requests"] >= max_queued_requests:
+            return shed(429, "Too many requests queued, try again later")
+        queued["requests"] += 1
+    try:
+        timeout = queue_timeout_s
+        if deadline is not None:
+            timeout = min(timeout, max(0.0, deadline.remaining_ms() / 1000))
+        acquired = inference_slots.acquire(timeout=timeout)
+    finally:
+        with queued_lock:
+            queued["requests"] -= 1
+    if not acquired:
+        return shed(503, "Server busy, try again later")
+    return None
+
+@app.after_request
+def count_response(response):
+    http_responses.inc(endpoint=request.endpoint or "unknown", status=response.status_code)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    body = api_metrics.render()
+    if pipeline is not None:
+        body += pipeline.metrics.render()
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({"status": "healthy", "model_loaded": pipeline is not None})
+    # Liveness: the process is up and serving HTTP, models may still be loading
+    response = {"status": "healthy", "model_loaded": pipeline is not None and pipeline.ready}
+    batching = pipeline.batching_stats() if pipeline is not None else None
+    if batching is not None:
+        response["batching"] = batching
+    cache = pipeline.cache_stats() if pipeline is not None else None
+    if cache is not None:
+        response["cache"] = cache
+    return jsonify(response)
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    # Readiness: every model is loaded and warmed up
+    is_ready = pipeline is not None and pipeline.ready
+    return jsonify({"ready": is_ready, "startup": startup}), (200 if is_ready else 503)
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -32,18 +148,54 @@ def predict():
         return jsonify({"error": "No image provided"}), 400
         
     file = request.files['image']
+    deadline = request_deadline()
     
-    # Save temp file
-    temp_path = "temp_uplaod.jpg"
-    file.save(temp_path)
+    # Read upload into memory (no temp file, so concurrent requests can't clobber each other)
+    image_bytes = file.read()
     
     # Run Inference
+    rejected = acquire_inference_slot(deadline)
+    if rejected:
+        return rejected
     try:
-        report = pipeline.predict(temp_path)
-        os.remove(temp_path) # Clean up
+        report = pipeline.predict_bytes(image_bytes, deadline=deadline)
+        record_first_request()
         return jsonify(report)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    finally:
+        inference_slots.release()
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    if not pipeline:
+        return jsonify({"error": "Model not loaded"}), 500
+
+    files = request.files.getlist('images')
+    if not files:
+        return jsonify({"error": "No images provided"}), 400
+    max_images = serving_config.get('max_batch_images', 16)
+    if len(files) > max_images:
+        return jsonify({"error": f"Too many images (max {max_images})"}), 400
+
+    deadline = request_deadline()
+    images = [file.read() for file in files]
+
+    rejected = acquire_inference_slot(deadline)
+    if rejected:
+        return rejected
+    try:
+        result = pipeline.predict_many(images, deadline=deadline)
+        record_first_request()
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        inference_slots.release()
 
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Development server only. For production use:
+    #   gunicorn -c api/gunicorn.conf.py api.app:app
+    debug = os.environ.get("ACNE_API_DEBUG", "0") == "1"
+    app.run(host=serving_config.get('host', '0.0.0.0'), port=serving_config.get('port', 5000),
+            debug=debug, threaded=True)
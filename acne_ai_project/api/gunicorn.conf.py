@@ -0,0 +1,37 @@
+# Gunicorn settings for the production serving mode.
+# Usage (from acne_ai_project/): gunicorn -c api/gunicorn.conf.py api.app:app
+#
+# Pre-fork model: the master only accepts/supervises, every worker process imports
+# api.app and loads its own AcnePipeline exactly once. `gthread` workers keep the
+# accept loop on the main thread and hand requests to a thread pool, so decode,
+# MediaPipe, TF and YOLO work (which release the GIL) never blocks accepting.
+import os
+import multiprocessing
+import yaml
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+config = load_config()
+serving = config.get('serving', {})
+
+intra_op_threads = max(1, serving.get('intra_op_threads', 2))
+torch_threads = serving.get('torch_threads', 0) or intra_op_threads
+# With parallel stages the TF and torch pools of one request are busy at the same time
+threads_per_request = intra_op_threads + torch_threads \
+    if config.get('inference', {}).get('parallel_stages', True) else intra_op_threads
+workers = serving.get('workers', 0) or max(1, multiprocessing.cpu_count() // threads_per_request)
+worker_class = "gthread"
+threads = serving.get('threads_per_worker', 16)
+bind = f"{serving.get('host', '0.0.0.0')}:{serving.get('port', 5000)}"
+timeout = serving.get('worker_timeout_s', 120)
+
+# Models must be loaded after fork, never in the master
+preload_app = False
+
+def post_fork(server, worker):
+    # Limit BLAS/OpenMP pools inside each worker so N workers don't oversubscribe the host
+    os.environ.setdefault("OMP_NUM_THREADS", str(intra_op_threads))
+    os.environ.setdefault("MKL_NUM_THREADS", str(intra_op_threads))
+    server.log.info(f"Worker {worker.pid} started ({threads} threads, {intra_op_threads} intra-op threads)")
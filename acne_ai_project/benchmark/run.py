@@ -0,0 +1,208 @@
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmark.synthetic import synthetic_uploads
+from benchmark.stubs import install_models
+from inference.profiling import StageTrace, Deadline, rss_mb, reset_peak_rss
+
+def pipeline_target(pipeline, deadline_ms=0):
+    def call(data):
+        trace = StageTrace()
+        deadline = Deadline(deadline_ms) if deadline_ms else None
+        return pipeline.predict_bytes(data, trace=trace, deadline=deadline), trace.as_dict()
+    return call
+
+def flask_target(app):
+    """
+    Drives /predict in-process through Flask's test client (admission control and
+    JSON serialization included, no sockets).
+    """
+    def call(data):
+        response = app.test_client().post('/predict', content_type='multipart/form-data',
+                                          data={'image': (io.BytesIO(data), 'face.jpg')})
+        report = response.get_json(silent=True) or {}
+        if response.status_code != 200:
+            report = dict(report, error=report.get("error", f"HTTP {response.status_code}"))
+        return report, None
+    return call
+
+def http_target(url):
+    import requests
+
+    def call(data):
+        response = requests.post(url, files={'image': ('face.jpg', data, 'image/jpeg')}, timeout=120)
+        try:
+            report = response.json()
+        except ValueError:
+            report = {}
+        if response.status_code != 200:
+            report = dict(report, error=report.get("error", f"HTTP {response.status_code}"))
+        return report, None
+    return call
+
+def run_level(call, uploads, concurrency, num_requests):
+    """
+    Sends `num_requests` uploads through `call` from `concurrency` threads and
+    summarizes latency, throughput, errors, degraded reports and stage timings.
+    """
+    def one(i):
+        start = time.perf_counter()
+        try:
+            report, stages = call(uploads[i % len(uploads)])
+        except Exception as e:
+            report, stages = {"error": str(e)}, None
+        return (time.perf_counter() - start) * 1000, report, stages
+
+    # Warm every worker thread / code path at this concurrency first
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(concurrency)))
+
+    reset_peak_rss()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(num_requests)))
+    wall_s = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _, _ in samples])
+    stage_values = {}
+    for _, _, stages in samples:
+        for stage, ms in (stages or {}).items():
+            stage_values.setdefault(stage, []).append(ms)
+    return {
+        "concurrency": concurrency,
+        "requests": num_requests,
+        "throughput_rps": round(num_requests / wall_s, 2),
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 2),
+            "p50": round(float(np.percentile(latencies, 50)), 2),
+            "p95": round(float(np.percentile(latencies, 95)), 2),
+            "p99": round(float(np.percentile(latencies, 99)), 2),
+            "max": round(float(latencies.max()), 2),
+        },
+        "errors": sum("error" in report for _, report, _ in samples),
+        "no_face": sum(report.get("status") == "failed" for _, report, _ in samples),
+        "degraded": sum("skipped_stages" in report for _, report, _ in samples),
+        "stages_ms": {stage: {"mean": round(float(np.mean(ms)), 2), "p95": round(float(np.percentile(ms, 95)), 2)}
+                      for stage, ms in stage_values.items()},
+        "rss_mb": rss_mb(),
+        "rss_peak_mb": rss_mb("VmHWM"),
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path, tolerance):
+    """
+    Prints p95/throughput changes against a previous results file.
+    Returns the number of levels whose p95 regressed by more than `tolerance`.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    key = lambda r: (r["target"], r["resolution"], r["concurrency"])
+    previous = {key(r): r for r in baseline["results"]}
+    regressions = 0
+    print(f"\nAgainst {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        p95_change = result["latency_ms"]["p95"] / old["latency_ms"]["p95"] - 1
+        rps_change = result["throughput_rps"] / old["throughput_rps"] - 1
+        regressed = p95_change > tolerance
+        regressions += regressed
+        print(f"  {result['target']:<9}{result['resolution']:>11} c={result['concurrency']:<3} "
+              f"p95 {p95_change:+7.1%}  throughput {rps_change:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Acne AI inference latency/throughput benchmark")
+    parser.add_argument("--targets", nargs="+", default=["pipeline", "api"], choices=["pipeline", "api"],
+                        help="pipeline: AcnePipeline.predict_bytes, api: POST /predict")
+    parser.add_argument("--url", help="Benchmark a running server (e.g. http://localhost:5000/predict) "
+                                      "instead of the in-process Flask app")
+    parser.add_argument("--resolutions", nargs="+", default=["640x480", "1920x1080", "4032x3024"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=32, help="Requests per concurrency level")
+    parser.add_argument("--models", default="auto", choices=["auto", "trained", "random", "stub"])
+    parser.add_argument("--stub-classify-ms", type=float, default=20.0)
+    parser.add_argument("--stub-detect-ms", type=float, default=60.0)
+    parser.add_argument("--deadline-ms", type=float, default=0,
+                        help="Per-request deadline for the pipeline target, 0 = none")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed p95 increase vs the baseline")
+    args = parser.parse_args()
+
+    # The API must not warm up its own models, the benchmark installs them
+    os.environ["ACNE_API_WARMUP"] = "0"
+    from inference.pipeline import AcnePipeline
+    pipeline = AcnePipeline()
+    pipeline.result_cache = None # Every request must run the models
+    models = install_models(pipeline, args.models, args.stub_classify_ms, args.stub_detect_ms)
+    print(f"Models: {models}")
+    print(f"Warmup (s): {pipeline.warmup()}")
+
+    targets = {}
+    if "pipeline" in args.targets:
+        targets["pipeline"] = pipeline_target(pipeline, args.deadline_ms)
+    if "api" in args.targets:
+        if args.url:
+            targets["api"] = http_target(args.url)
+        else:
+            import api.app as api_app
+            api_app.pipeline = pipeline
+            targets["api"] = flask_target(api_app.app)
+
+    results = []
+    for resolution in args.resolutions:
+        width, height = (int(v) for v in resolution.lower().split("x"))
+        uploads = synthetic_uploads(width, height)
+        print(f"\n{resolution}: {len(uploads)} synthetic uploads, "
+              f"{np.mean([len(u) for u in uploads]) / 1e6:.2f} MB each")
+        for name, call in targets.items():
+            for concurrency in args.concurrency:
+                result = dict(target=name, resolution=resolution, **run_level(call, uploads, concurrency, args.requests))
+                results.append(result)
+                latency = result["latency_ms"]
+                print(f"  {name:<9} c={concurrency:<3} {result['throughput_rps']:7.2f} req/s  "
+                      f"p50={latency['p50']:8.1f}  p95={latency['p95']:8.1f}  p99={latency['p99']:8.1f} ms  "
+                      f"errors={result['errors']}  degraded={result['degraded']}  peak RSS={result['rss_peak_mb']} MB")
+
+    config = pipeline.config
+    output = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "models": models,
+            "url": args.url,
+            "deadline_ms": args.deadline_ms,
+            "config": {key: config.get(key) for key in ("batching", "inference", "preprocess", "face_detection")},
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline and compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
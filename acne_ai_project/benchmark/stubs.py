@@ -0,0 +1,125 @@
+import os
+import time
+import numpy as np
+
+from inference.face_detection import select_face, pad_box
+
+# Stand-ins with the interfaces AcnePipeline expects. They sleep for a fixed time
+# (releasing the GIL, like the real runtimes) so batching, stage overlap and queueing
+# behave realistically on a box without TF, torch or trained weights.
+
+class StubFaceDetector:
+    name = "stub"
+
+    def detect_faces(self, image, bgr=False):
+        h, w = image.shape[:2]
+        return [(w * 0.2, h * 0.1, w * 0.6, h * 0.8, 1.0)]
+
+    def detect_and_crop(self, image, padding=0.2, strategy="largest", bgr=False):
+        face = select_face(self.detect_faces(image, bgr), image.shape, strategy)
+        x_start, y_start, x_end, y_end = pad_box(face, image.shape, padding)
+        return image[y_start:y_end, x_start:x_end], (x_start, y_start, x_end, y_end)
+
+class StubClassifier:
+    name = "stub"
+
+    def __init__(self, num_classes=7, latency_ms=20.0, seed=0):
+        self.latency_s = latency_ms / 1000
+        self.weights = np.random.default_rng(seed).normal(size=(3, num_classes)).astype(np.float32)
+
+    def warmup(self):
+        pass
+
+    def predict(self, images):
+        time.sleep(self.latency_s)
+        logits = images.mean(axis=(1, 2)) @ self.weights * 10
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+class StubSpots:
+    def __init__(self, count):
+        self.boxes = [None] * count
+
+class StubDetector:
+    def __init__(self, latency_ms=60.0):
+        self.latency_s = latency_ms / 1000
+
+    def predict_batch(self, batch, conf_threshold=0.25):
+        time.sleep(self.latency_s)
+        return [StubSpots(int(sample.mean() * 40)) for sample in batch]
+
+class RandomKerasClassifier:
+    """
+    Randomly initialized student network behind the compiled ClassifierEngine:
+    real TF compute cost, meaningless predictions.
+    """
+    name = "random"
+
+    def __init__(self, config):
+        from models.student_model import build_student_model
+        from inference.classifier_engine import ClassifierEngine
+        input_shape = tuple(config['data']['image_size']) + (3,)
+        model = build_student_model(input_shape, config['data']['num_classes'],
+                                    backbone=config.get('distillation', {}).get('student_backbone', 'MobileNetV3Small'),
+                                    weights=None)
+        self.engine = ClassifierEngine(model, input_shape=input_shape,
+                                       batch_buckets=config.get('inference', {}).get('batch_buckets', [1, 2, 4, 8]))
+
+    def warmup(self):
+        self.engine.warmup()
+
+    def predict(self, images):
+        return self.engine.predict(images)
+
+def _importable(module):
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+def install_models(pipeline, mode="auto", classify_ms=20.0, detect_ms=60.0):
+    """
+    Puts the benchmark's models into `pipeline` before anything loads lazily.
+    mode: 'trained' uses the configured artifacts as-is, 'stub' replaces every model,
+    'random' uses randomly initialized TF/YOLO networks, and 'auto' uses trained
+    artifacts where present, random networks where the runtime is installed and
+    stubs otherwise. Returns {model: kind} describing what was installed.
+    """
+    if mode == "trained":
+        return {"face_detector": "trained", "classifier": "trained", "yolo": "trained"}
+
+    if mode != "stub" and _importable("tensorflow") and _importable("torch"):
+        # Apply the serving thread budgets before building any network, as _load_once would
+        from inference.pipeline import configure_runtime_threads
+        configure_runtime_threads(pipeline.config.get('serving', {}))
+        pipeline._runtime_configured = True
+
+    used = {}
+    face_ok = mode != "stub" and _importable("mediapipe")
+    if not face_ok:
+        pipeline._models['face_detector'] = StubFaceDetector()
+    used["face_detector"] = "mediapipe" if face_ok else "stub"
+
+    if mode == "auto" and os.path.exists(pipeline.classifier_path):
+        used["classifier"] = "trained"
+    elif mode != "stub" and _importable("tensorflow"):
+        pipeline._models['classifier'] = RandomKerasClassifier(pipeline.config)
+        used["classifier"] = "random"
+    else:
+        pipeline._models['classifier'] = StubClassifier(len(pipeline.labels), classify_ms)
+        used["classifier"] = "stub"
+    if used["classifier"] != "trained":
+        # The deadline fallback gets a stub a quarter of the classifier's cost
+        pipeline._models['fallback_classifier'] = StubClassifier(len(pipeline.labels), classify_ms / 4)
+
+    if mode == "auto" and pipeline.yolo_path and os.path.exists(pipeline.yolo_path):
+        used["yolo"] = "trained"
+    elif mode != "stub" and _importable("ultralytics"):
+        from models.detection_model import AcneDetector
+        pipeline._models['yolo'] = AcneDetector('yolov8n.yaml') # Built from the bundled yaml, no download
+        used["yolo"] = "random"
+    else:
+        pipeline._models['yolo'] = StubDetector(detect_ms)
+        used["yolo"] = "stub"
+    return used
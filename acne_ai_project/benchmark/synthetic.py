@@ -0,0 +1,50 @@
+import numpy as np
+import cv2
+
+def synthetic_face(width, height, seed=0, num_spots=25):
+    """
+    Draws a face-like BGR image: skin-toned background, an oval face with eyes,
+    brows and a mouth, and small red spots. Good enough to exercise decoding,
+    resizing and (usually) face detection without any real patient data.
+    """
+    rng = np.random.default_rng(seed)
+    skin = np.array([rng.uniform(120, 190), rng.uniform(150, 200), rng.uniform(190, 235)])
+
+    # Background: darker vertical gradient plus sensor-like noise
+    gradient = np.linspace(0.35, 0.6, height, dtype=np.float32)[:, None, None]
+    image = (gradient * skin[None, None, :]).repeat(width, axis=1)
+    image += rng.normal(0, 6, size=(height, width, 1)).astype(np.float32)
+    image = np.clip(image, 0, 255).astype(np.uint8)
+
+    cx, cy = int(width * rng.uniform(0.45, 0.55)), int(height * rng.uniform(0.45, 0.55))
+    axes = (int(min(width, height) * 0.28), int(min(width, height) * 0.38))
+    cv2.ellipse(image, (cx, cy), axes, 0, 0, 360, skin.tolist(), -1)
+
+    ax, ay = axes
+    eye = (max(1, ax // 6), max(1, ay // 12))
+    for side in (-1, 1):
+        ex, ey = cx + side * ax // 2, cy - ay // 4
+        cv2.ellipse(image, (ex, ey), eye, 0, 0, 360, (245, 245, 245), -1)
+        cv2.circle(image, (ex, ey), max(1, eye[1]), (40, 30, 30), -1)
+        cv2.line(image, (ex - eye[0], ey - 2 * eye[1]), (ex + eye[0], ey - 2 * eye[1]),
+                 (40, 50, 70), max(1, ay // 40))
+    cv2.ellipse(image, (cx, cy + ay // 2), (ax // 3, max(1, ay // 10)), 0, 0, 180, (80, 80, 170), max(1, ay // 40))
+
+    # Spots on the cheeks and forehead
+    for _ in range(num_spots):
+        angle, radius = rng.uniform(0, 2 * np.pi), rng.uniform(0.2, 0.8)
+        sx, sy = int(cx + np.cos(angle) * ax * radius), int(cy + np.sin(angle) * ay * radius)
+        cv2.circle(image, (sx, sy), max(1, int(ax * rng.uniform(0.01, 0.03))), (60, 70, 200), -1)
+    return image
+
+def encode_jpeg(image, quality=90):
+    ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return buffer.tobytes()
+
+def synthetic_uploads(width, height, count=8, seed=0):
+    """
+    `count` distinct JPEG uploads at one resolution.
+    """
+    return [encode_jpeg(synthetic_face(width, height, seed=seed + i)) for i in range(count)]
@@ -0,0 +1,94 @@
+import hashlib
+import cv2
+
+def dhash(image, hash_size=8):
+    """
+    Difference hash of a BGR/grayscale image: 64-bit int that changes little under
+    resizing, recompression and small brightness changes.
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    diff = small[:, 1:] > small[:, :-1]
+    value = 0
+    for bit in diff.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+class UnionFind:
+    def __init__(self, items):
+        self.parent = {item: item for item in items}
+
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # Deterministic representative: the smaller key
+            if rb < ra:
+                ra, rb = rb, ra
+            self.parent[rb] = ra
+
+def group_duplicates(entries, max_distance=4):
+    """
+    Groups exact (same sha256) and near (dHash Hamming distance <= max_distance) duplicates.
+    entries: {key: (sha256_hex, dhash_int)}. Returns {key: group_id}, where group_id is
+    the smallest key in the group: deterministic, but a new member that sorts first or
+    bridges two groups changes it.
+
+    Near-duplicate candidates are found with LSH banding: the 64-bit hash is split
+    into max_distance + 1 bands, and any two hashes within max_distance bits must
+    agree exactly on at least one band, so only same-bucket pairs are compared.
+    """
+    keys = sorted(entries)
+    groups = UnionFind(keys)
+
+    by_sha = {}
+    for key in keys:
+        sha = entries[key][0]
+        if sha in by_sha:
+            groups.union(by_sha[sha], key)
+        else:
+            by_sha[sha] = key
+
+    if max_distance >= 0:
+        num_bands = max_distance + 1
+        band_bits = 64 // num_bands
+        buckets = {}
+        for key in keys:
+            h = entries[key][1]
+            for band in range(num_bands):
+                shift = band * band_bits
+                bits = band_bits if band < num_bands - 1 else 64 - shift
+                buckets.setdefault((band, (h >> shift) & ((1 << bits) - 1)), []).append(key)
+        for bucket in buckets.values():
+            for i in range(len(bucket)):
+                for j in range(i + 1, len(bucket)):
+                    a, b = bucket[i], bucket[j]
+                    if groups.find(a) != groups.find(b) and hamming(entries[a][1], entries[b][1]) <= max_distance:
+                        groups.union(a, b)
+
+    return {key: groups.find(key) for key in keys}
+
+def assign_split(group_id, train_split, val_split, seed=42):
+    """
+    Deterministically maps a duplicate group to 'train' / 'val' / 'test' from a hash
+    of its id. Group ids aren't stable as images are added, so callers keep the
+    split of existing groups (see prepare_dataset.existing_split).
+    """
+    digest = hashlib.sha256(f"{seed}:{group_id}".encode("utf-8")).hexdigest()
+    u = int(digest[:16], 16) / float(1 << 64)
+    if u < train_split:
+        return 'train'
+    if u < train_split + val_split:
+        return 'val'
+    return 'test'
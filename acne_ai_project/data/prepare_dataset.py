@@ -1,12 +1,21 @@
-
 import os
+import sys
+import json
 import shutil
-import random
+import hashlib
 import yaml
 import cv2
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
-from sklearn.model_selection import train_test_split
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.shards import ShardWriter
+from data.dedup import dhash, group_duplicates, assign_split
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+MANIFEST_NAME = "prepare_manifest.json"
 
 def load_config(config_path="config/config.yaml"):
     with open(config_path, "r") as f:
@@ -26,62 +35,278 @@ def clean_and_validate_image(image_path):
         print(f"Error reading {image_path}: {e}")
         return None
 
+def resized_path(resized_dir, sha256, img_size):
+    """
+    Content-addressed cache file of one image resized to `img_size` (width, height).
+    """
+    return os.path.join(resized_dir, f"{sha256}_{img_size[0]}x{img_size[1]}.npy")
+
+def save_resized(img, path, img_size):
+    resized = cv2.cvtColor(cv2.resize(img, img_size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+    np.save(path, resized)
+
+def resize_image(args):
+    """
+    Process-pool worker: writes the resized array of a raw image whose cache file is missing.
+    """
+    image_path, path, img_size = args
+    img = clean_and_validate_image(image_path)
+    if img is None:
+        return False
+    save_resized(img, path, img_size)
+    return True
+
+def process_image(args):
+    """
+    Process-pool worker: hashes, validates and (optionally) resizes one raw image.
+    The file is read once; the same bytes are hashed and decoded.
+    Returns a manifest record for it.
+    """
+    image_path, img_size, resized_dir = args
+    record = {"valid": False}
+    try:
+        with open(image_path, "rb") as f:
+            data = f.read()
+        stat = os.stat(image_path)
+        record.update(size=stat.st_size, mtime=stat.st_mtime, sha256=hashlib.sha256(data).hexdigest())
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR) if data else None
+    except Exception as e:
+        print(f"Error reading {image_path}: {e}")
+        return record
+    if img is None:
+        return record
+
+    record.update(valid=True, dhash=format(dhash(img), "016x"))
+    if resized_dir:
+        # Content-addressed, so unchanged images are never resized twice
+        path = resized_path(resized_dir, record["sha256"], img_size)
+        if not os.path.exists(path):
+            save_resized(img, path, img_size)
+    return record
+
+def existing_split(splits):
+    """
+    Split of a duplicate group from the splits its members had on the previous run.
+    A new image can merge groups from different splits; the held-out split wins, so
+    images never move from test/val into train.
+    """
+    for split in ['test', 'val', 'train']:
+        if split in splits:
+            return split
+
+def load_manifest(path):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return {"images": {}}
+
+def scan_raw_images(raw_dir, classes):
+    """
+    Returns {relative path: (class name, size, mtime)} for every raw image.
+    """
+    found = {}
+    for cls in classes:
+        cls_dir = os.path.join(raw_dir, cls)
+        if not os.path.exists(cls_dir):
+            print(f"Warning: Class directory {cls_dir} does not exist. Skipping.")
+            continue
+        for entry in os.scandir(cls_dir):
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                stat = entry.stat()
+                found[os.path.join(cls, entry.name)] = (cls, stat.st_size, stat.st_mtime)
+    return found
+
+def sync_resized_cache(raw_dir, resized_dir, images, img_size, workers):
+    """
+    Makes sure every image going into the shards has a resized array at the current
+    image size (images left unchanged since a run without shards, or prepared at
+    another size, have none) and deletes arrays no longer referenced.
+    """
+    members = {}
+    for rel_path, record in images.items():
+        if record['valid'] and not record.get('duplicate_of'):
+            members.setdefault(resized_path(resized_dir, record['sha256'], img_size), rel_path)
+
+    missing = [(os.path.join(raw_dir, rel_path), path, img_size)
+               for path, rel_path in members.items() if not os.path.exists(path)]
+    if missing:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(tqdm(executor.map(resize_image, missing, chunksize=16), total=len(missing),
+                                desc="Resizing"))
+        failed = [job[0] for job, ok in zip(missing, results) if not ok]
+        if failed:
+            raise RuntimeError(f"{len(failed)} images became unreadable while resizing, e.g. {failed[0]}")
+
+    pruned = 0
+    for name in os.listdir(resized_dir):
+        path = os.path.join(resized_dir, name)
+        if path not in members:
+            os.remove(path)
+            pruned += 1
+    print(f"Resized cache: {len(missing)} arrays generated, {pruned} stale arrays removed.")
+
+def write_shards(config, processed_dir, resized_dir, images, shard_format):
+    """
+    Rebuilds the pre-resized shards from the cached resized arrays (no decoding).
+    """
+    classes = sorted(config['data']['class_names'])
+    img_size = tuple(config['data']['image_size'])
+    shards_dir = os.path.join(processed_dir, 'shards')
+    if os.path.exists(shards_dir):
+        shutil.rmtree(shards_dir)
+    writer = ShardWriter(shards_dir, shard_format, tuple(config['data']['image_size']), classes,
+                         shard_size=config['data'].get('shard_size', 1024))
+    for split in ['train', 'val', 'test']:
+        for label, cls in enumerate(classes):
+            members = sorted(k for k, r in images.items()
+                             if r['valid'] and not r.get('duplicate_of') and r['split'] == split and r['class'] == cls)
+            pixels = [np.load(resized_path(resized_dir, images[k]['sha256'], img_size)) for k in members]
+            writer.write(split, f"class{label}", pixels, [label] * len(members))
+    writer.close()
+    print(f"Shards ({shard_format}) and manifest written to {shards_dir}")
+
 def prepare_dataset():
     """
     Main function to organize raw data into Train/Val/Test splits.
     Assumes raw data is in 'data/raw/<class_name>/<images>'
+
+    Incremental: a manifest of content hashes (processed/prepare_manifest.json) means
+    only new or changed files are decoded, on a process pool. Exact and near-duplicate
+    images (dHash) are grouped and every group goes to one split, so nothing leaks
+    across train/val/test. Groups keep their split across runs; new groups get one
+    from a hash of the group id, so splits are deterministic.
+    Corrupt files are recorded in the manifest and skipped (not deleted).
     """
     config = load_config()
     raw_dir = config['paths']['raw_data']
     processed_dir = config['paths']['processed_data']
     classes = config['data']['class_names']
+    img_size = tuple(config['data']['image_size'])
+    shard_format = config['data'].get('shard_format')
+    workers = config['data'].get('prepare_workers', 0) or os.cpu_count()
     
     # Create split directories
     for split in ['train', 'val', 'test']:
         for cls in classes:
             os.makedirs(os.path.join(processed_dir, split, cls), exist_ok=True)
+
+    # Optional pre-resized shards (data.shard_format: tfrecord | memmap) so training
+    # never decodes JPEGs again. Label indices use sorted class order, like flow_from_directory.
+    resized_dir = None
+    if shard_format:
+        resized_dir = os.path.join(processed_dir, 'resized')
+        os.makedirs(resized_dir, exist_ok=True)
+
+    manifest_path = os.path.join(processed_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    previous = manifest["images"]
             
     print(f"Processing data from {raw_dir}...")
-    
+    found = scan_raw_images(raw_dir, classes)
+
+    # Only new or modified files go through the validator/resizer
+    images = {}
+    todo = []
+    for rel_path, (cls, size, mtime) in found.items():
+        old = previous.get(rel_path)
+        if old and old.get('size') == size and old.get('mtime') == mtime and old.get('class') == cls:
+            images[rel_path] = dict(old)
+        else:
+            todo.append(rel_path)
+    print(f"{len(found)} raw images: {len(images)} unchanged, {len(todo)} new or modified.")
+
+    if todo:
+        jobs = [(os.path.join(raw_dir, p), img_size, resized_dir) for p in todo]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(tqdm(executor.map(process_image, jobs, chunksize=16), total=len(jobs), desc="Validating"))
+        for rel_path, record in zip(todo, results):
+            # Size/mtime from the scan, also for unreadable files, so the next run can skip them
+            cls, size, mtime = found[rel_path]
+            record.update({'class': cls, 'size': size, 'mtime': mtime})
+            images[rel_path] = record
+
+    invalid = [p for p, r in images.items() if not r['valid']]
+    if invalid:
+        print(f"Skipping {len(invalid)} corrupt/unreadable images (listed in {manifest_path}).")
+
+    # Group exact/near duplicates; a whole group lands in one split
+    valid = {p: (r['sha256'], int(r['dhash'], 16)) for p, r in images.items() if r['valid']}
+    groups = group_duplicates(valid, config['data'].get('near_duplicate_distance', 4))
+    split_seed = config['data'].get('split_seed', 42)
+    train_split, val_split = config['data']['train_split'], config['data']['val_split']
+    # Group ids change when a new image sorts first in its group or bridges two groups,
+    # so existing groups keep the split their members already have in the manifest;
+    # only groups with no previous member get a split from the hash of their id
+    previous_splits = {}
+    for rel_path in valid:
+        split = previous.get(rel_path, {}).get('split')
+        if split:
+            previous_splits.setdefault(groups[rel_path], set()).add(split)
+    first_in_group = {}
+    moved = 0
+    for rel_path in sorted(valid):
+        group_id = groups[rel_path]
+        record = images[rel_path]
+        record['group'] = group_id
+        if group_id in previous_splits:
+            record['split'] = existing_split(previous_splits[group_id])
+        else:
+            record['split'] = assign_split(group_id, train_split, val_split, split_seed)
+        if previous.get(rel_path, {}).get('split') not in (None, record['split']):
+            moved += 1
+        # Keep one copy of exact duplicates within a class
+        key = (record['sha256'], record['class'])
+        record['duplicate_of'] = first_in_group.get(key)
+        first_in_group.setdefault(key, rel_path)
+
+    if moved:
+        print(f"{moved} images changed split: new near-duplicates merged groups that were in different splits.")
+
+    # Sync processed/<split>/<class>/ with the plan: copy what's missing or changed,
+    # remove files that moved split or no longer exist
+    wanted = {}
+    for rel_path, record in images.items():
+        if record['valid'] and not record.get('duplicate_of'):
+            dest = os.path.join(processed_dir, record['split'], record['class'], os.path.basename(rel_path))
+            wanted[dest] = rel_path
+    copied = 0
+    for dest, rel_path in wanted.items():
+        old = previous.get(rel_path)
+        unchanged = old and old.get('sha256') == images[rel_path]['sha256'] and old.get('split') == images[rel_path]['split']
+        if not (unchanged and os.path.exists(dest)):
+            shutil.copy(os.path.join(raw_dir, rel_path), dest)
+            copied += 1
+    removed = 0
+    for split in ['train', 'val', 'test']:
+        for cls in classes:
+            split_cls_dir = os.path.join(processed_dir, split, cls)
+            for name in os.listdir(split_cls_dir):
+                path = os.path.join(split_cls_dir, name)
+                if path not in wanted:
+                    os.remove(path)
+                    removed += 1
+    print(f"Copied {copied} files, removed {removed} stale files.")
+
     for cls in classes:
-        cls_dir = os.path.join(raw_dir, cls)
-        if not os.path.exists(cls_dir):
-            print(f"Warning: Class directory {cls_dir} does not exist. Skipping.")
-            continue
-            
-        images = [os.path.join(cls_dir, f) for f in os.listdir(cls_dir) 
-                  if f.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp'))]
-        
-        # Shuffle to ensure random splitting
-        random.shuffle(images)
-        
-        # Validate images
-        valid_images = []
-        for img_path in tqdm(images, desc=f"Validating {cls}"):
-            if clean_and_validate_image(img_path) is not None:
-                valid_images.append(img_path)
-            else:
-                os.remove(img_path) # Optionally remove corrupt files
-                
-        # Split (70% Train, 15% Val, 15% Test)
-        train_imgs, temp_imgs = train_test_split(
-            valid_images, test_size=(1 - config['data']['train_split']), random_state=42
-        )
-        val_imgs, test_imgs = train_test_split(
-            temp_imgs, test_size=0.5, random_state=42 # Split remaining 30% into 15%/15%
-        )
-        
-        # Copy to respective directories
-        for img_path in train_imgs:
-            shutil.copy(img_path, os.path.join(processed_dir, 'train', cls, os.path.basename(img_path)))
-            
-        for img_path in val_imgs:
-            shutil.copy(img_path, os.path.join(processed_dir, 'val', cls, os.path.basename(img_path)))
-            
-        for img_path in test_imgs:
-            shutil.copy(img_path, os.path.join(processed_dir, 'test', cls, os.path.basename(img_path)))
-            
-        print(f"Class {cls}: Train={len(train_imgs)}, Val={len(val_imgs)}, Test={len(test_imgs)}")
+        counts = {split: sum(1 for r in images.items() if r[1]['valid'] and not r[1].get('duplicate_of')
+                             and r[1]['class'] == cls and r[1]['split'] == split)
+                  for split in ['train', 'val', 'test']}
+        print(f"Class {cls}: Train={counts['train']}, Val={counts['val']}, Test={counts['test']}")
+
+    num_groups = len(set(groups.values()))
+    print(f"{len(valid)} valid images in {num_groups} duplicate groups.")
+
+    changed = (bool(todo) or set(previous) != set(images) or copied or removed
+               or manifest.get('shard_format') != shard_format or manifest.get('image_size') != list(img_size))
+    if shard_format and (changed or not os.path.exists(os.path.join(processed_dir, 'shards'))):
+        sync_resized_cache(raw_dir, resized_dir, images, img_size, workers)
+        write_shards(config, processed_dir, resized_dir, images, shard_format)
+
+    manifest["images"] = images
+    manifest["shard_format"] = shard_format
+    manifest["image_size"] = list(img_size)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
         
     print("Dataset preparation complete.")
 
@@ -0,0 +1,108 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class ShardWriter:
+    """
+    Writes resized uint8 images to fixed-size shards, either as TFRecords of raw
+    pixels or as memory-mappable .npy arrays, and records every shard (file names,
+    example count, labels, sha256) in a manifest.json next to them.
+    Images are stored already resized to data.image_size, so readers never decode JPEGs.
+    """
+    def __init__(self, shards_dir, shard_format, image_size, class_names, shard_size=1024):
+        if shard_format not in ("tfrecord", "memmap"):
+            raise ValueError(f"Unknown shard format: {shard_format}")
+        self.shards_dir = shards_dir
+        self.shard_format = shard_format
+        self.image_size = tuple(image_size)
+        self.class_names = list(class_names)
+        self.shard_size = shard_size
+        self.manifest = {
+            "format": shard_format,
+            "image_size": list(self.image_size),
+            "class_names": self.class_names,
+            "splits": {}
+        }
+        os.makedirs(shards_dir, exist_ok=True)
+
+    def write(self, split, prefix, images, labels):
+        """
+        Writes `images` (sequence of (H, W, 3) uint8 arrays) with integer `labels`
+        into one or more shards named <split>/<prefix>-NNNNN.
+        """
+        split_dir = os.path.join(self.shards_dir, split)
+        os.makedirs(split_dir, exist_ok=True)
+        entries = self.manifest["splits"].setdefault(split, {"num_examples": 0, "shards": []})["shards"]
+
+        for start in range(0, len(images), self.shard_size):
+            chunk_images = images[start:start + self.shard_size]
+            chunk_labels = [int(y) for y in labels[start:start + self.shard_size]]
+            name = f"{prefix}-{start // self.shard_size:05d}"
+            if self.shard_format == "tfrecord":
+                files = [self._write_tfrecord(os.path.join(split_dir, name + ".tfrecord"),
+                                              chunk_images, chunk_labels)]
+            else:
+                files = self._write_memmap(os.path.join(split_dir, name), chunk_images, chunk_labels)
+
+            entries.append({
+                "files": [os.path.relpath(f, self.shards_dir) for f in files],
+                "num_examples": len(chunk_labels),
+                "labels": chunk_labels,
+                "sha256": [file_sha256(f) for f in files]
+            })
+            self.manifest["splits"][split]["num_examples"] += len(chunk_labels)
+
+    def _write_tfrecord(self, path, images, labels):
+        import tensorflow as tf # Only needed for this format
+        with tf.io.TFRecordWriter(path) as writer:
+            for image, label in zip(images, labels):
+                example = tf.train.Example(features=tf.train.Features(feature={
+                    "image": tf.train.Feature(bytes_list=tf.train.BytesList(value=[image.tobytes()])),
+                    "label": tf.train.Feature(int64_list=tf.train.Int64List(value=[label]))
+                }))
+                writer.write(example.SerializeToString())
+        return path
+
+    def _write_memmap(self, path_prefix, images, labels):
+        images_path = path_prefix + "-images.npy"
+        labels_path = path_prefix + "-labels.npy"
+        array = np.lib.format.open_memmap(images_path, mode="w+", dtype=np.uint8,
+                                          shape=(len(images),) + self.image_size + (3,))
+        for i, image in enumerate(images):
+            array[i] = image
+        array.flush()
+        del array
+        np.save(labels_path, np.array(labels, dtype=np.int32))
+        return [images_path, labels_path]
+
+    def close(self):
+        with open(os.path.join(self.shards_dir, MANIFEST_NAME), "w") as f:
+            json.dump(self.manifest, f)
+
+def load_manifest(shards_dir):
+    with open(os.path.join(shards_dir, MANIFEST_NAME), "r") as f:
+        return json.load(f)
+
+def verify_shards(shards_dir, manifest=None):
+    """
+    Recomputes shard checksums. Returns the list of files that don't match the manifest.
+    """
+    manifest = manifest or load_manifest(shards_dir)
+    bad = []
+    for split in manifest["splits"].values():
+        for shard in split["shards"]:
+            for rel_path, expected in zip(shard["files"], shard["sha256"]):
+                path = os.path.join(shards_dir, rel_path)
+                if not os.path.exists(path) or file_sha256(path) != expected:
+                    bad.append(rel_path)
+    return bad
@@ -0,0 +1,287 @@
+import os
+import math
+import numpy as np
+import tensorflow as tf
+import yaml
+
+AUTOTUNE = tf.data.AUTOTUNE
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+def list_image_files(split_dir):
+    """
+    Lists images under split_dir/<class>/. Classes are indexed in sorted directory
+    order, the same as flow_from_directory, so models trained with either loader
+    share label indices.
+    Returns (paths, labels, class_names).
+    """
+    class_names = sorted(d for d in os.listdir(split_dir) if os.path.isdir(os.path.join(split_dir, d)))
+    paths, labels = [], []
+    for idx, cls in enumerate(class_names):
+        cls_dir = os.path.join(split_dir, cls)
+        for name in sorted(os.listdir(cls_dir)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(cls_dir, name))
+                labels.append(idx)
+    return paths, np.array(labels, dtype=np.int32), class_names
+
+def decode_and_resize(path, img_size):
+    """
+    Reads and decodes one image to a uint8 (H, W, 3) tensor at img_size.
+    """
+    image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+    image = tf.image.resize(image, img_size)
+    return tf.cast(tf.clip_by_value(tf.round(image), 0, 255), tf.uint8)
+
+def random_affine(images, aug, seed=None):
+    """
+    Vectorized random rotation / zoom / shift for a batch of float images, using one
+    projective transform per image (same parameters as ImageDataGenerator's
+    rotation_range, zoom_range, width_shift_range and height_shift_range).
+    """
+    shape = tf.shape(images)
+    batch, height, width = shape[0], tf.cast(shape[1], tf.float32), shape[2]
+    width = tf.cast(width, tf.float32)
+
+    max_angle = aug.get('rotation_range', 0) * math.pi / 180.0
+    zoom_min, zoom_max = aug.get('zoom_range', [1.0, 1.0])
+    angle = tf.random.uniform([batch], -max_angle, max_angle, seed=seed)
+    zoom = tf.random.uniform([batch], zoom_min, zoom_max, seed=seed)
+    tx = tf.random.uniform([batch], -1.0, 1.0, seed=seed) * aug.get('width_shift_range', 0) * width
+    ty = tf.random.uniform([batch], -1.0, 1.0, seed=seed) * aug.get('height_shift_range', 0) * height
+
+    # Output pixel (x, y) samples input at center + zoom * R(angle) * ((x, y) - center) + shift
+    cx, cy = (width - 1) / 2.0, (height - 1) / 2.0
+    a0, a1 = zoom * tf.cos(angle), -zoom * tf.sin(angle)
+    b0, b1 = zoom * tf.sin(angle), zoom * tf.cos(angle)
+    a2 = cx - a0 * cx - a1 * cy + tx
+    b2 = cy - b0 * cx - b1 * cy + ty
+    zeros = tf.zeros([batch])
+    transforms = tf.stack([a0, a1, a2, b0, b1, b2, zeros, zeros], axis=1)
+
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=images,
+        transforms=transforms,
+        output_shape=shape[1:3],
+        fill_value=0.0,
+        interpolation="BILINEAR",
+        fill_mode="NEAREST"
+    )
+
+def augment_batch(images, aug, seed=None):
+    """
+    Applies the `augmentation:` config to a float batch in [0, 255], vectorized over the batch.
+    """
+    batch = tf.shape(images)[0]
+
+    if aug.get('horizontal_flip', False):
+        flip = tf.random.uniform([batch, 1, 1, 1], seed=seed) < 0.5
+        images = tf.where(flip, tf.reverse(images, axis=[2]), images)
+    if aug.get('vertical_flip', False):
+        flip = tf.random.uniform([batch, 1, 1, 1], seed=seed) < 0.5
+        images = tf.where(flip, tf.reverse(images, axis=[1]), images)
+
+    images = random_affine(images, aug, seed)
+
+    if 'brightness_range' in aug:
+        low, high = aug['brightness_range']
+        images = images * tf.random.uniform([batch, 1, 1, 1], low, high, seed=seed)
+    if 'contrast_range' in aug:
+        low, high = aug['contrast_range']
+        factor = tf.random.uniform([batch, 1, 1, 1], low, high, seed=seed)
+        mean = tf.reduce_mean(images, axis=[1, 2, 3], keepdims=True)
+        images = (images - mean) * factor + mean
+
+    return tf.clip_by_value(images, 0.0, 255.0)
+
+def finalize_dataset(ds, batch_size, training, aug, shuffle_buffer, label_fn=None, seed=None,
+                     with_sample_weights=False):
+    """
+    Shared tail of the input pipelines: shuffle, batch, augment, normalize, prefetch.
+    `ds` must yield (uint8 image, label) pairs; `label_fn` maps a batch of labels
+    to model targets (e.g. one-hot encoding). With `with_sample_weights`, label_fn
+    returns (targets, sample_weights) and batches are (images, targets, sample_weights).
+    """
+    if training:
+        ds = ds.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size, num_parallel_calls=AUTOTUNE)
+
+    def to_model_inputs(images, labels):
+        images = tf.cast(images, tf.float32)
+        if training:
+            images = augment_batch(images, aug, seed)
+        targets = label_fn(labels) if label_fn else labels
+        if with_sample_weights:
+            return (images / 255.0,) + tuple(targets)
+        return images / 255.0, targets
+
+    ds = ds.map(to_model_inputs, num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+def build_image_dataset(split_dir, training=False, config=None, cache=True, seed=None):
+    """
+    tf.data replacement for ImageDataGenerator.flow_from_directory(class_mode='categorical').
+    Decoding runs in parallel, decoded uint8 images are cached (in memory, or under
+    data.cache_dir if set), and augmentation runs batched with tf.image ops.
+    Returns (dataset, labels, class_names); labels are in dataset order when training=False.
+    """
+    config = config or load_config()
+    img_size = tuple(config['data']['image_size'])
+    batch_size = config['data']['batch_size']
+
+    paths, labels, class_names = list_image_files(split_dir)
+    ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+    ds = ds.map(lambda p, y: (decode_and_resize(p, img_size), y), num_parallel_calls=AUTOTUNE)
+    if cache:
+        cache_dir = config['data'].get('cache_dir')
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            split_name = os.path.basename(os.path.normpath(split_dir))
+            ds = ds.cache(os.path.join(cache_dir, split_name))
+        else:
+            ds = ds.cache()
+
+    num_classes = len(class_names)
+    ds = finalize_dataset(ds, batch_size, training, config['augmentation'],
+                          shuffle_buffer=max(1, len(paths)),
+                          label_fn=lambda y: tf.one_hot(y, num_classes), seed=seed)
+    return ds, labels, class_names
+
+def build_sharded_dataset(split, training=False, config=None, seed=None):
+    """
+    Streams a split from the pre-resized shards written by prepare_dataset
+    (data.shard_format), so no JPEG is decoded per epoch.
+    Returns (dataset, labels, class_names); labels are in dataset order when training=False.
+    """
+    from data.shards import load_manifest, verify_shards
+    config = config or load_config()
+    shards_dir = os.path.join(config['paths']['processed_data'], 'shards')
+    manifest = load_manifest(shards_dir)
+    if config['data'].get('verify_shards', False):
+        bad = verify_shards(shards_dir, manifest)
+        if bad:
+            raise ValueError(f"Shard checksum mismatch: {bad}")
+
+    height, width = manifest['image_size']
+    shards = manifest['splits'][split]['shards']
+    labels = np.array([y for shard in shards for y in shard['labels']], dtype=np.int32)
+    files = [[os.path.join(shards_dir, f) for f in shard['files']] for shard in shards]
+
+    if manifest['format'] == 'tfrecord':
+        features = {
+            "image": tf.io.FixedLenFeature([], tf.string),
+            "label": tf.io.FixedLenFeature([], tf.int64)
+        }
+
+        def parse(record):
+            example = tf.io.parse_single_example(record, features)
+            image = tf.reshape(tf.io.decode_raw(example["image"], tf.uint8), [height, width, 3])
+            return image, tf.cast(example["label"], tf.int32)
+
+        record_files = [f[0] for f in files]
+        if training:
+            # Interleave shards (each holds a single class) so batches mix classes
+            ds = tf.data.Dataset.from_tensor_slices(record_files).shuffle(len(record_files), seed=seed)
+            ds = ds.interleave(tf.data.TFRecordDataset, cycle_length=min(16, len(record_files)),
+                               num_parallel_calls=AUTOTUNE, deterministic=False)
+        else:
+            ds = tf.data.TFRecordDataset(record_files)
+        ds = ds.map(parse, num_parallel_calls=AUTOTUNE)
+    else:
+        signature = (tf.TensorSpec((height, width, 3), tf.uint8), tf.TensorSpec((), tf.int32))
+
+        def read_shard(i):
+            images = np.load(files[i][0], mmap_mode='r')
+            shard_labels = np.load(files[i][1])
+            for image, label in zip(images, shard_labels):
+                yield np.asarray(image), label
+
+        def shard_dataset(i):
+            return tf.data.Dataset.from_generator(read_shard, args=(i,), output_signature=signature)
+
+        shard_ids = tf.data.Dataset.range(len(files))
+        if training:
+            # Same as the TFRecord branch: interleave shards so batches mix classes
+            ds = shard_ids.shuffle(max(1, len(files)), seed=seed)
+            ds = ds.interleave(shard_dataset, cycle_length=max(1, min(16, len(files))),
+                               num_parallel_calls=AUTOTUNE, deterministic=False)
+        else:
+            ds = shard_ids.flat_map(shard_dataset)
+
+    class_names = manifest['class_names']
+    num_classes = len(class_names)
+    ds = finalize_dataset(ds, config['data']['batch_size'], training, config['augmentation'],
+                          shuffle_buffer=min(len(labels), 4 * config['data'].get('shard_size', 1024)) or 1,
+                          label_fn=lambda y: tf.one_hot(y, num_classes), seed=seed)
+    return ds, labels, class_names
+
+def load_split(split, training=False, config=None, seed=None):
+    """
+    Builds the dataset for a processed split using the loader selected by data.loader
+    ('tf_data' or 'shards'). Returns (dataset, labels, class_names).
+    """
+    config = config or load_config()
+    if config['data'].get('loader', 'tf_data') == 'shards':
+        return build_sharded_dataset(split, training=training, config=config, seed=seed)
+    split_dir = os.path.join(config['paths']['processed_data'], split)
+    return build_image_dataset(split_dir, training=training, config=config, cache=training or split != 'test',
+                               seed=seed)
+
+def build_multitask_dataset(split, severity_csv, training=False, config=None, class_weights=None, seed=None):
+    """
+    Dataset for the shared-backbone multi-head model: every image of a processed split
+    with its class label, plus its severity score when the CSV (columns 'filename',
+    'severity'; matched by file name) has one. Images without a score get zero weight
+    on the severity loss. `class_weights` (per class index) weight the diagnosis loss.
+    Yields (images, {'diagnosis', 'severity'} targets, matching sample weights).
+    """
+    import pandas as pd
+    config = config or load_config()
+    img_size = tuple(config['data']['image_size'])
+
+    paths, labels, class_names = list_image_files(os.path.join(config['paths']['processed_data'], split))
+    scores = {}
+    if severity_csv and os.path.exists(severity_csv):
+        df = pd.read_csv(severity_csv)
+        scores = {os.path.basename(f): float(v) for f, v in zip(df['filename'], df['severity'])}
+    severity = np.array([scores.get(os.path.basename(p), 0.0) for p in paths], dtype=np.float32)
+    has_severity = np.array([os.path.basename(p) in scores for p in paths], dtype=np.float32)
+    print(f"{split}: {len(paths)} images, {int(has_severity.sum())} with severity labels")
+
+    num_classes = len(class_names)
+    weights = tf.constant(class_weights if class_weights is not None else np.ones(num_classes), tf.float32)
+
+    ds = tf.data.Dataset.from_tensor_slices((paths, (labels, severity, has_severity)))
+    ds = ds.map(lambda p, y: (decode_and_resize(p, img_size), y), num_parallel_calls=AUTOTUNE).cache()
+
+    def label_fn(targets):
+        cls, score, mask = targets
+        return ({'diagnosis': tf.one_hot(cls, num_classes), 'severity': score[:, None]},
+                {'diagnosis': tf.gather(weights, cls), 'severity': mask})
+
+    ds = finalize_dataset(ds, config['data']['batch_size'], training, config['augmentation'],
+                          shuffle_buffer=max(1, len(paths)), label_fn=label_fn, seed=seed,
+                          with_sample_weights=True)
+    return ds, labels, class_names
+
+def build_regression_dataset(csv_path, images_root, training=False, config=None, seed=None):
+    """
+    tf.data pipeline for severity regression. The CSV needs 'filename' (relative to
+    images_root) and 'severity' (0-100) columns. Yields (image, severity) batches.
+    """
+    import pandas as pd
+    config = config or load_config()
+    img_size = tuple(config['data']['image_size'])
+    batch_size = config['data']['batch_size']
+
+    df = pd.read_csv(csv_path)
+    paths = [os.path.join(images_root, f) for f in df['filename']]
+    targets = df['severity'].astype(np.float32).values
+
+    ds = tf.data.Dataset.from_tensor_slices((paths, targets))
+    ds = ds.map(lambda p, y: (decode_and_resize(p, img_size), y), num_parallel_calls=AUTOTUNE).cache()
+    return finalize_dataset(ds, batch_size, training, config['augmentation'],
+                            shuffle_buffer=max(1, len(paths)), seed=seed)
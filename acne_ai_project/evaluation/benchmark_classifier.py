@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import tensorflow as tf
+import yaml
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference.classifier_engine import ClassifierEngine
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+def time_calls(fn, batch, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(batch)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def summarize(name, latencies):
+    print(f"{name:<28} mean={latencies.mean():8.2f} ms  p50={np.percentile(latencies, 50):8.2f} ms  "
+          f"p95={np.percentile(latencies, 95):8.2f} ms")
+
+def benchmark_classifier(iterations=50, batch_size=1, jit_compile=False):
+    """
+    Compares per-call latency of `model.predict` against the compiled ClassifierEngine.
+    """
+    config = load_config()
+    model_path = os.path.join(config['paths']['models'], 'best_classifier.keras')
+    img_size = tuple(config['data']['image_size'])
+
+    if not os.path.exists(model_path):
+        print("Model not found.")
+        return
+
+    print("Loading model...")
+    model = tf.keras.models.load_model(model_path)
+    engine = ClassifierEngine(model, input_shape=img_size + (3,), jit_compile=jit_compile,
+                              batch_buckets=[batch_size])
+    engine.warmup()
+
+    batch = np.random.rand(batch_size, *img_size, 3).astype(np.float32)
+
+    # Warm up model.predict as well so the comparison excludes first-call tracing
+    model.predict(batch, verbose=0)
+
+    baseline = time_calls(lambda x: model.predict(x, verbose=0), batch, iterations)
+    compiled = time_calls(engine.predict, batch, iterations)
+
+    print(f"\nBatch size {batch_size}, {iterations} iterations, jit_compile={jit_compile}")
+    summarize("model.predict", baseline)
+    summarize("ClassifierEngine.predict", compiled)
+    print(f"Speedup (p50): {np.percentile(baseline, 50) / np.percentile(compiled, 50):.2f}x")
+
+    max_diff = np.abs(model.predict(batch, verbose=0) - engine.predict(batch)).max()
+    print(f"Max abs difference between outputs: {max_diff:.2e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classifier inference latency benchmark")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--jit", action="store_true", help="Enable XLA compilation")
+    args = parser.parse_args()
+    benchmark_classifier(args.iterations, args.batch_size, args.jit)
@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import argparse
+import itertools
+import numpy as np
+import cv2
+import yaml
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference.bulk_predict import iter_image_paths
+from inference.face_detection import FACE_BACKENDS, FaceDetector, select_face, box_iou
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+def load_samples(source, limit):
+    """
+    Decodes up to `limit` RGB images. Every sample is expected to contain a face,
+    so the share of images with a detection is the backend's recall.
+    """
+    samples = []
+    for path in itertools.islice(iter_image_paths(source), limit):
+        image = cv2.imread(path)
+        if image is not None:
+            samples.append((path, cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+    return samples
+
+def run_backend(detector, samples, repeats):
+    latencies, faces = [], []
+    for _, image in samples:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            boxes = detector.detect_faces(image)
+            latencies.append((time.perf_counter() - start) * 1000)
+        faces.append(select_face(boxes, image.shape))
+    return np.array(latencies), faces
+
+def benchmark_face_detection(source=None, backends=FACE_BACKENDS, max_sides=(0, 640), limit=100, repeats=3):
+    """
+    Compares face detection backends and detection resolutions on a sample set:
+    latency per image, recall, and box agreement (IoU) with the first configuration.
+    """
+    config = load_config()
+    settings = config.get('face_detection', {})
+    source = source or config['paths']['raw_data']
+    samples = load_samples(source, limit)
+    if not samples:
+        print(f"No images found in {source}.")
+        return
+    print(f"{len(samples)} images from {source}, {repeats} runs each\n")
+
+    reference = None
+    print(f"{'backend':<11}{'max_side':>9}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'recall':>8}{'IoU vs ref':>12}")
+    for backend, max_side in itertools.product(backends, max_sides):
+        try:
+            detector = FaceDetector(min_detection_confidence=settings.get('min_confidence', 0.5),
+                                    backend=backend, max_side=max_side,
+                                    yunet_model_path=settings.get('yunet_model_path'),
+                                    haar_cascade_path=settings.get('haar_cascade_path'))
+        except (ImportError, FileNotFoundError, cv2.error) as e:
+            print(f"{backend:<11}{max_side:>9}  unavailable: {e}")
+            continue
+
+        detector.detect_faces(samples[0][1]) # Warm up lazy initialization
+        latencies, faces = run_backend(detector, samples, repeats)
+        recall = np.mean([face is not None for face in faces])
+
+        agreement = "ref"
+        if reference is None:
+            reference = faces
+        else:
+            ious = [box_iou(a, b) for a, b in zip(reference, faces) if a is not None and b is not None]
+            agreement = f"{np.mean(ious):.3f}" if ious else "-"
+        print(f"{backend:<11}{max_side:>9}{latencies.mean():>10.2f}{np.percentile(latencies, 50):>10.2f}"
+              f"{np.percentile(latencies, 95):>10.2f}{recall:>8.3f}{agreement:>12}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Face detection backend benchmark")
+    parser.add_argument("--images", help="Directory, glob or CSV manifest of face images (default: paths.raw_data)")
+    parser.add_argument("--backends", nargs="+", default=list(FACE_BACKENDS), choices=FACE_BACKENDS)
+    parser.add_argument("--max-side", nargs="+", type=int, default=[0, 640],
+                        help="Detection resolutions to compare, 0 = full resolution")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    benchmark_face_detection(args.images, args.backends, args.max_side, args.limit, args.repeats)
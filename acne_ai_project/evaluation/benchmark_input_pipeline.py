@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import argparse
+import yaml
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.augment_data import get_train_augmentation_generator
+from data.tf_dataset import build_image_dataset
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+def time_epoch(batches, num_batches):
+    """
+    Pulls `num_batches` batches and returns (seconds, images).
+    """
+    images = 0
+    start = time.perf_counter()
+    for _ in range(num_batches):
+        x, _ = next(batches)
+        images += len(x)
+    return time.perf_counter() - start, images
+
+def benchmark_input_pipeline(epochs=2):
+    """
+    Times full augmented training epochs through ImageDataGenerator vs the tf.data
+    pipeline (no model attached, so this isolates input throughput).
+    The first tf.data epoch includes decoding; later epochs read the cache.
+    """
+    config = load_config()
+    train_dir = os.path.join(config['paths']['processed_data'], 'train')
+    img_size = tuple(config['data']['image_size'])
+    batch_size = config['data']['batch_size']
+
+    generator = get_train_augmentation_generator().flow_from_directory(
+        train_dir, target_size=img_size, batch_size=batch_size, class_mode='categorical')
+    dataset, labels, _ = build_image_dataset(train_dir, training=True, config=config)
+    steps = len(generator)
+
+    print(f"\n{'loader':<22}{'epoch':>6}{'seconds':>10}{'images/sec':>12}")
+    for name, make_iter in [("ImageDataGenerator", lambda: generator),
+                            ("tf.data", lambda: iter(dataset))]:
+        for epoch in range(1, epochs + 1):
+            seconds, images = time_epoch(make_iter(), steps)
+            print(f"{name:<22}{epoch:>6}{seconds:>10.2f}{images / seconds:>12.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Input pipeline epoch-time benchmark")
+    parser.add_argument("--epochs", type=int, default=2)
+    args = parser.parse_args()
+    benchmark_input_pipeline(args.epochs)
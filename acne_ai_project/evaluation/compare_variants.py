@@ -0,0 +1,234 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+import yaml
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference.profiling import rss_mb
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+def variant_specs(config):
+    """
+    Every model artifact the repo can produce, as {name: {"backend", "path"}}.
+    """
+    models_dir = config['paths']['models']
+    inference_cfg = config.get('inference', {})
+    keras = lambda name: {"backend": "keras", "path": os.path.join(models_dir, name)}
+    return {
+        "classifier": keras('best_classifier.keras'),
+        "ensemble": keras('best_ensemble.keras'),
+        "multitask": keras('best_multitask.keras'),
+        "student": keras('best_student.keras'),
+        "severity": keras('best_severity.keras'),
+        "onnx": {"backend": "onnxruntime",
+                 "path": inference_cfg.get('onnx_classifier_path', 'export/onnx/classifier.onnx')},
+        "tflite": {"backend": "tflite",
+                   "path": inference_cfg.get('tflite_classifier_path', 'export/tflite/classifier.tflite')},
+        "tflite_quantized": {"backend": "tflite",
+                             "path": config.get('quantization', {}).get('output_path',
+                                                                         'export/tflite/classifier_int8.tflite')},
+    }
+
+def build_test_cache(config, split='test'):
+    """
+    Materializes a processed split once as uint8 images, class labels and severity
+    scores (NaN where the severity CSV has none), so every variant sees identical inputs.
+    Reused while the split is unchanged (see training/feature_cache.split_fingerprint).
+    """
+    from data.tf_dataset import load_split, list_image_files
+    from training.feature_cache import split_fingerprint
+
+    cache_dir = config['paths'].get('feature_cache', 'data/feature_cache')
+    cache_path = os.path.join(cache_dir, f"{split}_split_{split_fingerprint(config, split)}.npz")
+    if os.path.exists(cache_path):
+        return cache_path
+
+    print(f"Caching the {split} split to {cache_path}...")
+    dataset, labels, _ = load_split(split, config=config)
+    images = np.concatenate([np.round(batch.numpy() * 255).astype(np.uint8) for batch, _ in dataset])
+
+    severity = np.full(len(labels), np.nan, dtype=np.float32)
+    severity_csv = config['paths'].get('severity_labels')
+    if config['data'].get('loader', 'tf_data') != 'shards' and severity_csv and os.path.exists(severity_csv):
+        import pandas as pd
+        # Same (sorted) order as load_split for the tf_data loader
+        paths, _, _ = list_image_files(os.path.join(config['paths']['processed_data'], split))
+        df = pd.read_csv(severity_csv)
+        scores = {os.path.basename(f): float(v) for f, v in zip(df['filename'], df['severity'])}
+        severity = np.array([scores.get(os.path.basename(p), np.nan) for p in paths], dtype=np.float32)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez(cache_path, images=images, labels=labels, severity=severity)
+    return cache_path
+
+def load_variant(spec, config):
+    from inference.backends import KerasBackend, OnnxRuntimeBackend, TFLiteBackend
+    input_shape = tuple(config['data']['image_size']) + (3,)
+    threads = config.get('serving', {}).get('intra_op_threads', 0)
+    if spec["backend"] == 'keras':
+        return KerasBackend(spec["path"], input_shape, batch_buckets=[1, spec["batch_size"]])
+    if spec["backend"] == 'onnxruntime':
+        return OnnxRuntimeBackend(spec["path"], input_shape, intra_op_threads=threads)
+    if spec["backend"] == 'tflite':
+        return TFLiteBackend(spec["path"], input_shape, num_threads=threads, batch_buckets=[1, spec["batch_size"]])
+    raise ValueError(f"Unknown backend: {spec['backend']}")
+
+def split_outputs(outputs):
+    """
+    Returns (class probabilities or None, severity scores or None) from name_outputs.
+    """
+    if isinstance(outputs, dict):
+        return outputs['diagnosis'], outputs['severity'].reshape(-1)
+    if outputs.shape[-1] == 1:
+        return None, outputs.reshape(-1)
+    return outputs, None
+
+def median_ms(fn, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+def evaluate_variant(spec, cache_path, iterations=30):
+    """
+    Runs in a fresh process per variant (see run_worker) so peak RSS is the variant's own.
+    """
+    from sklearn.metrics import accuracy_score, f1_score
+    config = load_config()
+    batch_size = spec["batch_size"]
+    data = np.load(cache_path)
+    images, labels, severity = data['images'], data['labels'], data['severity']
+
+    start = time.perf_counter()
+    model = load_variant(spec, config)
+    model.warmup()
+    load_s = time.perf_counter() - start
+
+    probs, scores = [], []
+    for i in range(0, len(images), batch_size):
+        diagnosis, score = split_outputs(model.predict(images[i:i + batch_size].astype(np.float32) / 255.0))
+        if diagnosis is not None:
+            probs.append(diagnosis)
+        if score is not None:
+            scores.append(score)
+
+    result = {"backend": spec["backend"], "path": spec["path"], "load_s": round(load_s, 2),
+              "size_mb": round(os.path.getsize(spec["path"]) / 1e6, 2)}
+    if probs:
+        y_pred = np.argmax(np.concatenate(probs), axis=1)
+        result["accuracy"] = round(float(accuracy_score(labels, y_pred)), 4)
+        result["macro_f1"] = round(float(f1_score(labels, y_pred, average='macro')), 4)
+    if scores:
+        scores = np.concatenate(scores)
+        labelled = ~np.isnan(severity)
+        if labelled.any():
+            result["severity_mae"] = round(float(np.abs(scores[labelled] - severity[labelled]).mean()), 2)
+
+    single = images[:1].astype(np.float32) / 255.0
+    batch = np.resize(images, (batch_size,) + images.shape[1:]).astype(np.float32) / 255.0
+    model.predict(batch) # Batched shape warmup (TFLite resizes its input tensor)
+    result["latency_b1_ms"] = round(median_ms(lambda: model.predict(single), iterations), 2)
+    batched_ms = median_ms(lambda: model.predict(batch), max(3, iterations // 4))
+    result["latency_batch_ms_per_image"] = round(batched_ms / batch_size, 2)
+    peak_rss = rss_mb("VmHWM")
+    # Includes the cached split, which is the same for every variant
+    result["peak_rss_mb"] = round(peak_rss, 1) if peak_rss is not None else None
+    return result
+
+def run_worker(spec, cache_path, iterations):
+    """
+    Evaluates one variant in a subprocess and returns its result dict (or an error).
+    """
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_path = f.name
+    try:
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", json.dumps(spec),
+                                    "--cache", cache_path, "--result-file", result_path,
+                                    "--iterations", str(iterations)])
+        if completed.returncode != 0:
+            return {"backend": spec["backend"], "path": spec["path"],
+                    "error": f"worker exited with code {completed.returncode}"}
+        with open(result_path) as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+def print_table(results):
+    columns = [("variant", 17, None), ("backend", 12, None), ("accuracy", 9, ".4f"), ("macro_f1", 9, ".4f"),
+               ("severity_mae", 13, ".2f"), ("latency_b1_ms", 14, ".2f"),
+               ("latency_batch_ms_per_image", 16, ".2f"), ("size_mb", 9, ".1f"), ("peak_rss_mb", 12, ".0f")]
+    headers = {"latency_batch_ms_per_image": "batch ms/img", "latency_b1_ms": "b1 ms",
+               "severity_mae": "severity MAE", "peak_rss_mb": "peak RSS MB", "size_mb": "size MB"}
+    print("\n" + "".join(f"{headers.get(name, name):<{width}}" for name, width, _ in columns))
+    for name, result in results.items():
+        row = dict(result, variant=name)
+        if "error" in row:
+            print(f"{name:<17}{row['backend']:<12}{row['error']}")
+            continue
+        cells = []
+        for column, width, fmt in columns:
+            value = row.get(column)
+            cells.append(f"{'-' if value is None else format(value, fmt) if fmt else value:<{width}}")
+        print("".join(cells))
+
+def compare_variants(names=None, batch_size=32, iterations=30, output_path=None):
+    """
+    Evaluates model variants on the same cached test split, one subprocess each, and
+    prints accuracy/F1 (severity MAE for regression heads) next to batch-1 and batched
+    latency, artifact size and peak RSS. Variants whose artifact is missing are skipped.
+    """
+    config = load_config()
+    specs = variant_specs(config)
+    names = names or list(specs)
+    cache_path = build_test_cache(config)
+
+    results = {}
+    for name in names:
+        if name not in specs:
+            print(f"Unknown variant '{name}', expected one of {list(specs)}.")
+            continue
+        spec = dict(specs[name], batch_size=batch_size)
+        if not os.path.exists(spec["path"]):
+            print(f"Skipping {name}: {spec['path']} not found.")
+            continue
+        print(f"\n=== {name} ({spec['backend']}: {spec['path']}) ===")
+        results[name] = run_worker(spec, cache_path, iterations)
+
+    if not results:
+        print("No model artifacts found. Train or export models first.")
+        return results
+    print_table(results)
+    if output_path:
+        with open(output_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {output_path}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare model variants on accuracy, latency and memory")
+    parser.add_argument("--variants", nargs="+", help="Subset of variants (default: every artifact found)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=30, help="Batch-1 latency samples")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--cache", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = evaluate_variant(json.loads(args.worker), args.cache, args.iterations)
+        with open(args.result_file, "w") as f:
+            json.dump(result, f)
+    else:
+        compare_variants(args.variants, args.batch_size, args.iterations, args.output)
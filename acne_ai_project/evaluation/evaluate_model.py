@@ -1,9 +1,10 @@
 
 import os
 import sys
+import time
 import numpy as np
 import tensorflow as tf
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, f1_score
 import matplotlib.pyplot as plt
 import seaborn as sns
 import yaml
@@ -11,39 +12,46 @@ import yaml
 # Add project root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from data.augment_data import get_basic_generator
+from data.tf_dataset import load_split
 
 def load_config(config_path="config/config.yaml"):
     with open(config_path, "r") as f:
         return yaml.safe_load(f)
 
+def get_test_generator(config, split='test'):
+    """
+    Returns an unshuffled generator over a processed split, so predictions line up with `.classes`.
+    """
+    test_datagen = get_basic_generator()
+    return test_datagen.flow_from_directory(
+        os.path.join(config['paths']['processed_data'], split),
+        target_size=tuple(config['data']['image_size']),
+        batch_size=config['data']['batch_size'],
+        class_mode='categorical',
+        shuffle=False
+    )
+
 def evaluate():
     config = load_config()
-    processed_dir = config['paths']['processed_data']
     model_path = os.path.join(config['paths']['models'], 'best_classifier.keras')
-    img_size = tuple(config['data']['image_size'])
-    batch_size = config['data']['batch_size']
     
     if not os.path.exists(model_path):
         print("Model not found.")
         return
 
     print("Loading test data...")
-    test_datagen = get_basic_generator()
-    test_generator = test_datagen.flow_from_directory(
-        os.path.join(processed_dir, 'test'),
-        target_size=img_size,
-        batch_size=batch_size,
-        class_mode='categorical',
-        shuffle=False
-    )
+    if config['data'].get('loader', 'tf_data') in ('tf_data', 'shards'):
+        test_data, y_true, _ = load_split('test', config=config)
+    else:
+        test_data = get_test_generator(config)
+        y_true = test_data.classes
     
     print("Loading model...")
     model = tf.keras.models.load_model(model_path)
     
     print("Evaluating...")
-    Y_pred = model.predict(test_generator)
+    Y_pred = model.predict(test_data)
     y_pred = np.argmax(Y_pred, axis=1)
-    y_true = test_generator.classes
     
     print("Classification Report:")
     report = classification_report(y_true, y_pred, target_names=config['data']['class_names'])
@@ -59,5 +67,52 @@ def evaluate():
     plt.savefig('evaluation/confusion_matrix.png')
     print("Confusion matrix saved to evaluation/confusion_matrix.png")
 
+def measure_latency_ms(model, img_size, iterations=50):
+    """
+    Median batch-1 latency through the compiled inference path the API uses.
+    """
+    from inference.classifier_engine import ClassifierEngine
+    engine = ClassifierEngine(model, input_shape=img_size + (3,), batch_buckets=[1])
+    engine.warmup()
+    image = np.random.rand(1, *img_size, 3).astype(np.float32)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        engine.predict(image)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+def compare_student_teacher():
+    """
+    Compares the distilled student (best_student.keras) against its teacher on the
+    test split: accuracy, macro F1, batch-1 CPU latency, parameters and file size.
+    """
+    config = load_config()
+    models_dir = config['paths']['models']
+    img_size = tuple(config['data']['image_size'])
+    teacher_file = {'classifier': 'best_classifier.keras',
+                    'ensemble': 'best_ensemble.keras'}[config.get('distillation', {}).get('teacher', 'classifier')]
+    candidates = [("teacher", os.path.join(models_dir, teacher_file)),
+                  ("student", os.path.join(models_dir, 'best_student.keras'))]
+
+    test_data, y_true, _ = load_split('test', config=config)
+    rows = []
+    for name, path in candidates:
+        if not os.path.exists(path):
+            print(f"Skipping {name}: {path} not found.")
+            continue
+        model = tf.keras.models.load_model(path)
+        y_pred = np.argmax(model.predict(test_data, verbose=0), axis=1)
+        rows.append((name, os.path.basename(path), accuracy_score(y_true, y_pred),
+                     f1_score(y_true, y_pred, average='macro'), measure_latency_ms(model, img_size),
+                     model.count_params() / 1e6, os.path.getsize(path) / 1e6))
+
+    print(f"\n{'model':<9}{'file':<24}{'accuracy':>9}{'macro F1':>10}{'latency ms':>12}{'params M':>10}{'size MB':>9}")
+    for name, file, acc, f1, latency, params, size in rows:
+        print(f"{name:<9}{file:<24}{acc:>9.4f}{f1:>10.4f}{latency:>12.2f}{params:>10.2f}{size:>9.1f}")
+    if len(rows) == 2:
+        print(f"Student speedup: {rows[0][4] / rows[1][4]:.2f}x, accuracy delta: {rows[1][2] - rows[0][2]:+.4f}")
+    return rows
+
 if __name__ == "__main__":
     evaluate()
@@ -0,0 +1,164 @@
+import os
+import sys
+import argparse
+import itertools
+import tracemalloc
+import numpy as np
+import cv2
+import yaml
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference.bulk_predict import iter_image_paths
+from inference.preprocess import Preprocessor, decode_image
+from inference.profiling import StageTrace
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+def face_box(image, detector=None):
+    """
+    Relative (x0, y0, x1, y1) face box, or the central 60% of the image without a detector.
+    """
+    if detector is not None:
+        _, bbox = detector.detect_and_crop(image, bgr=True)
+        if bbox:
+            h, w = image.shape[:2]
+            return bbox[0] / w, bbox[1] / h, bbox[2] / w, bbox[3] / h
+    return 0.2, 0.2, 0.8, 0.8
+
+def crop(image, box):
+    h, w = image.shape[:2]
+    return image[int(box[1] * h):int(box[3] * h), int(box[0] * w):int(box[2] * w)]
+
+def legacy_path(data, box, image_size, yolo_imgsz, trace):
+    """
+    The previous preprocessing: full decode, full-image RGB copy, float64 `/ 255.0`,
+    and ultralytics letterboxing the crop again on its own.
+    """
+    with trace.stage("decode"):
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    with trace.stage("classifier_input"):
+        face = crop(rgb, box)
+        classifier_input = cv2.resize(face, image_size) / 255.0
+        classifier_input = classifier_input.astype(np.float32) # What TF does on the way in
+    with trace.stage("yolo_input"):
+        h, w = face.shape[:2]
+        scale = yolo_imgsz / max(h, w)
+        resized = cv2.resize(face, (round(w * scale), round(h * scale)))
+        padded = np.full((yolo_imgsz, yolo_imgsz, 3), 114, dtype=np.uint8)
+        padded[:resized.shape[0], :resized.shape[1]] = resized
+        yolo_input = padded.transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+    return classifier_input, yolo_input
+
+def fused_path(data, box, preprocessor, min_side, trace):
+    with trace.stage("decode"):
+        image = decode_image(data, min_side)
+    with trace.stage("classifier_input"):
+        face = crop(image, box)
+        classifier_input = preprocessor.classifier_input(face)
+    with trace.stage("yolo_input"):
+        yolo_input = preprocessor.yolo_input(face)
+    return classifier_input, yolo_input
+
+def profile(name, fn, samples, repeats):
+    """
+    Mean per-stage latency and the peak traced allocation of one call.
+    """
+    totals, peaks = {}, []
+    for data, box in samples:
+        for _ in range(repeats):
+            trace = StageTrace()
+            tracemalloc.start()
+            fn(data, box, trace)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            for stage, ms in trace.stages.items():
+                totals.setdefault(stage, []).append(ms)
+    means = {stage: np.mean(ms) for stage, ms in totals.items()}
+    stages = "  ".join(f"{stage}={ms:7.2f} ms" for stage, ms in means.items())
+    print(f"{name:<8}{stages}  total={sum(means.values()):7.2f} ms  peak alloc={np.mean(peaks) / 1e6:7.1f} MB")
+
+def profile_preprocessing(source=None, limit=20, repeats=3, detect_faces=True):
+    """
+    Profiles the legacy and the fused preprocessing stage on the same images and face boxes.
+    """
+    config = load_config()
+    image_size = tuple(config['data']['image_size'])
+    settings = config.get('preprocess', {})
+    min_side = settings.get('decode_min_side', 0)
+    yolo_imgsz = settings.get('yolo_imgsz', 640)
+    source = source or config['paths']['raw_data']
+
+    detector = None
+    if detect_faces:
+        from inference.face_detection import load_face_detector
+        try:
+            detector = load_face_detector(config)
+        except (ImportError, FileNotFoundError) as e:
+            print(f"Face detector unavailable ({e}), using a central box.")
+
+    samples = []
+    for path in itertools.islice(iter_image_paths(source), limit):
+        data = np.fromfile(path, dtype=np.uint8)
+        image = decode_image(data)
+        if image is not None:
+            samples.append((data, face_box(image, detector)))
+    if not samples:
+        print(f"No images found in {source}.")
+        return
+    print(f"{len(samples)} images from {source}, {repeats} runs each, decode_min_side={min_side}\n")
+
+    preprocessor = Preprocessor(image_size, yolo_imgsz)
+    legacy = lambda data, box, trace: legacy_path(data, box, image_size, yolo_imgsz, trace)
+    fused = lambda data, box, trace: fused_path(data, box, preprocessor, min_side, trace)
+    fused(*samples[0], StageTrace()) # Allocate the per-thread buffers outside the measurement
+    profile("legacy", legacy, samples, repeats)
+    profile("fused", fused, samples, repeats)
+
+def profile_pipeline(source=None, limit=20):
+    """
+    Per-stage timings of the full AcnePipeline on encoded images, including how much
+    of the classifier and YOLO time overlapped (inference.parallel_stages).
+    """
+    from inference.pipeline import AcnePipeline
+    config = load_config()
+    source = source or config['paths']['raw_data']
+    pipeline = AcnePipeline()
+    pipeline.warmup()
+
+    totals = {}
+    for path in itertools.islice(iter_image_paths(source), limit):
+        with open(path, 'rb') as f:
+            data = f.read()
+        trace = StageTrace()
+        pipeline.predict_bytes(data, trace=trace)
+        for stage, ms in trace.as_dict().items():
+            totals.setdefault(stage, []).append(ms)
+    for stage, ms in totals.items():
+        print(f"{stage:<14} mean={np.mean(ms):8.2f} ms  p95={np.percentile(ms, 95):8.2f} ms")
+    models, classify = totals.get("models", []), totals.get("classify", [])
+    spots = totals.get("detect_spots", [])
+    if not spots:
+        print("detect_spots   absent (YOLO skipped on every request, no stage overlap to report)")
+    elif models and len(models) == len(classify) == len(spots):
+        # "models" is the wall time of the classify + detect_spots group
+        overlap = np.array(classify) + np.array(spots) - np.array(models)
+        print(f"Stage overlap: mean={overlap.mean():.2f} ms saved by running the models concurrently")
+    else:
+        print(f"detect_spots   ran on {len(spots)} of {len(models)} requests, stage overlap not reported")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage preprocessing profile")
+    parser.add_argument("--images", help="Directory, glob or CSV manifest of images (default: paths.raw_data)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-face-detection", action="store_true", help="Crop a central box instead")
+    parser.add_argument("--pipeline", action="store_true", help="Profile the full pipeline instead")
+    args = parser.parse_args()
+    if args.pipeline:
+        profile_pipeline(args.images, args.limit)
+    else:
+        profile_preprocessing(args.images, args.limit, args.repeats, not args.no_face_detection)
@@ -0,0 +1,119 @@
+import os
+import sys
+import glob
+import shutil
+import numpy as np
+import cv2
+import tensorflow as tf
+import yaml
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference.backends import OnnxRuntimeBackend, TFLiteBackend, classifier_artifact_path, name_outputs
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+def export_classifier_onnx(model, output_path, input_shape, opset=13):
+    import tf2onnx
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    spec = (tf.TensorSpec((None,) + tuple(input_shape), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=output_path)
+    print(f"ONNX classifier saved to {output_path}")
+
+def export_classifier_tflite(model, output_path):
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+    print(f"TFLite classifier saved to {output_path}")
+
+def export_yolo_onnx(weights, output_path, imgsz=640):
+    """
+    Exports the YOLO detector with ultralytics' own exporter (writes next to the weights),
+    then moves the result to `output_path`. The batch axis is dynamic: the micro-batcher
+    and predict_many send several faces per call.
+    """
+    from ultralytics import YOLO
+    exported = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    shutil.move(exported, output_path)
+    print(f"ONNX detector saved to {output_path}")
+
+def load_parity_samples(config, num_samples=16):
+    """
+    Uses real validation images when available (falls back to random inputs).
+    """
+    img_size = tuple(config['data']['image_size'])
+    val_dir = os.path.join(config['paths']['processed_data'], 'val')
+    paths = sorted(glob.glob(os.path.join(val_dir, '*', '*')))[:num_samples]
+
+    samples = []
+    for path in paths:
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        img = cv2.cvtColor(cv2.resize(img, img_size), cv2.COLOR_BGR2RGB)
+        samples.append(img.astype(np.float32) / 255.0)
+    if not samples:
+        print("No validation images found, using random inputs for the parity check.")
+        return np.random.rand(num_samples, *img_size, 3).astype(np.float32)
+    return np.stack(samples)
+
+def verify_parity(model, backend, samples, atol):
+    """
+    Checks that `backend` reproduces the Keras model's outputs within `atol` and agrees
+    on the top-1 class (for the multi-head model: on both heads, severity rescaled to
+    0-1 before comparing). Returns True if it does.
+    """
+    expected = name_outputs(model.predict(samples, verbose=0))
+    actual = backend.predict(samples)
+    if not isinstance(expected, dict):
+        expected, actual = {'diagnosis': expected}, {'diagnosis': actual}
+
+    max_diff = max(float(np.abs((expected[k] - actual[k]) / (100.0 if k == 'severity' else 1.0)).max())
+                   for k in expected)
+    top1_agreement = float(np.mean(expected['diagnosis'].argmax(axis=1) == actual['diagnosis'].argmax(axis=1)))
+    ok = max_diff <= atol and top1_agreement == 1.0
+    status = "OK" if ok else "MISMATCH"
+    print(f"[{status}] {backend.name}: max abs diff={max_diff:.2e} (atol={atol}), "
+          f"top-1 agreement={top1_agreement:.2%}")
+    return ok
+
+def export_to_onnx(include_tflite=True, include_yolo=True):
+    config = load_config()
+    inference_cfg = config.get('inference', {})
+    # The model served by the keras backend (inference.keras_model)
+    model_path = classifier_artifact_path(config, 'keras')
+    input_shape = tuple(config['data']['image_size']) + (3,)
+    onnx_path = inference_cfg.get('onnx_classifier_path', 'export/onnx/classifier.onnx')
+    tflite_path = inference_cfg.get('tflite_classifier_path', 'export/tflite/classifier.tflite')
+    atol = inference_cfg.get('parity_atol', 1e-3)
+
+    if not os.path.exists(model_path):
+        print(f"Error: Model not found at {model_path}")
+        return False
+
+    print(f"Loading model from {model_path}...")
+    model = tf.keras.models.load_model(model_path)
+    samples = load_parity_samples(config)
+
+    export_classifier_onnx(model, onnx_path, input_shape)
+    ok = verify_parity(model, OnnxRuntimeBackend(onnx_path, input_shape), samples, atol)
+
+    if include_tflite:
+        export_classifier_tflite(model, tflite_path)
+        ok = verify_parity(model, TFLiteBackend(tflite_path, input_shape), samples, atol) and ok
+
+    if include_yolo:
+        yolo_weights = inference_cfg.get('yolo_weights') or 'yolov8m.pt'
+        export_yolo_onnx(yolo_weights, inference_cfg.get('yolo_onnx_path', 'export/onnx/yolo.onnx'),
+                         imgsz=config.get('preprocess', {}).get('yolo_imgsz', 640))
+
+    if not ok:
+        print("Parity check failed: do not serve these exports.")
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if export_to_onnx() else 1)
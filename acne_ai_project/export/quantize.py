@@ -0,0 +1,121 @@
+import os
+import sys
+import argparse
+import numpy as np
+import tensorflow as tf
+from sklearn.metrics import classification_report, accuracy_score
+import yaml
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.augment_data import get_basic_generator
+from evaluation.evaluate_model import get_test_generator
+from inference.backends import TFLiteBackend
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+def representative_dataset(config, num_samples):
+    """
+    Yields single calibration images from data/processed/val (rescaled like training).
+    """
+    val_generator = get_basic_generator().flow_from_directory(
+        os.path.join(config['paths']['processed_data'], 'val'),
+        target_size=tuple(config['data']['image_size']),
+        batch_size=1,
+        class_mode=None,
+        shuffle=True,
+        seed=42
+    )
+    num_samples = min(num_samples, val_generator.samples)
+
+    def generator():
+        for _ in range(num_samples):
+            yield [next(val_generator).astype(np.float32)]
+    return generator
+
+def convert(model, config, mode, num_calibration_samples):
+    """
+    mode: 'int8' (full integer with calibration) or 'dynamic' (dynamic-range weights only).
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == 'int8':
+        converter.representative_dataset = representative_dataset(config, num_calibration_samples)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.uint8
+        converter.inference_output_type = tf.uint8
+    elif mode != 'dynamic':
+        raise ValueError(f"Unknown quantization mode: {mode}")
+    return converter.convert()
+
+def predict_generator(predict_fn, generator):
+    preds = []
+    for i in range(len(generator)):
+        images, _ = generator[i]
+        preds.append(predict_fn(images))
+    return np.concatenate(preds, axis=0)
+
+def quantize_classifier(mode=None):
+    """
+    Quantizes best_classifier.keras, evaluates it on the test split against the float
+    model with the same classification_report as evaluation/evaluate_model.py, and only
+    keeps the artifact if the accuracy drop is within quantization.max_accuracy_drop.
+    """
+    config = load_config()
+    quant_cfg = config.get('quantization', {})
+    mode = mode or quant_cfg.get('mode', 'int8')
+    model_path = os.path.join(config['paths']['models'], 'best_classifier.keras')
+    output_path = quant_cfg.get('output_path', 'export/tflite/classifier_int8.tflite')
+    max_drop = quant_cfg.get('max_accuracy_drop', 0.01)
+    input_shape = tuple(config['data']['image_size']) + (3,)
+
+    if not os.path.exists(model_path):
+        print(f"Error: Model not found at {model_path}")
+        return False
+
+    print(f"Loading model from {model_path}...")
+    model = tf.keras.models.load_model(model_path)
+
+    print(f"Quantizing ({mode}) with {quant_cfg.get('calibration_samples', 200)} calibration images...")
+    candidate_path = output_path + ".candidate"
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(candidate_path, "wb") as f:
+        f.write(convert(model, config, mode, quant_cfg.get('calibration_samples', 200)))
+
+    print("Evaluating float and quantized models on the test split...")
+    test_generator = get_test_generator(config)
+    y_true = test_generator.classes
+    float_pred = predict_generator(lambda x: model.predict(x, verbose=0), test_generator).argmax(axis=1)
+    quantized = TFLiteBackend(candidate_path, input_shape)
+    quant_pred = predict_generator(quantized.predict, test_generator).argmax(axis=1)
+
+    class_names = config['data']['class_names']
+    print("Quantized Classification Report:")
+    print(classification_report(y_true, quant_pred, target_names=class_names))
+
+    float_acc = accuracy_score(y_true, float_pred)
+    quant_acc = accuracy_score(y_true, quant_pred)
+    drop = float_acc - quant_acc
+    float_size = os.path.getsize(model_path) / 1e6
+    quant_size = os.path.getsize(candidate_path) / 1e6
+    print(f"Accuracy: float={float_acc:.4f}, quantized={quant_acc:.4f}, drop={drop:.4f} (budget {max_drop})")
+    print(f"Size: float={float_size:.1f} MB, quantized={quant_size:.1f} MB")
+
+    if drop > max_drop:
+        os.remove(candidate_path)
+        print("Rejected: accuracy drop exceeds budget. Quantized model discarded.")
+        return False
+
+    os.replace(candidate_path, output_path)
+    print(f"Accepted: quantized model saved to {output_path}")
+    print(f"To serve it, set inference.backend: tflite and inference.tflite_classifier_path: {output_path}")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Post-training quantization of the classifier")
+    parser.add_argument("--mode", choices=["int8", "dynamic"], default=None,
+                        help="Overrides quantization.mode from config.yaml")
+    args = parser.parse_args()
+    sys.exit(0 if quantize_classifier(args.mode) else 1)
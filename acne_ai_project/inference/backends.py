@@ -0,0 +1,200 @@
+import os
+import threading
+import numpy as np
+
+# Backends import their runtime lazily so selecting one doesn't pay for the others
+
+def name_outputs(outputs):
+    """
+    Normalizes model outputs: a single array for plain classifiers, or
+    {'diagnosis': probabilities, 'severity': scores} for the multi-head model
+    (the severity head is the one with a single unit).
+    """
+    if isinstance(outputs, dict):
+        outputs = list(outputs.values())
+    if isinstance(outputs, (list, tuple)):
+        if len(outputs) == 1:
+            return outputs[0]
+        return {('severity' if out.shape[-1] == 1 else 'diagnosis'): out for out in outputs}
+    return outputs
+
+class KerasBackend:
+    """
+    Serves the .keras classifier through the compiled ClassifierEngine.
+    """
+    name = "keras"
+
+    def __init__(self, model_path, input_shape, jit_compile=False, batch_buckets=(1, 2, 4, 8)):
+        from inference.classifier_engine import ClassifierEngine
+        self.model_path = model_path
+        self.engine = ClassifierEngine.from_path(model_path, input_shape=input_shape,
+                                                 jit_compile=jit_compile, batch_buckets=batch_buckets)
+
+    def warmup(self):
+        self.engine.warmup()
+
+    def predict(self, images):
+        return name_outputs(self.engine.predict(images))
+
+class OnnxRuntimeBackend:
+    """
+    Serves an ONNX export of the classifier (see export/export_onnx.py) with ONNX Runtime on CPU.
+    """
+    name = "onnxruntime"
+
+    def __init__(self, model_path, input_shape, intra_op_threads=0):
+        import onnxruntime as ort
+        self.model_path = model_path
+        self.input_shape = tuple(input_shape)
+
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def warmup(self):
+        self.predict(np.zeros((1,) + self.input_shape, dtype=np.float32))
+
+    def predict(self, images):
+        images = np.asarray(images, dtype=np.float32)
+        return name_outputs(self.session.run(None, {self.input_name: images}))
+
+class TFLiteBackend:
+    """
+    Serves a TFLite export of the classifier. Handles both float and fully
+    integer-quantized models (inputs/outputs are (de)quantized here).
+    Like ClassifierEngine, batches are padded up to `batch_buckets`; each bucket gets
+    its own interpreter, allocated once, so varying micro-batch sizes never resize
+    tensors on the hot path. Interpreters aren't thread-safe, so calls are serialized.
+    """
+    name = "tflite"
+
+    def __init__(self, model_path, input_shape, num_threads=None, batch_buckets=(1, 2, 4, 8)):
+        self.model_path = model_path
+        self.input_shape = tuple(input_shape)
+        self.num_threads = num_threads or None
+        self.batch_buckets = sorted(set(int(b) for b in batch_buckets)) or [1]
+        self._interpreters = {}
+        self._lock = threading.Lock()
+
+    def warmup(self):
+        for size in self.batch_buckets:
+            self.predict(np.zeros((size,) + self.input_shape, dtype=np.float32))
+
+    def _interpreter(self, batch_size):
+        # (interpreter, input detail, output details) with tensors allocated for batch_size
+        if batch_size not in self._interpreters:
+            import tensorflow as tf
+            interpreter = tf.lite.Interpreter(model_path=self.model_path, num_threads=self.num_threads)
+            input_index = interpreter.get_input_details()[0]['index']
+            interpreter.resize_tensor_input(input_index, (batch_size,) + self.input_shape)
+            interpreter.allocate_tensors()
+            self._interpreters[batch_size] = (interpreter, interpreter.get_input_details()[0],
+                                              interpreter.get_output_details())
+        return self._interpreters[batch_size]
+
+    def _bucket_for(self, n):
+        for size in self.batch_buckets:
+            if n <= size:
+                return size
+        return self.batch_buckets[-1]
+
+    def _invoke(self, images):
+        n = len(images)
+        bucket = self._bucket_for(n)
+        if bucket > n:
+            padding = np.zeros((bucket - n,) + images.shape[1:], dtype=np.float32)
+            images = np.concatenate([images, padding], axis=0)
+        interpreter, input_detail, output_details = self._interpreter(bucket)
+
+        input_dtype = input_detail['dtype']
+        if input_dtype in (np.uint8, np.int8):
+            scale, zero_point = input_detail['quantization']
+            images = np.clip(np.round(images / scale + zero_point),
+                             np.iinfo(input_dtype).min, np.iinfo(input_dtype).max).astype(input_dtype)
+        interpreter.set_tensor(input_detail['index'], images)
+        interpreter.invoke()
+        outputs = []
+        for detail in output_details:
+            output = interpreter.get_tensor(detail['index'])[:n]
+            if detail['dtype'] in (np.uint8, np.int8):
+                scale, zero_point = detail['quantization']
+                output = (output.astype(np.float32) - zero_point) * scale
+            outputs.append(output.astype(np.float32))
+        return outputs
+
+    def predict(self, images):
+        images = np.asarray(images, dtype=np.float32)
+        max_bucket = self.batch_buckets[-1]
+        with self._lock:
+            chunks = [self._invoke(images[start:start + max_bucket])
+                      for start in range(0, len(images), max_bucket)]
+        return name_outputs([np.concatenate(parts, axis=0) for parts in zip(*chunks)])
+
+def classifier_artifact_path(config, backend=None):
+    """
+    Returns the model file the given backend serves the classifier from.
+    """
+    inference_cfg = config.get('inference', {})
+    backend = backend or inference_cfg.get('backend', 'keras')
+    if backend == 'onnxruntime':
+        return inference_cfg.get('onnx_classifier_path', 'export/onnx/classifier.onnx')
+    if backend == 'tflite':
+        return inference_cfg.get('tflite_classifier_path', 'export/tflite/classifier.tflite')
+    return os.path.join(config['paths']['models'], inference_cfg.get('keras_model', 'best_classifier.keras'))
+
+def load_classifier_backend(config, backend=None):
+    """
+    Builds the classifier backend selected by `inference.backend` in config.yaml
+    ('keras' | 'onnxruntime' | 'tflite'). Returns None if the artifact doesn't exist.
+    """
+    inference_cfg = config.get('inference', {})
+    backend = backend or inference_cfg.get('backend', 'keras')
+    model_path = classifier_artifact_path(config, backend)
+    input_shape = tuple(config['data']['image_size']) + (3,)
+    threads = config.get('serving', {}).get('intra_op_threads', 0)
+
+    if not os.path.exists(model_path):
+        return None
+
+    if backend == 'keras':
+        return KerasBackend(model_path, input_shape,
+                            jit_compile=inference_cfg.get('jit_compile', False),
+                            batch_buckets=inference_cfg.get('batch_buckets', [1, 2, 4, 8]))
+    if backend == 'onnxruntime':
+        return OnnxRuntimeBackend(model_path, input_shape, intra_op_threads=threads)
+    if backend == 'tflite':
+        return TFLiteBackend(model_path, input_shape, num_threads=threads,
+                             batch_buckets=inference_cfg.get('batch_buckets', [1, 2, 4, 8]))
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+def load_fallback_classifier(config):
+    """
+    Builds the smaller classifier (degradation.fallback_model, e.g. the distilled student)
+    used when the full one would miss a request's deadline.
+    Returns None if none is configured or the file doesn't exist.
+    """
+    fallback_model = config.get('degradation', {}).get('fallback_model')
+    if not fallback_model:
+        return None
+    model_path = os.path.join(config['paths']['models'], fallback_model)
+    if not os.path.exists(model_path):
+        return None
+    inference_cfg = config.get('inference', {})
+    return KerasBackend(model_path, tuple(config['data']['image_size']) + (3,),
+                        jit_compile=inference_cfg.get('jit_compile', False), batch_buckets=[1])
+
+def yolo_weights_path(config):
+    """
+    Returns the YOLO weights matching the selected backend, or None for the default.
+    ultralytics serves .onnx weights through ONNX Runtime itself.
+    """
+    inference_cfg = config.get('inference', {})
+    if inference_cfg.get('backend', 'keras') == 'onnxruntime':
+        onnx_path = inference_cfg.get('yolo_onnx_path')
+        if onnx_path and os.path.exists(onnx_path):
+            return onnx_path
+    return inference_cfg.get('yolo_weights')
@@ -0,0 +1,227 @@
+import os
+import sys
+import csv
+import glob
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference.preprocess import decode_image as decode_reduced
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+def iter_image_paths(source):
+    """
+    Yields image paths from a directory (recursive), a glob pattern or a CSV manifest.
+    A manifest either has a header row with a 'path' column, or no header and
+    the paths in its first column.
+    """
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(root, name)
+    elif source.lower().endswith('.csv'):
+        with open(source, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            column = header.index('path') if 'path' in header else 0
+            if 'path' not in header:
+                # No header row: the first line is already a path
+                yield header[column]
+            for row in reader:
+                if row:
+                    yield row[column]
+    else:
+        for path in sorted(glob.iglob(source, recursive=True)):
+            if path.lower().endswith(IMAGE_EXTENSIONS):
+                yield path
+
+def decode_image(path, min_side=0):
+    """
+    Reads and decodes one image, JPEGs at reduced scale down to `min_side` (see
+    inference/preprocess.py). Returns (path, bgr_array or None).
+    """
+    try:
+        data = np.fromfile(path, dtype=np.uint8)
+    except OSError:
+        return path, None
+    return path, decode_reduced(data, min_side)
+
+def prefetch_decoded(paths, num_workers=4, prefetch=64, min_side=0):
+    """
+    Decodes images on a thread pool, keeping at most `prefetch` images in flight,
+    and yields (path, image) in input order.
+    """
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append(executor.submit(decode_image, path, min_side))
+            if len(pending) >= prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+class JsonlWriter:
+    """
+    Appends one JSON line per result. With resume=False the file starts empty;
+    when resuming, a partial last line left by an interrupted run is dropped first
+    so the next record doesn't get glued onto it.
+    """
+    def __init__(self, output_path, resume=True):
+        self.output_path = output_path
+        if resume and os.path.exists(output_path):
+            self._drop_partial_line()
+            self._file = open(output_path, 'a')
+        else:
+            self._file = open(output_path, 'w')
+
+    def _drop_partial_line(self):
+        with open(self.output_path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            end = size
+            # Scan backwards for the last newline
+            while end > 0:
+                start = max(0, end - 65536)
+                f.seek(start)
+                chunk = f.read(end - start)
+                newline = chunk.rfind(b'\n')
+                if newline != -1:
+                    end = start + newline + 1
+                    break
+                end = start
+            if end != size:
+                f.truncate(end)
+
+    def completed_paths(self):
+        done = set()
+        with open(self.output_path, 'r') as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['path'])
+                except (ValueError, KeyError):
+                    continue
+        return done
+
+    def write(self, rows):
+        for row in rows:
+            self._file.write(json.dumps(row) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class ParquetWriter:
+    """
+    Writes each batch as a separate part file inside `output_dir`, so results are
+    durable incrementally and a resumed run only appends new parts.
+    """
+    def __init__(self, output_dir, resume=True):
+        import pandas as pd
+        self.pd = pd
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        if not resume:
+            for part in self._part_files():
+                os.remove(part)
+        self._part = len(self._part_files())
+
+    def _part_files(self):
+        return sorted(glob.glob(os.path.join(self.output_dir, 'part-*.parquet')))
+
+    def completed_paths(self):
+        done = set()
+        for part in self._part_files():
+            done.update(self.pd.read_parquet(part, columns=['path'])['path'])
+        return done
+
+    def write(self, rows):
+        records = []
+        for row in rows:
+            diagnosis = row.get('primary_diagnosis') or {}
+            records.append({
+                'path': row['path'],
+                'status': row.get('status', 'error'),
+                'acne_type': diagnosis.get('acne_type'),
+                'confidence': diagnosis.get('confidence'),
+                'total_spots': (row.get('detected_spots') or {}).get('total_count'),
+                'report': json.dumps(row)
+            })
+        part_path = os.path.join(self.output_dir, f'part-{self._part:06d}.parquet')
+        tmp_path = part_path + '.tmp'
+        self.pd.DataFrame(records).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, part_path)
+        self._part += 1
+
+    def close(self):
+        pass
+
+def open_writer(output_path, resume=True):
+    """
+    Opens the writer for `output_path`; with resume=False existing results are discarded.
+    """
+    if output_path.endswith('.jsonl'):
+        return JsonlWriter(output_path, resume)
+    return ParquetWriter(output_path, resume)
+
+def bulk_predict(source, output_path, pipeline=None, batch_size=16, num_workers=4,
+                 prefetch=64, resume=True, log_every=200):
+    """
+    Streams every image from `source` through the pipeline in batches and appends
+    results to `output_path` (.jsonl file, or a directory of Parquet parts otherwise).
+    With `resume`, images already present in the output are skipped.
+    """
+    if pipeline is None:
+        from inference.pipeline import AcnePipeline
+        pipeline = AcnePipeline()
+
+    writer = open_writer(output_path, resume)
+    done = writer.completed_paths() if resume else set()
+    if done:
+        print(f"Resuming: {len(done)} images already processed.")
+
+    paths = (p for p in iter_image_paths(source) if p not in done)
+
+    processed = 0
+    start = time.perf_counter()
+    last_log = 0
+    batch_paths, batch_images = [], []
+
+    def flush():
+        result = pipeline.predict_many(batch_images)
+        rows = [dict(report, path=path) for path, report in zip(batch_paths, result['reports'])]
+        writer.write(rows)
+        return len(rows)
+
+    try:
+        for path, image in prefetch_decoded(paths, num_workers, prefetch, pipeline.decode_min_side):
+            if image is None:
+                writer.write([{"path": path, "error": "Could not read image"}])
+                processed += 1
+                continue
+            batch_paths.append(path)
+            batch_images.append(image)
+            if len(batch_images) >= batch_size:
+                processed += flush()
+                batch_paths, batch_images = [], []
+
+            if processed - last_log >= log_every:
+                last_log = processed
+                rate = processed / (time.perf_counter() - start)
+                print(f"Processed {processed} images ({rate:.1f} images/sec)")
+
+        if batch_images:
+            processed += flush()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"Done: {processed} images in {elapsed:.1f}s ({rate:.1f} images/sec). Results: {output_path}")
+    return {"processed": processed, "seconds": elapsed, "images_per_sec": rate}
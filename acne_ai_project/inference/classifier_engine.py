@@ -0,0 +1,62 @@
+import numpy as np
+import tensorflow as tf
+
+class ClassifierEngine:
+    """
+    Compiled inference wrapper around a Keras classifier.
+
+    `model.predict` builds a data adapter and a fresh execution loop on every call,
+    which dominates latency for single images. The engine instead traces the model
+    once into a tf.function with a fixed input signature (optionally XLA compiled)
+    and pads incoming batches up to a small set of bucket sizes, so the traced graph
+    never sees a new shape after warmup.
+    """
+    def __init__(self, model, input_shape=(224, 224, 3), jit_compile=False, batch_buckets=(1, 2, 4, 8)):
+        self.model = model
+        self.input_shape = tuple(input_shape)
+        self.batch_buckets = sorted(set(int(b) for b in batch_buckets)) or [1]
+
+        spec = tf.TensorSpec(shape=(None,) + self.input_shape, dtype=tf.float32)
+        self._infer = tf.function(self._forward, input_signature=[spec], jit_compile=jit_compile)
+
+    def _forward(self, images):
+        return self.model(images, training=False)
+
+    def warmup(self):
+        """
+        Runs one forward pass per bucket size so tracing/compilation happens at load time.
+        """
+        for size in self.batch_buckets:
+            self._infer(tf.zeros((size,) + self.input_shape, dtype=tf.float32))
+
+    def _bucket_for(self, n):
+        for size in self.batch_buckets:
+            if n <= size:
+                return size
+        return self.batch_buckets[-1]
+
+    def predict(self, images):
+        """
+        images: array-like of shape (N, H, W, 3), already normalized to [0, 1].
+        Returns a numpy array of class probabilities of shape (N, num_classes), or the
+        same structure as the model's outputs (list/dict of arrays) for multi-head models.
+        """
+        images = np.asarray(images, dtype=np.float32)
+        max_bucket = self.batch_buckets[-1]
+
+        outputs = []
+        for start in range(0, len(images), max_bucket):
+            chunk = images[start:start + max_bucket]
+            n = len(chunk)
+            bucket = self._bucket_for(n)
+            if bucket > n:
+                padding = np.zeros((bucket - n,) + chunk.shape[1:], dtype=np.float32)
+                chunk = np.concatenate([chunk, padding], axis=0)
+            result = self._infer(tf.convert_to_tensor(chunk))
+            outputs.append(tf.nest.map_structure(lambda t: t.numpy()[:n], result))
+        return tf.nest.map_structure(lambda *parts: np.concatenate(parts, axis=0), *outputs)
+
+    @classmethod
+    def from_path(cls, model_path, **kwargs):
+        model = tf.keras.models.load_model(model_path)
+        return cls(model, **kwargs)
@@ -1,48 +1,261 @@
-
+import os
+import threading
 import cv2
-import mediapipe as mp
 import numpy as np
 
-class FaceDetector:
+def select_face(boxes, frame_shape, strategy="largest"):
+    """
+    Picks one face from a list of (x, y, w, h, score) pixel boxes.
+    'largest' takes the biggest box, 'central' the one closest to the frame centre.
+    Ties are broken by score and then position, so the choice is deterministic.
+    """
+    if not boxes:
+        return None
+    h, w = frame_shape[:2]
+    if strategy == "central":
+        def key(b):
+            dx = (b[0] + b[2] / 2) - w / 2
+            dy = (b[1] + b[3] / 2) - h / 2
+            return (dx * dx + dy * dy, -b[4], b[1], b[0])
+    else:
+        def key(b):
+            return (-(b[2] * b[3]), -b[4], b[1], b[0])
+    return min(boxes, key=key)
+
+def pad_box(box, frame_shape, padding=0.2):
+    """
+    Expands an (x, y, w, h) box by `padding` of its size on each side and clips it
+    to the frame. Returns integer (x_start, y_start, x_end, y_end).
+    """
+    h, w = frame_shape[:2]
+    x, y, box_w, box_h = box[:4]
+    x_pad = box_w * padding
+    y_pad = box_h * padding
+    x_start = max(0, int(x - x_pad))
+    y_start = max(0, int(y - y_pad))
+    x_end = min(w, int(x + box_w + x_pad))
+    y_end = min(h, int(y + box_h + y_pad))
+    return x_start, y_start, x_end, y_end
+
+def box_iou(a, b):
+    """
+    Intersection over union of two (x, y, w, h, ...) boxes.
+    """
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+class MediaPipeFaceBackend:
+    name = "mediapipe"
+
     def __init__(self, min_detection_confidence=0.5):
+        import mediapipe as mp # Imported lazily, it is slow to import
         self.mp_face_detection = mp.solutions.face_detection
         self.face_detection = self.mp_face_detection.FaceDetection(
             min_detection_confidence=min_detection_confidence)
 
-    def detect_and_crop(self, image, padding=0.2):
+    def detect(self, image):
+        results = self.face_detection.process(image)
+        if not results.detections:
+            return []
+
+        h, w = image.shape[:2]
+        boxes = []
+        for detection in results.detections:
+            bboxC = detection.location_data.relative_bounding_box
+            boxes.append((bboxC.xmin * w, bboxC.ymin * h, bboxC.width * w, bboxC.height * h,
+                          float(detection.score[0]) if detection.score else 0.0))
+        return boxes
+
+class YuNetFaceBackend:
+    """
+    OpenCV DNN face detector (cv2.FaceDetectorYN), needs the YuNet ONNX model
+    (face_detection_yunet_2023mar.onnx from the OpenCV model zoo).
+    """
+    name = "yunet"
+
+    def __init__(self, model_path, min_detection_confidence=0.5):
+        if not model_path or not os.path.exists(model_path):
+            raise FileNotFoundError(f"YuNet model not found at {model_path}")
+        self.detector = cv2.FaceDetectorYN.create(model_path, "", (320, 320),
+                                                  score_threshold=min_detection_confidence)
+
+    def detect(self, image):
+        h, w = image.shape[:2]
+        self.detector.setInputSize((w, h))
+        _, faces = self.detector.detect(cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+        if faces is None:
+            return []
+        return [(float(f[0]), float(f[1]), float(f[2]), float(f[3]), float(f[-1])) for f in faces]
+
+class HaarFaceBackend:
+    """
+    OpenCV Haar cascade. Needs nothing beyond opencv, but is the least accurate;
+    meant for hosts where neither MediaPipe nor the YuNet model is available.
+    """
+    name = "haar"
+
+    def __init__(self, cascade_path=None):
+        cascade_path = cascade_path or os.path.join(cv2.data.haarcascades,
+                                                    "haarcascade_frontalface_default.xml")
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise FileNotFoundError(f"Haar cascade not found at {cascade_path}")
+
+    def detect(self, image):
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5)
+        # The cascade has no confidence, every accepted face scores 1.0
+        return [(float(x), float(y), float(w), float(h), 1.0) for x, y, w, h in faces]
+
+FACE_BACKENDS = ("mediapipe", "yunet", "haar")
+
+class FaceDetector:
+    """
+    Face detection on top of a swappable backend. Detection runs on a copy downscaled
+    so its longest side is at most `max_side` pixels (phone photos are often 12 MP),
+    and boxes are mapped back to the full-resolution image for the crop.
+    """
+    def __init__(self, min_detection_confidence=0.5, backend="mediapipe", max_side=640,
+                 yunet_model_path=None, haar_cascade_path=None):
+        if backend == "mediapipe":
+            self.backend = MediaPipeFaceBackend(min_detection_confidence)
+        elif backend == "yunet":
+            self.backend = YuNetFaceBackend(yunet_model_path, min_detection_confidence)
+        elif backend == "haar":
+            self.backend = HaarFaceBackend(haar_cascade_path)
+        else:
+            raise ValueError(f"Unknown face detection backend '{backend}', expected one of {FACE_BACKENDS}")
+        self.name = self.backend.name
+        self.max_side = max_side
+        # Neither the MediaPipe graph nor cv2.FaceDetectorYN is safe to call concurrently
+        self._lock = threading.Lock()
+
+    def detect_faces(self, image, bgr=False):
+        """
+        Runs detection on an RGB image (or BGR with bgr=True, converted after downscaling).
+        Returns: list of (x, y, w, h, score) boxes in full-resolution pixels, possibly empty.
+        """
+        h, w = image.shape[:2]
+        scale = 1.0
+        if self.max_side and max(h, w) > self.max_side:
+            scale = self.max_side / max(h, w)
+            image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))),
+                               interpolation=cv2.INTER_AREA)
+        if bgr:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        with self._lock:
+            boxes = self.backend.detect(image)
+        if scale == 1.0:
+            return boxes
+        return [(x / scale, y / scale, bw / scale, bh / scale, score) for x, y, bw, bh, score in boxes]
+
+    def detect_and_crop(self, image, padding=0.2, strategy="largest", bgr=False):
         """
         Detects face in image and crops with padding.
+        When several faces are found the largest one is used (see select_face).
+        The crop is a view into `image` and keeps its channel order.
         Returns: cropped_face (numpy array) or None if no face found.
         """
         if isinstance(image, str):
             image = cv2.imread(image)
             image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         
-        results = self.face_detection.process(image)
+        face = select_face(self.detect_faces(image, bgr), image.shape, strategy)
         
-        if not results.detections:
+        if face is None:
             return None, None
-            
-        # Assume detecting the largest face if multiple
-        detection = results.detections[0] # Simplification
-        
-        h, w, c = image.shape
-        bboxC = detection.location_data.relative_bounding_box
-        
-        x = int(bboxC.xmin * w)
-        y = int(bboxC.ymin * h)
-        box_w = int(bboxC.width * w)
-        box_h = int(bboxC.height * h)
-        
-        # Apply padding
-        x_pad = int(box_w * padding)
-        y_pad = int(box_h * padding)
-        
-        x_start = max(0, x - x_pad)
-        y_start = max(0, y - y_pad)
-        x_end = min(w, x + box_w + x_pad)
-        y_end = min(h, y + box_h + y_pad)
         
+        x_start, y_start, x_end, y_end = pad_box(face, image.shape, padding)
         cropped_face = image[y_start:y_end, x_start:x_end]
         
         return cropped_face, (x_start, y_start, x_end, y_end)
+
+def load_face_detector(config, backend=None):
+    """
+    Builds the FaceDetector selected by face_detection.backend (or `backend`).
+    """
+    settings = config.get('face_detection', {})
+    return FaceDetector(min_detection_confidence=settings.get('min_confidence', 0.5),
+                        backend=backend or settings.get('backend', 'mediapipe'),
+                        max_side=settings.get('max_side', 640),
+                        yunet_model_path=settings.get('yunet_model_path'),
+                        haar_cascade_path=settings.get('haar_cascade_path'))
+
+class FaceTracker:
+    """
+    Face crops for a stream of frames from one camera (live view or burst capture).
+    Full detection only runs every `detect_every` frames; frames in between reuse
+    the last box, exponentially smoothed across detections to stop the crop from
+    jittering. On re-detection the face overlapping the current track is kept, so
+    the tracked person doesn't switch when someone else enters the frame.
+    Use one tracker per stream, it is not thread-safe.
+    """
+    def __init__(self, detector, detect_every=5, smoothing=0.5, strategy="largest",
+                 padding=0.2, max_misses=2, min_iou=0.3):
+        self.detector = detector
+        self.detect_every = max(1, int(detect_every))
+        self.smoothing = smoothing
+        self.strategy = strategy
+        self.padding = padding
+        self.max_misses = max_misses
+        self.min_iou = min_iou
+        self.frames = 0
+        self.detections = 0
+        self.reset()
+
+    def reset(self):
+        self.box = None
+        self._since_detect = 0
+        self._misses = 0
+
+    def _detect(self, frame, bgr):
+        self.detections += 1
+        return self.detector.detect_faces(frame, bgr)
+
+    def _associate(self, boxes, frame_shape):
+        if self.box is not None and boxes:
+            best = max(boxes, key=lambda b: box_iou(self.box, b))
+            if box_iou(self.box, best) >= self.min_iou:
+                return best
+        return select_face(boxes, frame_shape, self.strategy)
+
+    def update(self, frame, bgr=True):
+        """
+        Advances the tracker by one frame (BGR by default, as from cv2.VideoCapture).
+        Returns (cropped_face, bbox) like FaceDetector.detect_and_crop, or (None, None).
+        The crop is a view into `frame`, copy it if the frame buffer gets reused.
+        """
+        self.frames += 1
+        if self.box is None or self._since_detect >= self.detect_every - 1:
+            face = self._associate(self._detect(frame, bgr), frame.shape)
+            self._since_detect = 0
+            if face is None:
+                self._misses += 1
+                if self.box is None or self._misses > self.max_misses:
+                    self.reset()
+                    return None, None
+            else:
+                self._misses = 0
+                if self.box is None:
+                    self.box = face
+                else:
+                    a = self.smoothing
+                    self.box = tuple(a * old + (1 - a) * new for old, new in zip(self.box, face))
+        else:
+            self._since_detect += 1
+
+        x_start, y_start, x_end, y_end = pad_box(self.box, frame.shape, self.padding)
+        if x_end <= x_start or y_end <= y_start:
+            self.reset()
+            return None, None
+        return frame[y_start:y_end, x_start:x_end], (x_start, y_start, x_end, y_end)
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "detections": self.detections,
+            "detection_ratio": round(self.detections / self.frames, 3) if self.frames else 0.0
+        }
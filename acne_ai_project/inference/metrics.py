@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import random
+import threading
+
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MEGAPIXEL_BUCKETS = (0.1, 0.5, 1, 2, 4, 8, 12, 16, 24, 48)
+BYTES_BUCKETS = (5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2e7)
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels.keys(), escaped)) + "}"
+
+class Counter:
+    def __init__(self, name, help_text, lock):
+        self.name = name
+        self.help = help_text
+        self._lock = lock
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{format_labels(dict(key))} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, lock):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._lock = lock
+        self._values = {} # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, state in sorted(self._values.items()):
+            labels = dict(key)
+            for bound, count in zip(self.buckets, state):
+                lines.append(f"{self.name}_bucket{format_labels(dict(labels, le=bound))} {count}")
+            lines.append(f"{self.name}_bucket{format_labels(dict(labels, le='+Inf'))} {state[-1]}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {round(state[-2], 6)}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {state[-1]}")
+        return lines
+
+class Gauge:
+    """
+    Read at scrape time from `fn`, which returns {labels dict as tuple of items: value}
+    or a single number.
+    """
+    def __init__(self, name, help_text, fn):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+
+    def render(self):
+        values = self.fn()
+        if values is None:
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{format_labels(dict(key))} {value}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics registry rendered in the Prometheus text format.
+    Every gunicorn worker keeps its own registry, so a scrape sees one worker;
+    series carry no worker label, sum them per instance in the dashboard.
+    """
+    def __init__(self, prefix="acne_"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._metrics = []
+
+    def counter(self, name, help_text):
+        return self._register(Counter(self.prefix + name, help_text, self._lock))
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS_S):
+        return self._register(Histogram(self.prefix + name, help_text, buckets, self._lock))
+
+    def gauge(self, name, help_text, fn):
+        return self._register(Gauge(self.prefix + name, help_text, fn))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            if isinstance(metric, Gauge):
+                lines.extend(metric.render())
+            else:
+                with self._lock:
+                    lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class SlowRequestLog:
+    """
+    Dumps the full stage breakdown of requests slower than `threshold_ms`, for a
+    `sample_rate` fraction of them, as JSON lines in `log_dir` (or to stdout).
+    """
+    def __init__(self, threshold_ms, sample_rate=1.0, log_dir=None):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.log_dir = log_dir
+        self._lock = threading.Lock()
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+
+    def maybe_dump(self, trace, details):
+        total_ms = trace.total_ms()
+        if not self.threshold_ms or total_ms <= self.threshold_ms or random.random() >= self.sample_rate:
+            return False
+        entry = dict(details, timestamp=time.time(), total_ms=round(total_ms, 2),
+                     stages=trace.as_dict(), timeline=trace.timeline())
+        if not self.log_dir:
+            print(f"Slow request ({entry['total_ms']} ms > {self.threshold_ms} ms): {json.dumps(entry)}")
+            return True
+        path = os.path.join(self.log_dir, f"slow_requests_{os.getpid()}.jsonl")
+        with self._lock, open(path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        return True
@@ -1,12 +1,19 @@
 
 import os
 import sys
+import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as StageTimeout
 import numpy as np
-import cv2
 import json
-import tensorflow as tf
 from models.detection_model import AcneDetector
-from inference.face_detection import FaceDetector
+from inference.face_detection import FaceTracker, load_face_detector
+from inference.backends import load_classifier_backend, load_fallback_classifier, classifier_artifact_path, yolo_weights_path
+from inference.result_cache import ResultCache
+from inference.preprocess import Preprocessor, decode_image
+from inference.profiling import StageTrace
+from inference.metrics import MetricsRegistry, SlowRequestLog, MEGAPIXEL_BUCKETS, BYTES_BUCKETS
 import yaml
 
 # Add project root
@@ -20,73 +27,759 @@ def load_labels(labels_path="config/class_labels.json"):
     with open(labels_path, "r") as f:
         return json.load(f)
 
+class MicroBatcher:
+    """
+    Collects concurrent single-item requests into batches and runs one call of
+    `batch_fn` per batch on a background thread. A batch is flushed once it
+    reaches `max_batch_size` or the oldest request has waited `max_wait_ms`.
+    `batch_fn` takes a list of items and must return a list of results in the same order.
+    """
+    def __init__(self, batch_fn, max_batch_size=8, max_wait_ms=10, name="batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_size_hist = {}
+        self._queue_depth_hist = {}
+        self._num_batches = 0
+        self._num_requests = 0
+        self._total_wait = 0.0
+        self._total_batch_time = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """
+        Queues an item and blocks until its result is ready.
+        """
+        future = Future()
+        depth = self._queue.qsize()
+        with self._lock:
+            bucket = self._depth_bucket(depth)
+            self._queue_depth_hist[bucket] = self._queue_depth_hist.get(bucket, 0) + 1
+        self._queue.put((item, future, time.perf_counter()))
+        return future.result()
+
+    def _depth_bucket(self, depth):
+        # Power-of-two buckets: 0, 1, 2, 4, 8, ...
+        bucket = 0 if depth == 0 else 1
+        while bucket < depth:
+            bucket *= 2
+        return bucket
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        flush_at = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = flush_at - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [entry[0] for entry in batch]
+            start = time.perf_counter()
+            try:
+                results = list(self.batch_fn(items))
+                if len(results) != len(items):
+                    raise RuntimeError(f"{self.name}: batch_fn returned {len(results)} results "
+                                       f"for {len(items)} inputs")
+            except Exception as e:
+                # Every waiter must be released, or its caller blocks forever
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            end = time.perf_counter()
+
+            with self._lock:
+                size = len(batch)
+                self._batch_size_hist[size] = self._batch_size_hist.get(size, 0) + 1
+                self._num_batches += 1
+                self._num_requests += size
+                self._total_wait += sum(start - entry[2] for entry in batch)
+                self._total_batch_time += end - start
+
+    def stats(self):
+        """
+        Returns queue depth and batch-size histograms plus mean wait/batch latency.
+        """
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_depth_histogram": {str(k): v for k, v in sorted(self._queue_depth_hist.items())},
+                "batch_size_histogram": {str(k): v for k, v in sorted(self._batch_size_hist.items())},
+                "batches": self._num_batches,
+                "requests": self._num_requests,
+                "mean_batch_size": round(self._num_requests / self._num_batches, 2) if self._num_batches else 0.0,
+                "mean_wait_ms": round(1000 * self._total_wait / self._num_requests, 2) if self._num_requests else 0.0,
+                "mean_batch_ms": round(1000 * self._total_batch_time / self._num_batches, 2) if self._num_batches else 0.0,
+            }
+
+class StageExecutor:
+    """
+    Runs independent pipeline stages (the classifier and YOLO only share the face crop)
+    concurrently: all but the last stage go to a thread pool, the last runs on the
+    calling thread, and the call returns once every stage has finished. TF and torch
+    release the GIL, so the stages overlap and a request costs roughly the slower model
+    instead of the sum. With `max_workers=0` stages run one after the other.
+    Stages named in `optional` are dropped from the results when they can't finish
+    before the deadline.
+    """
+    def __init__(self, max_workers=4):
+        self._pool = None
+        if max_workers:
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage")
+
+    @property
+    def parallel(self):
+        return self._pool is not None
+
+    def run(self, stages, trace, deadline=None, optional=()):
+        """
+        `stages` maps stage name -> (fn, arg); the last one must not be optional.
+        Returns {stage name: fn(arg)} for the stages that completed, timing each
+        stage into `trace` and the whole group as the "models" stage.
+        """
+        def timed(name, fn, arg):
+            with trace.stage(name):
+                return fn(arg)
+
+        def droppable(name):
+            return name in optional and deadline is not None
+
+        items = list(stages.items())
+        results = {}
+        if not items:
+            return results
+        with trace.stage("models"):
+            if not self._pool or len(items) == 1:
+                # Required stages first, optional ones get whatever is left of the deadline
+                for name, (fn, arg) in sorted(items, key=lambda item: item[0] in optional):
+                    if droppable(name) and deadline.expired():
+                        continue
+                    results[name] = timed(name, fn, arg)
+                return results
+            futures = {name: self._pool.submit(timed, name, fn, arg) for name, (fn, arg) in items[:-1]}
+            name, (fn, arg) = items[-1]
+            results[name] = timed(name, fn, arg)
+            for name, future in futures.items():
+                if droppable(name):
+                    try:
+                        results[name] = future.result(timeout=max(0.0, deadline.remaining_ms()) / 1000)
+                    except StageTimeout:
+                        pass # Still running on the pool, its result is discarded
+                else:
+                    results[name] = future.result()
+        return results
+
+def configure_runtime_threads(serving_config):
+    """
+    Applies per-process thread budgets for TF (classifier) and torch (YOLO).
+    Both runtimes work at the same time when stages run in parallel, so each gets its
+    own budget: intra_op_threads for TF and torch_threads (default: the same) for torch.
+    Must run before TF executes its first op, i.e. before any model is loaded.
+    """
+    import tensorflow as tf
+
+    intra_op = serving_config.get('intra_op_threads', 0)
+    inter_op = serving_config.get('inter_op_threads', 0)
+    try:
+        if intra_op:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        if inter_op:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError as e:
+        # TF runtime already initialized in this process
+        print(f"Warning: could not set TF thread counts: {e}")
+
+    torch_threads = serving_config.get('torch_threads', 0) or intra_op
+    if torch_threads:
+        import torch
+        torch.set_num_threads(torch_threads)
+
 class AcnePipeline:
+    """
+    Models are loaded lazily on first use (importing this module doesn't import
+    TensorFlow, ultralytics or MediaPipe). Call warmup() to load and exercise every
+    model up front, e.g. before reporting readiness.
+    """
     def __init__(self):
         self.config = load_config()
         self.labels = load_labels()
-        
-        # Load Face Detector
-        self.face_detector = FaceDetector()
-        
-        # Load Classifier
-        self.classifier_path = os.path.join(self.config['paths']['models'], 'best_classifier.keras')
-        if os.path.exists(self.classifier_path):
-            self.classifier = tf.keras.models.load_model(self.classifier_path)
-            print("Classifier loaded.")
+
+        self.classifier_path = classifier_artifact_path(self.config)
+        self.yolo_path = yolo_weights_path(self.config) # None: AcneDetector warns and uses yolov8m.pt
+        self.ready = False
+        self.load_times_s = {}
+        self._models = {}
+        self._load_lock = threading.RLock()
+        self._runtime_configured = False
+
+        # One fused preprocessing stage feeds both models (see inference/preprocess.py)
+        preprocess = self.config.get('preprocess', {})
+        self.decode_min_side = preprocess.get('decode_min_side', 0)
+        self.preprocessor = Preprocessor(self.config['data']['image_size'],
+                                         yolo_imgsz=preprocess.get('yolo_imgsz', 640))
+
+        # Micro-batching: concurrent requests share one forward pass per model
+        batching = self.config.get('batching', {})
+        self.classifier_batcher = None
+        self.yolo_batcher = None
+        if batching.get('enabled', False):
+            max_batch_size = batching.get('max_batch_size', 8)
+            max_wait_ms = batching.get('max_wait_ms', 10)
+            if os.path.exists(self.classifier_path):
+                self.classifier_batcher = MicroBatcher(self._classify_batch, max_batch_size,
+                                                       max_wait_ms, name="classifier-batcher")
+            self.yolo_batcher = MicroBatcher(self._detect_spots_batch, max_batch_size,
+                                             max_wait_ms, name="yolo-batcher")
+
+        # Classifier and YOLO run side by side on the shared crop
+        inference = self.config.get('inference', {})
+        stage_workers = 0
+        if inference.get('parallel_stages', True):
+            stage_workers = inference.get('stage_workers', 0) or \
+                self.config.get('serving', {}).get('max_concurrent_requests', 4)
+        self.stage_executor = StageExecutor(stage_workers)
+
+        # Deadline-aware degradation: skip YOLO or use the fallback classifier when
+        # the full pipeline would miss a request's deadline
+        degradation = self.config.get('degradation', {})
+        self.degradation_enabled = degradation.get('enabled', True)
+        self._estimate_smoothing = degradation.get('estimate_smoothing', 0.2)
+        self._stage_estimates_ms = {}
+        self._estimates_lock = threading.Lock() # Updated from concurrent request threads
+
+        # Result cache for repeated submissions of the same image
+        cache_cfg = self.config.get('cache', {})
+        self.result_cache = None
+        if cache_cfg.get('enabled', False):
+            self.result_cache = ResultCache(
+                max_entries=cache_cfg.get('max_entries', 1024),
+                max_memory_mb=cache_cfg.get('max_memory_mb', 64),
+                ttl_seconds=cache_cfg.get('ttl_seconds', 3600),
+                disk_dir=cache_cfg.get('disk_dir'),
+                max_disk_mb=cache_cfg.get('max_disk_mb', 256)
+            )
+        self.model_versions = self._compute_model_versions()
+        self._init_metrics()
+
+    def _compute_model_versions(self):
+        """
+        Identifies the loaded model files (size + mtime), used to key cached results.
+        """
+        def file_version(path):
+            if path and os.path.exists(path):
+                stat = os.stat(path)
+                return f"{os.path.basename(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+            return str(path)
+
+        return {
+            "classifier": file_version(self.classifier_path) if os.path.exists(self.classifier_path) else None,
+            "yolo": file_version(self.yolo_path or 'yolov8m.pt'),
+        }
+
+    def _init_metrics(self):
+        """
+        Hot-path metrics, published by the API on /metrics.
+        """
+        self.metrics = MetricsRegistry()
+        self._stage_latency = self.metrics.histogram(
+            "stage_latency_seconds", "Pipeline stage latency (decode, face_detect, preprocess, classify, detect_spots, models, report).")
+        self._request_latency = self.metrics.histogram(
+            "request_latency_seconds", "End-to-end pipeline latency per call.")
+        self._outcomes = self.metrics.counter(
+            "predictions_total", "Analysed images by outcome (success, no_face, error, cache_hit).")
+        self._errors = self.metrics.counter(
+            "errors_total", "Exceptions raised inside the pipeline, by exception type.")
+        self._image_megapixels = self.metrics.histogram(
+            "image_megapixels", "Decoded image size (after reduced-scale decoding).", MEGAPIXEL_BUCKETS)
+        self._image_bytes = self.metrics.histogram(
+            "image_bytes", "Encoded upload size.", BYTES_BUCKETS)
+        self._degraded = self.metrics.counter(
+            "degraded_stages_total", "Stages skipped or served by the fallback model to meet the deadline.")
+        self.metrics.gauge("model_info", "Loaded model files (name:size:mtime), always 1.",
+                           lambda: {(("model", name), ("version", version)): 1
+                                    for name, version in self.model_versions.items() if version})
+        self.metrics.gauge("result_cache_lookups", "Result cache lookups by result since start.",
+                           lambda: {(("result", k),): v for k, v in self.cache_stats().items()
+                                    if k in ("hits", "disk_hits", "misses")} if self.result_cache else None)
+        self.metrics.gauge("batcher_queue_depth", "Requests waiting in each micro-batcher.",
+                           lambda: {(("model", name),): stats["queue_depth"]
+                                    for name, stats in (self.batching_stats() or {}).items()} or None)
+
+        metrics_cfg = self.config.get('metrics', {})
+        self.slow_requests = SlowRequestLog(
+            threshold_ms=self.config.get('deployment', {}).get('max_inference_time_ms', 0),
+            sample_rate=metrics_cfg.get('slow_trace_sample_rate', 1.0),
+            log_dir=metrics_cfg.get('slow_trace_dir'))
+
+    def _observe(self, trace, entry, outcomes):
+        """
+        Records one call's stage timings and per-image outcomes, and dumps its trace if it was slow.
+        """
+        for stage, ms in list(trace.stages.items()):
+            self._stage_latency.observe(ms / 1000, stage=stage)
+            if entry == "predict_bytes":
+                self._update_estimate(stage, ms)
+        if entry == "predict_bytes" and "models" in trace.stages:
+            # Degraded stages aren't measured; decay their estimates so they get retried
+            # (and re-measured) instead of staying skipped after one slow request
+            for stage in ("classify", "detect_spots"):
+                if stage not in trace.stages:
+                    self._decay_estimate(stage)
+        self._request_latency.observe(trace.total_ms() / 1000, entry=entry)
+        for outcome in outcomes:
+            self._outcomes.inc(outcome=outcome)
+        self.slow_requests.maybe_dump(trace, dict(trace.info, entry=entry, outcomes=outcomes))
+
+    def _update_estimate(self, stage, ms):
+        # Running per-image cost of each stage, used to predict deadline misses
+        a = self._estimate_smoothing
+        with self._estimates_lock:
+            previous = self._stage_estimates_ms.get(stage)
+            self._stage_estimates_ms[stage] = ms if previous is None else (1 - a) * previous + a * ms
+
+    def _decay_estimate(self, stage):
+        with self._estimates_lock:
+            if stage in self._stage_estimates_ms:
+                self._stage_estimates_ms[stage] *= 1 - self._estimate_smoothing
+
+    def _seed_estimates(self, image):
+        """
+        Times one classify and one detect_spots on warm models, so the first deadline
+        decisions don't depend on a cold (loading, tracing) first request.
+        """
+        trace = StageTrace()
+        if self.classifier:
+            with trace.stage("classify"):
+                self._classify(self.preprocessor.classifier_input(image))
+        with trace.stage("detect_spots"):
+            self._detect_spots(self.preprocessor.yolo_input(image))
+        with self._estimates_lock:
+            self._stage_estimates_ms.update(trace.stages)
+
+    def _estimate_ms(self, stage):
+        with self._estimates_lock:
+            return self._stage_estimates_ms.get(stage, 0.0)
+
+    @staticmethod
+    def _outcome(report):
+        if "error" in report:
+            return "error"
+        return "no_face" if report.get("status") == "failed" else "success"
+
+    def _load_once(self, name, loader):
+        if name in self._models:
+            return self._models[name]
+        with self._load_lock:
+            if name not in self._models:
+                if not self._runtime_configured:
+                    # Thread budgets must be applied before the first model touches TF/torch
+                    configure_runtime_threads(self.config.get('serving', {}))
+                    self._runtime_configured = True
+                start = time.perf_counter()
+                self._models[name] = loader()
+                self.load_times_s[name] = round(time.perf_counter() - start, 3)
+        return self._models[name]
+
+    def _load_classifier(self):
+        # Backend selected by inference.backend
+        classifier = load_classifier_backend(self.config)
+        if classifier:
+            print(f"Classifier loaded ({classifier.name} backend).")
         else:
-            print("Warning: Classifier model not found. Run training first.")
-            self.classifier = None
-            
-        # Load YOLO Detector
-        self.yolo = AcneDetector() # Wrapper loads default or trained model
-        
+            print(f"Warning: Classifier model not found at {self.classifier_path}. Run training/export first.")
+        return classifier
+
+    @property
+    def face_detector(self):
+        return self._load_once('face_detector', lambda: load_face_detector(self.config))
+
+    @property
+    def classifier(self):
+        return self._load_once('classifier', self._load_classifier)
+
+    @property
+    def fallback_classifier(self):
+        # Smaller classifier (e.g. the distilled student), None if not configured
+        return self._load_once('fallback_classifier', lambda: load_fallback_classifier(self.config))
+
+    @property
+    def yolo(self):
+        # Wrapper loads default or trained model
+        return self._load_once('yolo', lambda: AcneDetector(self.yolo_path))
+
+    def warmup(self):
+        """
+        Loads every model and runs one dummy inference through each, so the first
+        real request doesn't pay for loading, tracing or lazy initialization.
+        Returns the per-model load/warmup times in seconds.
+        """
+        start = time.perf_counter()
+        img_size = tuple(self.config['data']['image_size'])
+        dummy = np.zeros(img_size + (3,), dtype=np.uint8)
+
+        self.face_detector.detect_and_crop(dummy, bgr=True)
+        if self.classifier:
+            self.classifier.warmup()
+        if self.degradation_enabled and self.fallback_classifier:
+            self.fallback_classifier.warmup()
+        self.yolo.predict_batch(self.preprocessor.yolo_batch([dummy]))
+        if self.degradation_enabled:
+            self._seed_estimates(dummy)
+
+        self.load_times_s['warmup_total'] = round(time.perf_counter() - start, 3)
+        self.ready = True
+        return dict(self.load_times_s)
+
+    def cache_stats(self):
+        """
+        Returns result cache hit/miss counters, or None if caching is disabled.
+        """
+        return self.result_cache.stats() if self.result_cache else None
+
+    def _classify_batch(self, inputs):
+        """
+        Runs the classifier on a list of preprocessed (H, W, 3) images in one forward pass.
+        """
+        preds = self.classifier.predict(np.stack(inputs))
+        if isinstance(preds, dict):
+            # Multi-head model: one {'diagnosis', 'severity'} dict per image
+            return [{name: out[i] for name, out in preds.items()} for i in range(len(inputs))]
+        return list(preds)
+
+    def _detect_spots_batch(self, inputs):
+        """
+        Runs YOLO on a list of letterboxed (3, S, S) face tensors in one call.
+        Returns one result per input.
+        """
+        return list(self.yolo.predict_batch(np.stack(inputs)))
+
+    def _classify(self, input_img):
+        if self.classifier_batcher:
+            return self.classifier_batcher.submit(input_img)
+        return self._classify_batch([input_img])[0]
+
+    def _detect_spots(self, yolo_input):
+        if self.yolo_batcher:
+            return self.yolo_batcher.submit(yolo_input)
+        return self._detect_spots_batch([yolo_input])[0]
+
+    def batching_stats(self):
+        """
+        Returns per-model batching statistics, or None if batching is disabled.
+        """
+        if not self.classifier_batcher and not self.yolo_batcher:
+            return None
+        stats = {}
+        if self.classifier_batcher:
+            stats["classifier"] = self.classifier_batcher.stats()
+        if self.yolo_batcher:
+            stats["yolo"] = self.yolo_batcher.stats()
+        return stats
+
     def predict(self, image_path):
         """
-        Full pipeline:
+        Runs the full pipeline on an image file on disk.
+        """
+        try:
+            data = np.fromfile(image_path, dtype=np.uint8)
+        except OSError:
+            return {"error": "Could not read image"}
+        original_img = decode_image(data, self.decode_min_side)
+        if original_img is None:
+            return {"error": "Could not read image"}
+        return self.predict_array(original_img)
+
+    def predict_bytes(self, image_bytes, trace=None, deadline=None):
+        """
+        Runs the full pipeline on raw encoded image bytes (e.g. an upload stream).
+        The image is decoded in memory with cv2.imdecode, nothing is written to disk.
+        Reports are served from the result cache when the same bytes were seen before.
+        Stage timings are recorded into `trace` (a StageTrace) when given. With a
+        `deadline` (a Deadline), stages are skipped or degraded to meet it.
+        """
+        trace = trace or StageTrace()
+        self._image_bytes.observe(len(image_bytes))
+        try:
+            report, outcome = self._predict_bytes(image_bytes, trace, deadline)
+        except Exception as e:
+            self._errors.inc(type=type(e).__name__)
+            self._observe(trace, "predict_bytes", ["error"])
+            raise
+        self._observe(trace, "predict_bytes", [outcome])
+        return report
+
+    def _predict_bytes(self, image_bytes, trace, deadline):
+        cache_key = None
+        if self.result_cache:
+            cache_key = ResultCache.make_key(image_bytes, self.model_versions)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached, "cache_hit"
+
+        with trace.stage("decode"):
+            original_img = decode_image(image_bytes, self.decode_min_side)
+        if original_img is None:
+            return {"error": "Could not read image"}, "error"
+        self._record_image(original_img, trace)
+        report = self.predict_array(original_img, trace, deadline)
+
+        # Degraded reports are not cached, the same image may get the full analysis next time
+        if cache_key is not None and "error" not in report and "skipped_stages" not in report:
+            self.result_cache.put(cache_key, report)
+        return report, self._outcome(report)
+
+    def _record_image(self, image, trace):
+        h, w = image.shape[:2]
+        self._image_megapixels.observe(h * w / 1e6)
+        trace.annotate(image_shape=[h, w])
+
+    def predict_array(self, original_img, trace=None, deadline=None):
+        """
+        Full pipeline on a decoded BGR image (as returned by cv2.imread/imdecode):
         1. Detect Face -> Crop
-        2. Classify (Box-level or Whole Face)
+        2. Preprocess the crop for both models
         3. Detect Spots (YOLO)
-        4. Generate Report
+        4. Classify (Box-level or Whole Face), alongside step 3
+        5. Generate Report
+        When `deadline` would be missed, step 3 is skipped and step 4 may use the
+        fallback classifier; the report then lists them under "skipped_stages".
         """
+        trace = trace or StageTrace()
+
         # 1. Face Detection
-        original_img = cv2.imread(image_path)
-        if original_img is None:
-            return {"error": "Could not read image"}
-            
-        rgb_img = cv2.cvtColor(original_img, cv2.COLOR_BGR2RGB)
-        cropped_face, bbox = self.face_detector.detect_and_crop(rgb_img)
+        with trace.stage("face_detect"):
+            cropped_face = self._detect_face(original_img)
         
         if cropped_face is None:
-            return {"status": "failed", "message": "No face detected"}
-            
-        # 2. Classification
-        primary_diagnosis = None
-        if self.classifier:
-            # Resize to input shape
-            img_size = tuple(self.config['data']['image_size'])
-            input_img = cv2.resize(cropped_face, img_size)
-            input_img = input_img / 255.0
-            input_img = np.expand_dims(input_img, axis=0)
-            
-            preds = self.classifier.predict(input_img)
-            top_idx = np.argmax(preds[0])
-            confidence = float(preds[0][top_idx])
-            
-            primary_diagnosis = {
-                "acne_type": self.labels[str(top_idx)],
-                "confidence": round(confidence * 100, 2)
-            }
-            
-        # 3. Spot Detection (YOLO)
-        # YOLO expects image path or numpy array. We pass the cropped face.
-        yolo_results = self.yolo.predict(cropped_face)
+            return self._no_face_report()
+
+        return self._analyse_face(cropped_face, trace, deadline)
+
+    def _plan_degradation(self, deadline, parallel):
+        """
+        Decides, from the running stage estimates, what still fits in the deadline.
+        Returns (run_yolo, use_fallback_classifier).
+        """
+        if deadline is None or not self.degradation_enabled:
+            return True, False
+        remaining = deadline.remaining_ms()
+        classify_ms = self._estimate_ms("classify")
+        spots_ms = self._estimate_ms("detect_spots")
+        # Spot counting is the optional part of the report, it goes first
+        run_yolo = remaining > (max(classify_ms, spots_ms) if parallel else classify_ms + spots_ms)
+        use_fallback = remaining <= classify_ms and self.fallback_classifier is not None
+        return run_yolo, use_fallback
+
+    def _analyse_face(self, cropped_face, trace, deadline=None):
+        """
+        Steps 2-5 of predict_array for one BGR face crop.
+        """
+        run_yolo, use_fallback = self._plan_degradation(deadline, self.stage_executor.parallel)
+        classifier = self.fallback_classifier if use_fallback else self.classifier
+
+        # 2. Preprocessing, straight into float32 buffers
+        with trace.stage("preprocess"):
+            classifier_input = self.preprocessor.classifier_input(cropped_face) if classifier else None
+            yolo_input = self.preprocessor.yolo_input(cropped_face) if run_yolo else None
+
+        # 3. Spot Detection (YOLO) and 4. Classification, concurrently
+        stages = {}
+        if run_yolo:
+            self.yolo # Loaded here, not inside the timed stage that feeds the estimates
+            stages["detect_spots"] = (self._detect_spots, yolo_input)
+        if use_fallback:
+            stages["classify_fallback"] = (lambda x: self.fallback_classifier.predict(x[None])[0], classifier_input)
+        elif classifier_input is not None:
+            stages["classify"] = (self._classify, classifier_input)
+        results = self.stage_executor.run(stages, trace, deadline, optional=("detect_spots",))
+
+        primary_diagnosis, severity = None, None
+        preds = results.get("classify_fallback", results.get("classify"))
+        if preds is not None:
+            primary_diagnosis, severity = self._interpret_preds(preds)
         
-        detected_spots = {
-            "total_count": len(yolo_results[0].boxes),
-            "breakdown": {} # Provide class breakdown if YOLO trained on classes
+        # 5. Final Report
+        with trace.stage("report"):
+            report = self._build_report(primary_diagnosis, results.get("detect_spots"), severity)
+            self._mark_degraded(report, skipped_yolo="detect_spots" not in results, used_fallback=use_fallback)
+            return report
+
+    def _mark_degraded(self, report, skipped_yolo, used_fallback):
+        skipped = []
+        if skipped_yolo:
+            skipped.append("detect_spots")
+            self._degraded.inc(stage="detect_spots", action="skipped")
+        if used_fallback:
+            skipped.append("classify")
+            self._degraded.inc(stage="classify", action="fallback")
+            report["fallback_model"] = self.config['degradation']['fallback_model']
+        if skipped:
+            report["skipped_stages"] = skipped
+
+    def predict_many(self, images, deadline=None):
+        """
+        Runs the pipeline on several images of the same patient (e.g. front, left and
+        right profiles). Each item may be encoded bytes, a file path or a decoded BGR array.
+        Face detection runs per image, then the classifier and YOLO each run one batched
+        forward pass over all detected faces, concurrently.
+        With a `deadline`, YOLO is dropped for the whole batch if it can't finish in time.
+        Returns {"reports": [per-image report, ...], "summary": combined summary}.
+        """
+        trace = StageTrace()
+        try:
+            result, cache_hits = self._predict_many(images, trace, deadline)
+        except Exception as e:
+            self._errors.inc(type=type(e).__name__)
+            self._observe(trace, "predict_many", ["error"] * len(images))
+            raise
+        outcomes = ["cache_hit" if i in cache_hits else self._outcome(report)
+                    for i, report in enumerate(result["reports"])]
+        self._observe(trace, "predict_many", outcomes)
+        return result
+
+    def _predict_many(self, images, trace, deadline):
+        reports = [None] * len(images)
+        cache_hits = set()
+        cache_keys = [None] * len(images)
+        crops = []
+        crop_indices = []
+
+        for i, image in enumerate(images):
+            if isinstance(image, (bytes, bytearray)):
+                if self.result_cache:
+                    cache_keys[i] = ResultCache.make_key(image, self.model_versions)
+                    cached = self.result_cache.get(cache_keys[i])
+                    if cached is not None:
+                        reports[i] = cached
+                        cache_hits.add(i)
+                        continue
+                self._image_bytes.observe(len(image))
+                with trace.stage("decode"):
+                    image = decode_image(image, self.decode_min_side)
+            elif isinstance(image, str):
+                with trace.stage("decode"):
+                    image = decode_image(np.fromfile(image, dtype=np.uint8), self.decode_min_side) \
+                        if os.path.isfile(image) else None
+
+            if image is None:
+                reports[i] = {"error": "Could not read image"}
+                continue
+            h, w = image.shape[:2]
+            self._image_megapixels.observe(h * w / 1e6)
+
+            with trace.stage("face_detect"):
+                cropped_face = self._detect_face(image)
+            if cropped_face is None:
+                reports[i] = self._no_face_report()
+                continue
+            crops.append(cropped_face)
+            crop_indices.append(i)
+
+        if crops:
+            run_yolo = deadline is None or not self.degradation_enabled or not deadline.expired()
+            with trace.stage("preprocess"):
+                stages = {}
+                if run_yolo:
+                    stages["detect_spots"] = (self._detect_spots_batch, self.preprocessor.yolo_batch(crops))
+                if self.classifier:
+                    stages["classify"] = (self._classify_batch, self.preprocessor.classifier_batch(crops))
+            results = self.stage_executor.run(stages, trace, deadline if self.degradation_enabled else None,
+                                              optional=("detect_spots",))
+
+            interpreted = [(None, None)] * len(crops)
+            if "classify" in results:
+                interpreted = [self._interpret_preds(p) for p in results["classify"]]
+            yolo_results = results.get("detect_spots", [None] * len(crops))
+
+            with trace.stage("report"):
+                for i, (diagnosis, severity), yolo_result in zip(crop_indices, interpreted, yolo_results):
+                    reports[i] = self._build_report(diagnosis, yolo_result, severity)
+                    self._mark_degraded(reports[i], skipped_yolo="detect_spots" not in results, used_fallback=False)
+
+        for key, report in zip(cache_keys, reports):
+            if key is not None and "error" not in report and "skipped_stages" not in report:
+                self.result_cache.put(key, report)
+
+        return {"reports": reports, "summary": self._summarize(reports)}, cache_hits
+
+    def face_tracker(self):
+        """
+        Returns a new FaceTracker for one frame stream, configured from face_tracking.
+        """
+        tracking = self.config.get('face_tracking', {})
+        return FaceTracker(self.face_detector,
+                           detect_every=tracking.get('detect_every', 5),
+                           smoothing=tracking.get('smoothing', 0.5),
+                           strategy=tracking.get('select', 'largest'),
+                           padding=tracking.get('padding', 0.2),
+                           max_misses=tracking.get('max_misses', 2))
+
+    def predict_frames(self, frames, tracker=None):
+        """
+        Runs the pipeline on a stream of decoded BGR frames from one camera (live view
+        or burst capture), yielding one report per frame. Face detection only runs every
+        face_tracking.detect_every frames, the frames in between reuse the tracked box.
+        Pass a `tracker` from face_tracker() to keep tracking state across calls.
+        """
+        tracker = tracker or self.face_tracker()
+        for frame in frames:
+            cropped_face, bbox = tracker.update(frame)
+            if cropped_face is None:
+                yield self._no_face_report()
+                continue
+            report = self._analyse_face(cropped_face, StageTrace())
+            report["face_box"] = list(bbox)
+            yield report
+
+    def _detect_face(self, original_img):
+        # The detector converts its downscaled copy to RGB, the crop stays a BGR view
+        cropped_face, bbox = self.face_detector.detect_and_crop(original_img, bgr=True)
+        return cropped_face
+
+    def _interpret_preds(self, preds):
+        """
+        Returns (primary_diagnosis, severity) from one image's classifier output.
+        Severity is only available from the multi-head model.
+        """
+        if isinstance(preds, dict):
+            severity = {"score": round(float(np.squeeze(preds["severity"])), 1)}
+            return self._diagnosis_from_preds(preds["diagnosis"]), severity
+        return self._diagnosis_from_preds(preds), None
+
+    def _diagnosis_from_preds(self, preds):
+        top_idx = np.argmax(preds)
+        confidence = float(preds[top_idx])
+        return {
+            "acne_type": self.labels[str(top_idx)],
+            "confidence": round(confidence * 100, 2)
         }
+
+    def _no_face_report(self):
+        return {"status": "failed", "message": "No face detected"}
+
+    def _build_report(self, primary_diagnosis, yolo_result, severity=None):
+        detected_spots = None # YOLO skipped to meet the deadline
+        if yolo_result is not None:
+            detected_spots = {
+                "total_count": len(yolo_result.boxes),
+                "breakdown": {} # Provide class breakdown if YOLO trained on classes
+            }
         
-        # 4. Final Report
         report = {
             "status": "success",
             "face_detected": True,
@@ -94,10 +787,48 @@ class AcnePipeline:
             "detected_spots": detected_spots,
             "recommendations": [] # Fetch from recommendations.json
         }
+        if severity is not None:
+            report["severity"] = severity # 0-100, from the multi-head model
         
         return report
 
+    def _summarize(self, reports):
+        """
+        Combines per-image reports into a per-patient summary. The combined diagnosis is
+        the acne type predicted for most images (ties broken by mean confidence).
+        """
+        analysed = [r for r in reports if r.get("status") == "success"]
+        votes = {}
+        for report in analysed:
+            diagnosis = report.get("primary_diagnosis")
+            if diagnosis:
+                votes.setdefault(diagnosis["acne_type"], []).append(diagnosis["confidence"])
+
+        primary_diagnosis = None
+        if votes:
+            acne_type, confidences = max(votes.items(), key=lambda kv: (len(kv[1]), np.mean(kv[1])))
+            primary_diagnosis = {
+                "acne_type": acne_type,
+                "confidence": round(float(np.mean(confidences)), 2),
+                "images_agreeing": len(confidences)
+            }
+
+        spot_counts = [r["detected_spots"]["total_count"] for r in analysed if r.get("detected_spots")]
+        summary = {
+            "num_images": len(reports),
+            "num_analysed": len(analysed),
+            "primary_diagnosis": primary_diagnosis,
+            "total_spots": int(sum(spot_counts)),
+            "max_spots_per_image": int(max(spot_counts)) if spot_counts else 0
+        }
+        severities = [r["severity"]["score"] for r in analysed if "severity" in r]
+        if severities:
+            summary["severity"] = {"mean_score": round(float(np.mean(severities)), 1),
+                                   "max_score": round(float(np.max(severities)), 1)}
+        return summary
+
 if __name__ == "__main__":
     # Test run
     pipeline = AcnePipeline()
+    print(f"Warmup times (s): {pipeline.warmup()}")
     print("Pipeline ready.")
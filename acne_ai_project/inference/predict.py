@@ -1,13 +1,59 @@
-
+import os
+import sys
 import argparse
-from pipeline import AcnePipeline
+import cv2
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference.pipeline import AcnePipeline
+from inference.bulk_predict import bulk_predict
+
+def iter_video_frames(source):
+    """
+    Yields BGR frames from a video file or a camera index (e.g. "0").
+    """
+    capture = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield frame
+    finally:
+        capture.release()
+
+def predict_video(pipeline, source):
+    tracker = pipeline.face_tracker()
+    for i, report in enumerate(pipeline.predict_frames(iter_video_frames(source), tracker)):
+        diagnosis = report.get("primary_diagnosis") or {}
+        spots = (report.get("detected_spots") or {}).get("total_count", 0)
+        print(f"frame {i}: {report['status']} {diagnosis.get('acne_type', '-')} spots={spots}")
+    print(f"Face tracking: {tracker.stats()}")
 
 def main():
     parser = argparse.ArgumentParser(description="Acne AI Prediction CLI")
-    parser.add_argument("--image", required=True, help="Path to input image")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--image", help="Path to input image")
+    source.add_argument("--input", help="Bulk mode: directory, glob pattern or CSV manifest of images")
+    source.add_argument("--video", help="Video file or camera index to analyse frame by frame")
+    parser.add_argument("--output", default="results.jsonl",
+                        help="Bulk mode output: .jsonl file, or directory for Parquet parts")
+    parser.add_argument("--batch-size", type=int, default=16, help="Bulk mode batch size")
+    parser.add_argument("--workers", type=int, default=4, help="Bulk mode decode threads")
+    parser.add_argument("--no-resume", action="store_true", help="Bulk mode: ignore existing results")
     args = parser.parse_args()
     
     pipeline = AcnePipeline()
+
+    if args.input:
+        bulk_predict(args.input, args.output, pipeline=pipeline, batch_size=args.batch_size,
+                     num_workers=args.workers, resume=not args.no_resume)
+        return
+
+    if args.video:
+        predict_video(pipeline, args.video)
+        return
+
     result = pipeline.predict(args.image)
     
     print("\n[Analysis Report]")
@@ -0,0 +1,118 @@
+import struct
+import threading
+import numpy as np
+import cv2
+
+# JPEG decoders can scale by 1/2, 1/4 or 1/8 inside the IDCT, far cheaper than
+# decoding at full resolution and resizing afterwards
+REDUCED_DECODE_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8),
+                        (4, cv2.IMREAD_REDUCED_COLOR_4),
+                        (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+def jpeg_dimensions(data):
+    """
+    Reads (width, height) from a JPEG header without decoding it.
+    Returns None for anything that isn't a readable JPEG.
+    """
+    data = memoryview(data)
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        # SOF0..SOF15, excluding DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+def decode_image(data, min_side=0):
+    """
+    Decodes encoded image bytes (or a uint8 buffer) to a BGR array. JPEGs are decoded at
+    the largest 1/2, 1/4 or 1/8 reduction that keeps the shorter side >= `min_side`;
+    other formats, or min_side=0, decode at full resolution.
+    Returns None if the data can't be decoded.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if not buffer.size:
+        return None
+    flag = cv2.IMREAD_COLOR
+    if min_side:
+        dims = jpeg_dimensions(buffer)
+        if dims:
+            for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+                if min(dims) // factor >= min_side:
+                    flag = reduced_flag
+                    break
+    return cv2.imdecode(buffer, flag)
+
+class Preprocessor:
+    """
+    Builds both model inputs from one BGR face crop in a single pass each, writing
+    float32 straight into reusable per-thread buffers instead of going through
+    a full-image RGB copy and a float64 `/ 255.0` temporary:
+    - classifier_input: (H, W, 3) RGB in [0, 1] at the classifier's image size
+    - yolo_input: (3, S, S) RGB in [0, 1], letterboxed to S = yolo_imgsz with grey
+      padding, the layout ultralytics takes as a pre-processed tensor
+    The single-item methods return the calling thread's buffer, valid until that
+    thread's next call; the *_batch methods return fresh arrays.
+    """
+    def __init__(self, image_size=(224, 224), yolo_imgsz=640, pad_value=114):
+        self.image_size = tuple(image_size)
+        self.yolo_imgsz = int(yolo_imgsz)
+        self.pad_value = np.float32(pad_value / 255.0)
+        self._local = threading.local()
+
+    def _buffer(self, name, shape, dtype):
+        buffer = getattr(self._local, name, None)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=dtype)
+            setattr(self._local, name, buffer)
+        return buffer
+
+    def classifier_input(self, crop, out=None):
+        w, h = self.image_size
+        if out is None:
+            out = self._buffer('classifier', (h, w, 3), np.float32)
+        resized = cv2.resize(crop, (w, h), dst=self._buffer('resized', (h, w, 3), np.uint8))
+        rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=self._buffer('rgb', (h, w, 3), np.uint8))
+        np.multiply(rgb, np.float32(1 / 255.0), out=out, casting='unsafe')
+        return out
+
+    def yolo_input(self, crop, out=None):
+        size = self.yolo_imgsz
+        if out is None:
+            out = self._buffer('yolo', (3, size, size), np.float32)
+        h, w = crop.shape[:2]
+        scale = size / max(h, w)
+        new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+        resized = cv2.resize(crop, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        top, left = (size - new_h) // 2, (size - new_w) // 2
+
+        out.fill(self.pad_value)
+        for channel in range(3):
+            # BGR -> RGB by reading the channels in reverse
+            np.multiply(resized[..., 2 - channel], np.float32(1 / 255.0),
+                        out=out[channel, top:top + new_h, left:left + new_w], casting='unsafe')
+        return out
+
+    def classifier_batch(self, crops):
+        w, h = self.image_size
+        batch = np.empty((len(crops), h, w, 3), dtype=np.float32)
+        for i, crop in enumerate(crops):
+            self.classifier_input(crop, out=batch[i])
+        return batch
+
+    def yolo_batch(self, crops):
+        batch = np.empty((len(crops), 3, self.yolo_imgsz, self.yolo_imgsz), dtype=np.float32)
+        for i, crop in enumerate(crops):
+            self.yolo_input(crop, out=batch[i])
+        return batch
@@ -0,0 +1,96 @@
+import time
+import threading
+from contextlib import contextmanager
+
+def rss_mb(field="VmRSS"):
+    """
+    Current (VmRSS) or peak (VmHWM) resident memory of this process, in MB.
+    Falls back to the peak from getrusage where /proc isn't available.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+def reset_peak_rss():
+    # Linux only: makes VmHWM restart from the current RSS
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+class Deadline:
+    """
+    Latency budget of one request, counted from `start` (time.perf_counter(),
+    default: now) so time spent queueing before the pipeline counts against it.
+    """
+    def __init__(self, budget_ms, start=None):
+        self.budget_ms = budget_ms
+        self.start = time.perf_counter() if start is None else start
+
+    def remaining_ms(self):
+        return self.budget_ms - (time.perf_counter() - self.start) * 1000
+
+    def expired(self):
+        return self.remaining_ms() <= 0
+
+class StageTrace:
+    """
+    Wall-clock timings of the pipeline stages for one request, in milliseconds.
+    A stage entered several times (e.g. once per image) accumulates. Stages may be
+    timed from several threads; `spans` keeps each one's start/end offsets so
+    stages that ran concurrently show up as overlapping intervals.
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.spans = []
+        self.info = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.add(name, (end - start) * 1000,
+                     span=((start - self.start) * 1000, (end - self.start) * 1000))
+
+    def add(self, name, elapsed_ms, span=None):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed_ms
+            if span:
+                self.spans.append((name, span[0], span[1]))
+
+    def annotate(self, **info):
+        """
+        Attaches request details (image size, cache hit, ...) reported alongside the timings.
+        """
+        self.info.update(info)
+
+    def total_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def timeline(self):
+        """
+        [{"stage", "start_ms", "end_ms"}, ...] relative to the start of the trace, by start time.
+        """
+        return [{"stage": name, "start_ms": round(start, 2), "end_ms": round(end, 2)}
+                for name, start, end in sorted(self.spans, key=lambda span: span[1])]
+
+    def as_dict(self):
+        with self._lock:
+            timings = {name: round(ms, 2) for name, ms in self.stages.items()}
+        timings["total"] = round(self.total_ms(), 2)
+        return timings
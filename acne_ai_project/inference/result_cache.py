@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+class ResultCache:
+    """
+    LRU + TTL cache for pipeline reports, keyed by a hash of the image bytes and
+    the versions of the models that produced the report.
+
+    The in-memory tier is bounded both by entry count and by an approximate byte
+    budget (size of the JSON-encoded report). If `disk_dir` is set, every report
+    is also written there as JSON, and memory misses fall back to disk before
+    the pipeline runs again. The disk tier has its own byte budget: once it is
+    exceeded, expired files are deleted and then the least recently written ones
+    until it is back under 90% of `max_disk_mb`.
+    """
+    def __init__(self, max_entries=1024, max_memory_mb=64, ttl_seconds=3600, disk_dir=None, max_disk_mb=256):
+        self.max_entries = max_entries
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+
+        self._entries = OrderedDict() # key -> (expires_at, size, report)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0,
+                          "disk_evictions": 0}
+        self._disk_bytes = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._sweep_disk()
+
+    @staticmethod
+    def make_key(image_bytes, model_versions):
+        h = hashlib.sha256(image_bytes)
+        h.update(json.dumps(model_versions, sort_keys=True).encode("utf-8"))
+        return h.hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def get(self, key):
+        """
+        Returns the cached report for `key`, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, encoded = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return json.loads(encoded)
+                self._remove(key)
+                self._counters["expired"] += 1
+
+        report, expires_at = self._get_from_disk(key, now)
+        with self._lock:
+            if report is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+        # Promoted with the disk entry's remaining lifetime, not a fresh TTL
+        self._put_memory(key, json.dumps(report), expires_at)
+        return report
+
+    def put(self, key, report):
+        now = time.time()
+        encoded = json.dumps(report)
+        self._put_memory(key, encoded, now + self.ttl_seconds)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(encoded)
+            os.replace(tmp_path, path)
+            with self._disk_lock:
+                # Approximate (overwrites count twice), corrected by the next sweep
+                self._disk_bytes += len(encoded)
+                over_budget = self._disk_bytes > self.max_disk_bytes
+            if over_budget:
+                self._sweep_disk()
+
+    def _sweep_disk(self):
+        """
+        Deletes expired disk entries, then the oldest ones until the tier is under
+        90% of its budget. Other processes may share `disk_dir`, so it rescans the directory.
+        """
+        with self._disk_lock:
+            now = time.time()
+            files = []
+            for root, _, names in os.walk(self.disk_dir):
+                for name in names:
+                    if not name.endswith(".json"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in files)
+            target = int(self.max_disk_bytes * 0.9)
+            for mtime, size, path in sorted(files):
+                expired = mtime + self.ttl_seconds <= now
+                if not expired and total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                with self._lock:
+                    self._counters["expired" if expired else "disk_evictions"] += 1
+            self._disk_bytes = total
+
+    def _get_from_disk(self, key, now):
+        """
+        Returns (report, expiry time) of a disk entry, or (None, None).
+        """
+        if not self.disk_dir:
+            return None, None
+        path = self._disk_path(key)
+        try:
+            expires_at = os.path.getmtime(path) + self.ttl_seconds
+            if expires_at <= now:
+                os.remove(path)
+                return None, None
+            with open(path, "r") as f:
+                return json.load(f), expires_at
+        except (OSError, ValueError):
+            return None, None
+
+    def _put_memory(self, key, encoded, expires_at):
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, size, encoded)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._counters["evictions"] += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = self._counters["hits"] + self._counters["disk_hits"]
+            return dict(self._counters,
+                        entries=len(self._entries),
+                        memory_bytes=self._bytes,
+                        disk_bytes=self._disk_bytes if self.disk_dir else 0,
+                        hit_rate=round(hits / lookups, 4) if lookups else 0.0)
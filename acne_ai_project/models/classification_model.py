@@ -1,14 +1,34 @@
-
 import tensorflow as tf
 from tensorflow.keras.applications import EfficientNetB3
 from tensorflow.keras.models import Model
-from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout, BatchNormalization
+from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout, BatchNormalization, Input
 import yaml
 
 def load_config(config_path="config/config.yaml"):
     with open(config_path, "r") as f:
         return yaml.safe_load(f)
 
+def classification_head(x, num_classes=7, output_name='predictions'):
+    """
+    Custom top layers applied to pooled backbone features. Layers are named so the
+    head can be trained standalone on cached features and copied into the full model.
+    """
+    x = BatchNormalization(name='head_bn_1')(x)
+    
+    x = Dense(512, activation='relu', name='head_dense_1')(x)
+    x = Dropout(0.5, name='head_dropout_1')(x)
+    x = BatchNormalization(name='head_bn_2')(x)
+    
+    x = Dense(256, activation='relu', name='head_dense_2')(x)
+    x = Dropout(0.3, name='head_dropout_2')(x)
+    x = BatchNormalization(name='head_bn_3')(x)
+    
+    x = Dense(128, activation='relu', name='head_dense_3')(x)
+    x = Dropout(0.2, name='head_dropout_3')(x)
+    
+    # Softmax kept in float32 so mixed-precision training stays numerically stable
+    return Dense(num_classes, activation='softmax', dtype='float32', name=output_name)(x)
+
 def build_classification_model(input_shape=(224, 224, 3), num_classes=7):
     """
     Builds the EfficientNetB3 model with custom top layers.
@@ -19,25 +39,19 @@ def build_classification_model(input_shape=(224, 224, 3), num_classes=7):
     base_model.trainable = False
 
     x = base_model.output
-    x = GlobalAveragePooling2D()(x)
-    x = BatchNormalization()(x)
-    
-    x = Dense(512, activation='relu')(x)
-    x = Dropout(0.5)(x)
-    x = BatchNormalization()(x)
-    
-    x = Dense(256, activation='relu')(x)
-    x = Dropout(0.3)(x)
-    x = BatchNormalization()(x)
-    
-    x = Dense(128, activation='relu')(x)
-    x = Dropout(0.2)(x)
-    
-    predictions = Dense(num_classes, activation='softmax')(x)
+    x = GlobalAveragePooling2D(name='head_pool')(x)
+    predictions = classification_head(x, num_classes)
 
     model = Model(inputs=base_model.input, outputs=predictions)
     return model
 
+def build_classification_head(feature_dim=1536, num_classes=7):
+    """
+    The classifier's top layers alone, taking pooled EfficientNetB3 features (1536-d).
+    """
+    inputs = Input(shape=(feature_dim,), name='features')
+    return Model(inputs=inputs, outputs=classification_head(inputs, num_classes))
+
 if __name__ == "__main__":
     model = build_classification_model()
     model.summary()
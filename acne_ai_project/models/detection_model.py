@@ -1,5 +1,5 @@
 
-from ultralytics import YOLO
+import numpy as np
 import yaml
 
 def load_config(config_path="config/config.yaml"):
@@ -12,10 +12,12 @@ class AcneDetector:
         Wrapper for YOLOv8 model.
         If model_path is None, loads a pre-trained 'yolov8m.pt' (medium) model.
         """
-        if model_path:
-            self.model = YOLO(model_path)
-        else:
-            self.model = YOLO('yolov8m.pt') # Start with base model for transfer learning
+        from ultralytics import YOLO # Imported lazily, it pulls in torch
+
+        self.model_path = model_path or 'yolov8m.pt' # Start with base model for transfer learning
+        if not model_path:
+            print("Warning: no YOLO weights configured, using 'yolov8m.pt' (downloaded if not cached).")
+        self.model = YOLO(self.model_path)
 
     def train(self, data_yaml_path, epochs=50):
         """
@@ -32,6 +34,14 @@ class AcneDetector:
         results = self.model.predict(image_path, conf=conf_threshold)
         return results
 
+    def predict_batch(self, batch, conf_threshold=0.25):
+        """
+        Run inference on an already pre-processed float32 (N, 3, S, S) RGB batch in [0, 1]
+        (see inference/preprocess.py). Ultralytics skips its own letterboxing for tensors.
+        """
+        import torch
+        return self.model.predict(torch.from_numpy(np.ascontiguousarray(batch)), conf=conf_threshold)
+
 if __name__ == "__main__":
     detector = AcneDetector()
     print("YOLOv8 Wrapper Initialized.")
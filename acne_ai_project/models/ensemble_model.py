@@ -1,9 +1,22 @@
-
 import tensorflow as tf
 from tensorflow.keras.applications import EfficientNetB3, ResNet50
 from tensorflow.keras.models import Model
 from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout, BatchNormalization, Average, Input
 
+def ensemble_heads(x1, x2, num_classes=7):
+    """
+    Per-backbone heads on pooled features, averaged. Layers are named so the heads can
+    be trained standalone on cached features and copied into the full ensemble.
+    """
+    x1 = Dense(256, activation='relu', name='eff_dense')(x1)
+    out1 = Dense(num_classes, activation='softmax', name='eff_output')(x1)
+    
+    x2 = Dense(256, activation='relu', name='res_dense')(x2)
+    out2 = Dense(num_classes, activation='softmax', name='res_output')(x2)
+    
+    # Average Predictions
+    return Average(name='ensemble_average')([out1, out2])
+
 def build_ensemble_model(input_shape=(224, 224, 3), num_classes=7):
     """
     Builds an ensemble model averaging predictions from EfficientNetB3 and ResNet50.
@@ -13,25 +26,27 @@ def build_ensemble_model(input_shape=(224, 224, 3), num_classes=7):
     # Model 1: EfficientNetB3
     eff_base = EfficientNetB3(weights='imagenet', include_top=False, input_tensor=input_tensor)
     eff_base.trainable = False
-    x1 = eff_base.output
-    x1 = GlobalAveragePooling2D()(x1)
-    x1 = Dense(256, activation='relu')(x1)
-    out1 = Dense(num_classes, activation='softmax', name='eff_output')(x1)
+    x1 = GlobalAveragePooling2D()(eff_base.output)
     
     # Model 2: ResNet50
     res_base = ResNet50(weights='imagenet', include_top=False, input_tensor=input_tensor)
     res_base.trainable = False
-    x2 = res_base.output
-    x2 = GlobalAveragePooling2D()(x2)
-    x2 = Dense(256, activation='relu')(x2)
-    out2 = Dense(num_classes, activation='softmax', name='res_output')(x2)
+    x2 = GlobalAveragePooling2D()(res_base.output)
     
-    # Average Predictions
-    outputs = Average()([out1, out2])
+    outputs = ensemble_heads(x1, x2, num_classes)
     
     model = Model(inputs=input_tensor, outputs=outputs)
     return model
 
+def build_ensemble_heads(eff_dim=1536, res_dim=2048, num_classes=7):
+    """
+    The ensemble's heads alone, taking pooled EfficientNetB3 and ResNet50 features.
+    """
+    eff_features = Input(shape=(eff_dim,), name='eff_features')
+    res_features = Input(shape=(res_dim,), name='res_features')
+    outputs = ensemble_heads(eff_features, res_features, num_classes)
+    return Model(inputs=[eff_features, res_features], outputs=outputs)
+
 if __name__ == "__main__":
     model = build_ensemble_model()
     model.summary()
@@ -0,0 +1,27 @@
+import tensorflow as tf
+from tensorflow.keras.applications import EfficientNetB3
+from tensorflow.keras.models import Model
+from tensorflow.keras.layers import GlobalAveragePooling2D
+from models.classification_model import classification_head
+from models.severity_model import severity_head
+
+def build_multitask_model(input_shape=(224, 224, 3), num_classes=7):
+    """
+    One EfficientNetB3 backbone shared by two heads, so a single forward pass returns
+    both the acne-type probabilities ('diagnosis') and a 0-100 severity score ('severity').
+    """
+    base_model = EfficientNetB3(weights='imagenet', include_top=False, input_shape=input_shape)
+
+    # Freeze base model by default
+    base_model.trainable = False
+
+    features = GlobalAveragePooling2D(name='head_pool')(base_model.output)
+    diagnosis = classification_head(features, num_classes, output_name='diagnosis')
+    severity = severity_head(features, name='severity')
+
+    model = Model(inputs=base_model.input, outputs=[diagnosis, severity])
+    return model
+
+if __name__ == "__main__":
+    model = build_multitask_model()
+    model.summary()
@@ -1,8 +1,20 @@
-
 import tensorflow as tf
 from tensorflow.keras.applications import EfficientNetB0
 from tensorflow.keras.models import Model
-from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout, BatchNormalization
+from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout, BatchNormalization, Rescaling
+
+def severity_head(x, name='severity'):
+    """
+    Regression head on pooled backbone features, producing a 0-100 severity score.
+    """
+    x = BatchNormalization(name=f'{name}_bn')(x)
+    x = Dense(256, activation='relu', name=f'{name}_dense')(x)
+    x = Dropout(0.4, name=f'{name}_dropout')(x)
+    
+    # Regression Output: Single unit, linear activation (or sigmoid * 100)
+    # Using sigmoid * 100 ensures output is strictly 0-100
+    x = Dense(1, activation='sigmoid', dtype='float32', name=f'{name}_sigmoid')(x)
+    return Rescaling(100.0, dtype='float32', name=name)(x)
 
 def build_severity_model(input_shape=(224, 224, 3)):
     """
@@ -15,14 +27,7 @@ def build_severity_model(input_shape=(224, 224, 3)):
     
     x = base_model.output
     x = GlobalAveragePooling2D()(x)
-    x = BatchNormalization()(x)
-    x = Dense(256, activation='relu')(x)
-    x = Dropout(0.4)(x)
-    
-    # Regression Output: Single unit, linear activation (or sigmoid * 100)
-    # Using sigmoid * 100 ensures output is strictly 0-100
-    x = Dense(1, activation='sigmoid')(x)
-    outputs = tf.keras.layers.Lambda(lambda x: x * 100)(x)
+    outputs = severity_head(x)
     
     model = Model(inputs=base_model.input, outputs=outputs)
     return model
@@ -0,0 +1,31 @@
+import tensorflow as tf
+from tensorflow.keras.applications import MobileNetV3Small, MobileNetV3Large, EfficientNetB0
+from tensorflow.keras.models import Model
+from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout
+
+STUDENT_BACKBONES = {
+    'MobileNetV3Small': MobileNetV3Small,
+    'MobileNetV3Large': MobileNetV3Large,
+    'EfficientNetB0': EfficientNetB0
+}
+
+def build_student_model(input_shape=(224, 224, 3), num_classes=7, backbone='MobileNetV3Small', weights='imagenet'):
+    """
+    Builds a lightweight classifier for CPU serving, trained by distillation from the
+    EfficientNetB3 classifier or the ensemble (see training/distill.py).
+    The whole network is trainable: the student learns from soft targets end to end.
+    weights=None gives a randomly initialized network (used by the offline benchmark).
+    """
+    base_model = STUDENT_BACKBONES[backbone](weights=weights, include_top=False, input_shape=input_shape)
+    base_model.trainable = True
+
+    x = GlobalAveragePooling2D()(base_model.output)
+    x = Dropout(0.2)(x)
+    predictions = Dense(num_classes, activation='softmax', dtype='float32', name='predictions')(x)
+
+    model = Model(inputs=base_model.input, outputs=predictions)
+    return model
+
+if __name__ == "__main__":
+    model = build_student_model()
+    model.summary()
@@ -1,38 +1,54 @@
 
 import os
 import argparse
-from training.train_classifier import train_classifier
-from training.train_detector import train_detector
-from evaluation.evaluate_model import evaluate
-from export.export_tfjs import export_to_tfjs
-from data.prepare_dataset import prepare_dataset
+
+# Step modules are imported inside each step so e.g. 'prepare_data' doesn't import TensorFlow
 
 def main():
     parser = argparse.ArgumentParser(description="Acne AI Pipeline Orchestrator")
-    parser.add_argument('action', choices=['prepare_data', 'train_classifier', 'train_yolo', 'evaluate', 'export', 'all'], 
+    parser.add_argument('action', choices=['prepare_data', 'train_classifier', 'train_multitask', 'distill', 'train_yolo', 'evaluate', 'export', 'all'], 
                         help="Action to perform")
     
     args = parser.parse_args()
     
     if args.action == 'prepare_data' or args.action == 'all':
         print("\n=== STEP 1: PREPARE DATA ===")
+        from data.prepare_dataset import prepare_dataset
         prepare_dataset()
         
     if args.action == 'train_classifier' or args.action == 'all':
         print("\n=== STEP 2: TRAIN CLASSIFIER ===")
+        from training.train_classifier import train_classifier
         train_classifier()
         
+    if args.action == 'train_multitask':
+        print("\n=== TRAIN MULTI-HEAD MODEL (diagnosis + severity) ===")
+        from training.train_multitask import train_multitask
+        train_multitask()
+        
+    if args.action == 'distill':
+        print("\n=== DISTILL STUDENT CLASSIFIER ===")
+        from training.distill import distill_student
+        from evaluation.evaluate_model import compare_student_teacher
+        if distill_student():
+            compare_student_teacher()
+        
     if args.action == 'train_yolo' or args.action == 'all':
         print("\n=== STEP 3: TRAIN DETECTOR ===")
+        from training.train_detector import train_detector
         train_detector()
         
     if args.action == 'evaluate' or args.action == 'all':
         print("\n=== STEP 4: EVALUATE MODEL ===")
+        from evaluation.evaluate_model import evaluate
         evaluate()
         
     if args.action == 'export' or args.action == 'all':
         print("\n=== STEP 5: EXPORT MODEL ===")
+        from export.export_tfjs import export_to_tfjs
+        from export.export_onnx import export_to_onnx
         export_to_tfjs()
+        export_to_onnx()
         
     print("\nPipeline execution complete.")
 
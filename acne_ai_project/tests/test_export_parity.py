@@ -0,0 +1,77 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+tf = pytest.importorskip("tensorflow")
+INPUT_SHAPE = (32, 32, 3)
+
+def small_classifier(num_classes=7):
+    inputs = tf.keras.Input(INPUT_SHAPE)
+    x = tf.keras.layers.Conv2D(8, 3, activation='relu')(inputs)
+    x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    outputs = tf.keras.layers.Dense(num_classes, activation='softmax')(x)
+    return tf.keras.Model(inputs, outputs)
+
+def small_multitask(num_classes=7):
+    inputs = tf.keras.Input(INPUT_SHAPE)
+    x = tf.keras.layers.GlobalAveragePooling2D()(tf.keras.layers.Conv2D(8, 3, activation='relu')(inputs))
+    diagnosis = tf.keras.layers.Dense(num_classes, activation='softmax', name='diagnosis')(x)
+    severity = tf.keras.layers.Rescaling(100.0, name='severity')(tf.keras.layers.Dense(1, activation='sigmoid')(x))
+    return tf.keras.Model(inputs, [diagnosis, severity])
+
+@pytest.fixture
+def samples():
+    return np.random.default_rng(0).random((5,) + INPUT_SHAPE, dtype=np.float32)
+
+@pytest.mark.parametrize("build", [small_classifier, small_multitask])
+def test_onnx_export_matches_keras(tmp_path, samples, build):
+    pytest.importorskip("tf2onnx")
+    pytest.importorskip("onnxruntime")
+    from export.export_onnx import export_classifier_onnx, verify_parity
+    from inference.backends import OnnxRuntimeBackend
+
+    model = build()
+    onnx_path = str(tmp_path / "classifier.onnx")
+    export_classifier_onnx(model, onnx_path, INPUT_SHAPE)
+    assert verify_parity(model, OnnxRuntimeBackend(onnx_path, INPUT_SHAPE), samples, atol=1e-4)
+
+def test_tflite_export_matches_keras(tmp_path, samples):
+    from export.export_onnx import export_classifier_tflite, verify_parity
+    from inference.backends import TFLiteBackend
+
+    model = small_classifier()
+    tflite_path = str(tmp_path / "classifier.tflite")
+    export_classifier_tflite(model, tflite_path)
+    assert verify_parity(model, TFLiteBackend(tflite_path, INPUT_SHAPE), samples, atol=1e-4)
+
+def test_tflite_pads_batches_to_buckets(tmp_path, samples):
+    from export.export_onnx import export_classifier_tflite
+    from inference.backends import TFLiteBackend
+
+    model = small_classifier()
+    tflite_path = str(tmp_path / "classifier.tflite")
+    export_classifier_tflite(model, tflite_path)
+    backend = TFLiteBackend(tflite_path, INPUT_SHAPE, batch_buckets=[1, 4])
+    expected = model.predict(samples, verbose=0)
+    for n in [3, 1, 4, 2, len(samples)]:
+        np.testing.assert_allclose(backend.predict(samples[:n]), expected[:n], atol=1e-4)
+    assert sorted(backend._interpreters) == [1, 4]
+
+def test_yolo_onnx_export_accepts_batches(tmp_path, monkeypatch):
+    pytest.importorskip("ultralytics")
+    ort = pytest.importorskip("onnxruntime")
+    from export.export_onnx import export_yolo_onnx
+
+    monkeypatch.chdir(tmp_path)
+    output_path = str(tmp_path / "yolo.onnx")
+    # Randomly initialized from the bundled yaml, no weights download
+    export_yolo_onnx("yolov8n.yaml", output_path, imgsz=64)
+
+    session = ort.InferenceSession(output_path, providers=["CPUExecutionProvider"])
+    batch = np.zeros((3, 3, 64, 64), dtype=np.float32)
+    outputs = session.run(None, {session.get_inputs()[0].name: batch})
+    assert outputs[0].shape[0] == 3
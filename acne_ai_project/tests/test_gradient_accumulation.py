@@ -0,0 +1,63 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+tf = pytest.importorskip("tensorflow")
+from training.distributed import GradientAccumulationModel
+
+ACCUMULATION_STEPS = 4
+MICRO_BATCH = 8
+
+@pytest.fixture(scope="module")
+def strategy():
+    """
+    MirroredStrategy over two virtual CPU devices.
+    """
+    cpu = tf.config.list_physical_devices('CPU')[0]
+    try:
+        tf.config.set_logical_device_configuration(
+            cpu, [tf.config.LogicalDeviceConfiguration(), tf.config.LogicalDeviceConfiguration()])
+    except RuntimeError:
+        pass # TF already initialized by another test, use whatever devices exist
+    devices = tf.config.list_logical_devices('CPU')
+    if len(devices) < 2:
+        pytest.skip("needs 2 logical CPU devices, TF was initialized before the fixture ran")
+    return tf.distribute.MirroredStrategy([d.name for d in devices[:2]])
+
+def build(strategy, accumulation_steps, initial_weights):
+    with strategy.scope():
+        inputs = tf.keras.Input((5,))
+        hidden = tf.keras.layers.Dense(4, activation='tanh')(inputs)
+        outputs = tf.keras.layers.Dense(3, activation='softmax')(hidden)
+        if accumulation_steps > 1:
+            model = GradientAccumulationModel(inputs=inputs, outputs=outputs, accumulation_steps=accumulation_steps)
+        else:
+            model = tf.keras.Model(inputs, outputs)
+        model.set_weights(initial_weights)
+        # Adam: any extra or skipped optimizer update would change moments and weights
+        model.compile(optimizer=tf.keras.optimizers.Adam(0.05), loss='categorical_crossentropy')
+    return model
+
+def test_accumulated_steps_match_one_large_batch(strategy):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(ACCUMULATION_STEPS * MICRO_BATCH, 5)).astype(np.float32)
+    y = tf.keras.utils.to_categorical(rng.integers(0, 3, len(x)), 3)
+
+    with strategy.scope():
+        reference = tf.keras.Sequential([tf.keras.Input((5,)), tf.keras.layers.Dense(4), tf.keras.layers.Dense(3)])
+    initial_weights = reference.get_weights()
+
+    accumulated = build(strategy, ACCUMULATION_STEPS, initial_weights)
+    accumulated.fit(x, y, batch_size=MICRO_BATCH, epochs=1, shuffle=False, verbose=0)
+
+    large_batch = build(strategy, 1, initial_weights)
+    large_batch.fit(x, y, batch_size=ACCUMULATION_STEPS * MICRO_BATCH, epochs=1, shuffle=False, verbose=0)
+
+    assert int(accumulated.optimizer.iterations.numpy()) == 1
+    for got, expected, initial in zip(accumulated.get_weights(), large_batch.get_weights(), initial_weights):
+        assert not np.allclose(expected, initial)
+        np.testing.assert_allclose(got, expected, rtol=1e-5, atol=1e-6)
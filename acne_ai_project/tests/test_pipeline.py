@@ -0,0 +1,47 @@
+import os
+import sys
+import pytest
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+from inference.pipeline import AcnePipeline, StageExecutor
+from inference.profiling import Deadline, StageTrace
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_stage_executor_without_stages(max_workers):
+    trace = StageTrace()
+    assert StageExecutor(max_workers=max_workers).run({}, trace) == {}
+    assert "models" not in trace.as_dict()
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_stage_executor_runs_every_stage(max_workers):
+    stages = {"a": (lambda x: x + 1, 1), "b": (lambda x: x * 2, 3)}
+    trace = StageTrace()
+    assert StageExecutor(max_workers=max_workers).run(stages, trace) == {"a": 2, "b": 6}
+    assert {"a", "b", "models"} <= set(trace.as_dict())
+
+def observed_request(pipeline, **stages_ms):
+    trace = StageTrace()
+    for stage, ms in stages_ms.items():
+        trace.add(stage, ms)
+    pipeline._observe(trace, "predict_bytes", ["success"])
+
+def test_yolo_runs_again_after_one_slow_request():
+    pipeline = AcnePipeline()
+    pipeline.degradation_enabled = True
+    pipeline._models['fallback_classifier'] = None # No student model needed to plan
+    pipeline._stage_estimates_ms = {"classify": 50.0, "detect_spots": 200.0} # As seeded by warmup()
+
+    observed_request(pipeline, classify=50.0, detect_spots=20000.0, models=20000.0)
+    run_yolo, _ = pipeline._plan_degradation(Deadline(1000), parallel=True)
+    assert not run_yolo
+
+    for _ in range(20):
+        run_yolo, _ = pipeline._plan_degradation(Deadline(1000), parallel=True)
+        if run_yolo:
+            break
+        observed_request(pipeline, classify=50.0, models=50.0) # YOLO skipped
+    assert run_yolo
@@ -0,0 +1,127 @@
+import os
+import sys
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tensorflow as tf
+from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau, CSVLogger
+import yaml
+from models.student_model import build_student_model
+from data.tf_dataset import load_split
+from training.distributed import BestModelCheckpoint
+
+TEACHER_MODELS = {
+    'classifier': 'best_classifier.keras',
+    'ensemble': 'best_ensemble.keras'
+}
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+class Distiller(tf.keras.Model):
+    """
+    Trains `student` on a mix of the hard labels and the teacher's temperature-softened
+    predictions: loss = alpha * CE(y, student) + (1 - alpha) * T^2 * KL(teacher_T || student_T).
+    Both models output probabilities, so logits are recovered as log-probabilities.
+    """
+    def __init__(self, student, teacher, temperature=4.0, alpha=0.3):
+        super().__init__()
+        self.student = student
+        self.teacher = teacher
+        self.teacher.trainable = False
+        self.temperature = temperature
+        self.alpha = alpha
+        self.student_loss_fn = tf.keras.losses.CategoricalCrossentropy()
+        self.distillation_loss_fn = tf.keras.losses.KLDivergence()
+        self.loss_tracker = tf.keras.metrics.Mean(name='loss')
+        self.distill_tracker = tf.keras.metrics.Mean(name='distillation_loss')
+        self.accuracy = tf.keras.metrics.CategoricalAccuracy(name='accuracy')
+
+    @property
+    def metrics(self):
+        return [self.loss_tracker, self.distill_tracker, self.accuracy]
+
+    def call(self, x, training=False):
+        return self.student(x, training=training)
+
+    def _soften(self, probs):
+        return tf.nn.softmax(tf.math.log(tf.clip_by_value(probs, 1e-7, 1.0)) / self.temperature, axis=-1)
+
+    def train_step(self, data):
+        x, y = data
+        teacher_probs = self.teacher(x, training=False)
+        with tf.GradientTape() as tape:
+            student_probs = self.student(x, training=True)
+            student_loss = self.student_loss_fn(y, student_probs)
+            distillation_loss = self.distillation_loss_fn(self._soften(teacher_probs), self._soften(student_probs))
+            loss = self.alpha * student_loss + (1 - self.alpha) * distillation_loss * self.temperature ** 2
+        grads = tape.gradient(loss, self.student.trainable_variables)
+        self.optimizer.apply_gradients(zip(grads, self.student.trainable_variables))
+
+        self.loss_tracker.update_state(loss)
+        self.distill_tracker.update_state(distillation_loss)
+        self.accuracy.update_state(y, student_probs)
+        return {m.name: m.result() for m in self.metrics}
+
+    def test_step(self, data):
+        x, y = data
+        student_probs = self.student(x, training=False)
+        self.loss_tracker.update_state(self.student_loss_fn(y, student_probs))
+        self.accuracy.update_state(y, student_probs)
+        return {m.name: m.result() for m in self.metrics}
+
+def distill_student():
+    """
+    Distills the teacher selected by distillation.teacher ('classifier' | 'ensemble')
+    into a small student (distillation.student_backbone) and saves it as best_student.keras.
+    """
+    config = load_config()
+    distill_cfg = config.get('distillation', {})
+    models_dir = config['paths']['models']
+    logs_dir = config['paths']['logs']
+    os.makedirs(logs_dir, exist_ok=True)
+
+    teacher_path = os.path.join(models_dir, TEACHER_MODELS[distill_cfg.get('teacher', 'classifier')])
+    if not os.path.exists(teacher_path):
+        print(f"Error: Teacher model not found at {teacher_path}")
+        return None
+
+    print(f"Loading teacher from {teacher_path}...")
+    teacher = tf.keras.models.load_model(teacher_path)
+
+    img_size = tuple(config['data']['image_size'])
+    student = build_student_model(input_shape=img_size + (3,), num_classes=config['data']['num_classes'],
+                                  backbone=distill_cfg.get('student_backbone', 'MobileNetV3Small'))
+
+    train_ds, _, _ = load_split('train', training=True, config=config)
+    val_ds, _, _ = load_split('val', config=config)
+
+    distiller = Distiller(student, teacher,
+                          temperature=distill_cfg.get('temperature', 4.0),
+                          alpha=distill_cfg.get('alpha', 0.3))
+    distiller.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=distill_cfg.get('learning_rate', 0.0005)))
+
+    output_path = os.path.join(models_dir, 'best_student.keras')
+
+    class StudentCheckpoint(BestModelCheckpoint):
+        # Save the student alone, not the Distiller wrapper
+        def set_model(self, model):
+            super().set_model(model.student)
+
+    distiller.fit(
+        train_ds,
+        validation_data=val_ds,
+        epochs=distill_cfg.get('epochs', 30),
+        callbacks=[
+            StudentCheckpoint(output_path, monitor='val_accuracy'),
+            EarlyStopping(patience=8, restore_best_weights=True, monitor='val_accuracy', mode='max'),
+            ReduceLROnPlateau(factor=0.2, patience=4, min_lr=1e-7, monitor='val_loss'),
+            CSVLogger(os.path.join(logs_dir, 'training_log_distill.csv'))
+        ]
+    )
+    print(f"Student model saved to {output_path}")
+    return output_path
+
+if __name__ == "__main__":
+    distill_student()
@@ -0,0 +1,149 @@
+import contextlib
+import numpy as np
+import tensorflow as tf
+
+def configure_mixed_precision(training_config):
+    """
+    Sets the global Keras dtype policy from training.mixed_precision
+    (null | "mixed_float16" for GPUs | "mixed_bfloat16" for CPUs/TPUs).
+    Must run before any model is built. Returns the policy name.
+    """
+    policy = training_config.get('mixed_precision')
+    if policy:
+        tf.keras.mixed_precision.set_global_policy(policy)
+        print(f"Mixed precision policy: {policy}")
+    return policy or 'float32'
+
+def get_strategy(training_config):
+    """
+    Builds the tf.distribute strategy from training.distribute:
+    - "default": single device
+    - "mirrored": all local GPUs (or `virtual_cpu_devices` logical CPUs, for testing on CPU)
+    - "multi_worker": MultiWorkerMirroredStrategy, cluster taken from TF_CONFIG
+    Must run before TF initializes its devices.
+    """
+    name = training_config.get('distribute', 'default')
+    virtual_cpus = training_config.get('virtual_cpu_devices', 0)
+
+    if virtual_cpus and name != 'default':
+        cpus = tf.config.list_physical_devices('CPU')
+        tf.config.set_logical_device_configuration(
+            cpus[0], [tf.config.LogicalDeviceConfiguration() for _ in range(virtual_cpus)])
+
+    if name == 'mirrored':
+        devices = None
+        if virtual_cpus and not tf.config.list_physical_devices('GPU'):
+            devices = [f"/cpu:{i}" for i in range(virtual_cpus)]
+        strategy = tf.distribute.MirroredStrategy(devices=devices)
+    elif name == 'multi_worker':
+        strategy = tf.distribute.MultiWorkerMirroredStrategy()
+    elif name == 'default':
+        strategy = tf.distribute.get_strategy()
+    else:
+        raise ValueError(f"Unknown distribution strategy: {name}")
+
+    print(f"Distribution strategy: {name} ({strategy.num_replicas_in_sync} replica(s))")
+    return strategy
+
+def strategy_scope(strategy=None):
+    return strategy.scope() if strategy is not None else contextlib.nullcontext()
+
+class GradientAccumulationModel(tf.keras.Model):
+    """
+    Functional model whose train_step sums gradients over `accumulation_steps`
+    batches before applying them, for an effective batch size of
+    accumulation_steps x batch_size. Supports loss-scaled (mixed precision)
+    optimizers and tf.distribute strategies.
+
+    Build it from an existing functional model's graph:
+        GradientAccumulationModel(inputs=model.inputs, outputs=model.outputs, accumulation_steps=4)
+    Save trained weights through a plain functional copy (see BestModelCheckpoint),
+    so inference code can load the model without this class.
+    """
+    def __init__(self, *args, accumulation_steps=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.accumulation_steps = max(1, int(accumulation_steps))
+
+    def compile(self, *args, **kwargs):
+        super().compile(*args, **kwargs)
+        # (Re)built on every compile: the trainable set changes between training phases.
+        # Not tracked as model weights, so they never end up in saved models.
+        self._self_setattr_tracking = False
+        self._accum_step = tf.Variable(0, dtype=tf.int64, trainable=False,
+                                       synchronization=tf.VariableSynchronization.ON_READ,
+                                       aggregation=tf.VariableAggregation.ONLY_FIRST_REPLICA)
+        self._accum_grads = [
+            tf.Variable(tf.zeros_like(v), trainable=False,
+                        synchronization=tf.VariableSynchronization.ON_READ,
+                        aggregation=tf.VariableAggregation.SUM)
+            for v in self.trainable_variables
+        ]
+        self._self_setattr_tracking = True
+
+    def _apply_accumulated(self):
+        # Replica context: apply_gradients all-reduces the per-replica sums itself
+        self.optimizer.apply_gradients(zip([g.read_value() for g in self._accum_grads], self.trainable_variables))
+        for g in self._accum_grads:
+            g.assign(tf.zeros_like(g))
+
+    def _maybe_apply_cross_replica(self, distribution, apply_now):
+        # The step/skip decision must be taken in cross-replica context: tf.distribute
+        # doesn't allow a replica-context cond whose branch synchronizes replicas, which
+        # apply_gradients does (same pattern as LossScaleOptimizer's finite-gradient check).
+        apply_now = distribution.experimental_local_results(apply_now)[0]
+
+        def apply_fn():
+            distribution.extended.call_for_each_replica(self._apply_accumulated)
+            return tf.constant(True)
+
+        return tf.cond(apply_now, apply_fn, lambda: tf.constant(False))
+
+    def train_step(self, data):
+        x, y, sample_weight = tf.keras.utils.unpack_x_y_sample_weight(data)
+        loss_scaled = isinstance(self.optimizer, tf.keras.mixed_precision.LossScaleOptimizer)
+
+        with tf.GradientTape() as tape:
+            y_pred = self(x, training=True)
+            loss = self.compute_loss(x, y, y_pred, sample_weight) / self.accumulation_steps
+            if loss_scaled:
+                loss = self.optimizer.get_scaled_loss(loss)
+        grads = tape.gradient(loss, self.trainable_variables)
+        if loss_scaled:
+            grads = self.optimizer.get_unscaled_gradients(grads)
+
+        for acc, grad in zip(self._accum_grads, grads):
+            if grad is not None:
+                acc.assign_add(tf.cast(grad, acc.dtype))
+        self._accum_step.assign_add(1)
+        apply_now = tf.equal(self._accum_step % self.accumulation_steps, 0)
+        tf.distribute.get_replica_context().merge_call(self._maybe_apply_cross_replica, args=(apply_now,))
+
+        return self.compute_metrics(x, y, y_pred, sample_weight)
+
+def with_gradient_accumulation(model, accumulation_steps):
+    """
+    Returns `model` unchanged for accumulation_steps <= 1, otherwise a
+    GradientAccumulationModel sharing its layers.
+    """
+    if accumulation_steps <= 1:
+        return model
+    return GradientAccumulationModel(inputs=model.inputs, outputs=model.outputs,
+                                     accumulation_steps=accumulation_steps, name=model.name)
+
+class BestModelCheckpoint(tf.keras.callbacks.Callback):
+    """
+    save_best_only checkpoint that saves a plain functional copy of the model
+    (no custom train_step class, no optimizer state), loadable by the inference code.
+    """
+    def __init__(self, filepath, monitor='val_accuracy', mode='max'):
+        super().__init__()
+        self.filepath = filepath
+        self.monitor = monitor
+        self.better = np.greater if mode == 'max' else np.less
+        self.best = -np.inf if mode == 'max' else np.inf
+
+    def on_epoch_end(self, epoch, logs=None):
+        current = (logs or {}).get(self.monitor)
+        if current is not None and self.better(current, self.best):
+            self.best = current
+            tf.keras.Model(inputs=self.model.inputs, outputs=self.model.outputs).save(self.filepath)
@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+from tensorflow.keras.applications import EfficientNetB3, ResNet50
+from tensorflow.keras.layers import GlobalAveragePooling2D, Input
+from tensorflow.keras.models import Model
+import yaml
+
+# Add project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.tf_dataset import load_split
+
+BACKBONES = {
+    'EfficientNetB3': EfficientNetB3,
+    'ResNet50': ResNet50
+}
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+def build_feature_extractor(backbones, input_shape=(224, 224, 3)):
+    """
+    Frozen ImageNet backbones sharing one input, each followed by global average
+    pooling: exactly what the frozen phase of the classifier/ensemble computes
+    before its trainable head.
+    """
+    inputs = Input(shape=input_shape)
+    outputs = []
+    for name in backbones:
+        base = BACKBONES[name](weights='imagenet', include_top=False, input_tensor=inputs)
+        base.trainable = False
+        outputs.append(GlobalAveragePooling2D()(base.output))
+    return Model(inputs=inputs, outputs=outputs)
+
+def split_fingerprint(config, split):
+    """
+    Hash of a split's file list (or shard manifest), so a cache is rebuilt when the data changes.
+    """
+    processed_dir = config['paths']['processed_data']
+    h = hashlib.sha256()
+    if config['data'].get('loader', 'tf_data') == 'shards':
+        with open(os.path.join(processed_dir, 'shards', 'manifest.json'), 'rb') as f:
+            h.update(f.read())
+    else:
+        split_dir = os.path.join(processed_dir, split)
+        for root, _, files in sorted(os.walk(split_dir)):
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                h.update(f"{os.path.relpath(os.path.join(root, name), split_dir)}:{stat.st_size}:{stat.st_mtime}".encode())
+    h.update(json.dumps(config['augmentation'], sort_keys=True).encode())
+    h.update(json.dumps(config['data']['image_size']).encode())
+    return h.hexdigest()[:16]
+
+def extract_features(extractor, dataset, passes=1):
+    """
+    Runs the frozen extractor over `passes` epochs of `dataset` (each pass draws fresh
+    augmentations if the dataset is augmented). Returns ([features per backbone], labels).
+    """
+    features, labels = None, []
+    for _ in range(passes):
+        for images, y in dataset:
+            outputs = extractor(images, training=False)
+            if not isinstance(outputs, (list, tuple)):
+                outputs = [outputs]
+            if features is None:
+                features = [[] for _ in outputs]
+            for i, out in enumerate(outputs):
+                features[i].append(out.numpy().astype(np.float32))
+            labels.append(np.argmax(y.numpy(), axis=1))
+    return [np.concatenate(f) for f in features], np.concatenate(labels).astype(np.int32)
+
+def load_or_build_feature_cache(backbones, split, config=None, augment_passes=1):
+    """
+    Returns ([features per backbone], labels) for `split`, computed once with the
+    frozen backbones and cached as .npz under paths.feature_cache.
+    The train split is extracted `augment_passes` times with augmentation; other
+    splits once without.
+    """
+    config = config or load_config()
+    training = split == 'train'
+    passes = augment_passes if training else 1
+    cache_dir = config['paths'].get('feature_cache', 'data/feature_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = os.path.join(
+        cache_dir, f"{'+'.join(backbones)}_{split}_k{passes}_{split_fingerprint(config, split)}.npz")
+
+    if os.path.exists(cache_path):
+        print(f"Loading cached features from {cache_path}")
+        data = np.load(cache_path)
+        return [data[f"features_{i}"] for i in range(len(backbones))], data["labels"]
+
+    print(f"Extracting {'+'.join(backbones)} features for '{split}' ({passes} pass(es))...")
+    img_size = tuple(config['data']['image_size'])
+    extractor = build_feature_extractor(backbones, input_shape=img_size + (3,))
+    dataset, _, _ = load_split(split, training=training, config=config)
+    features, labels = extract_features(extractor, dataset, passes)
+
+    np.savez(cache_path, labels=labels, **{f"features_{i}": f for i, f in enumerate(features)})
+    print(f"Cached {len(labels)} feature vectors to {cache_path}")
+    return features, labels
+
+def transfer_head_weights(head_model, full_model):
+    """
+    Copies trained head weights into the full model, matching layers by name.
+    """
+    for layer in head_model.layers:
+        if layer.weights:
+            full_model.get_layer(layer.name).set_weights(layer.get_weights())
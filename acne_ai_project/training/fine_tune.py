@@ -1,9 +1,12 @@
-
 import tensorflow as tf
+from training.distributed import strategy_scope
 
-def unfreeze_and_compile(model, learning_rate=0.0001, unfreeze_percentage=0.3):
+def unfreeze_and_compile(model, learning_rate=0.0001, unfreeze_percentage=0.3, strategy=None, metrics=None,
+                         loss='categorical_crossentropy', loss_weights=None):
     """
     Utility function to unfreeze the top N% of a model for fine-tuning.
+    If a tf.distribute strategy is given, the optimizer is created under its scope.
+    `loss`/`loss_weights` may be dicts keyed by output name for multi-head models.
     """
     model.trainable = True
     
@@ -16,9 +19,11 @@ def unfreeze_and_compile(model, learning_rate=0.0001, unfreeze_percentage=0.3):
         if not isinstance(layer, tf.keras.layers.BatchNormalization):
             layer.trainable = False
             
-    model.compile(
-        optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
-        loss='categorical_crossentropy',
-        metrics=['accuracy']
-    )
+    with strategy_scope(strategy):
+        model.compile(
+            optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+            loss=loss,
+            loss_weights=loss_weights,
+            metrics=metrics or ['accuracy']
+        )
     return model
@@ -5,19 +5,35 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import tensorflow as tf
-from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, ReduceLROnPlateau, TensorBoard, CSVLogger
+from tensorflow.keras.callbacks import (ModelCheckpoint, EarlyStopping, ReduceLROnPlateau, TensorBoard, CSVLogger,
+                                        BackupAndRestore)
 from sklearn.utils import class_weight
 import numpy as np
 import yaml
-from models.classification_model import build_classification_model
+from models.classification_model import build_classification_model, build_classification_head
 from data.augment_data import get_train_augmentation_generator, get_basic_generator
+from data.tf_dataset import load_split
+from training.feature_cache import load_or_build_feature_cache, transfer_head_weights
+from training.distributed import (configure_mixed_precision, get_strategy, with_gradient_accumulation,
+                                  BestModelCheckpoint)
+from training.fine_tune import unfreeze_and_compile
 
 def load_config(config_path="config/config.yaml"):
     with open(config_path, "r") as f:
         return yaml.safe_load(f)
 
+def classifier_metrics():
+    return ['accuracy', tf.keras.metrics.Precision(), tf.keras.metrics.Recall()]
+
 def train_classifier():
     config = load_config()
+    training_cfg = config.get('training', {})
+
+    # Precision policy and device strategy must be set before anything touches TF devices
+    configure_mixed_precision(training_cfg)
+    strategy = get_strategy(training_cfg)
+    accumulation_steps = training_cfg.get('gradient_accumulation_steps', 1)
+    resume = training_cfg.get('resume', True)
     
     # Paths
     processed_dir = config['paths']['processed_data']
@@ -32,96 +48,132 @@ def train_classifier():
     epochs_frozen = config['model']['epochs_frozen']
     epochs_finetune = config['model']['epochs_finetune']
     
-    # Generators
-    train_datagen = get_train_augmentation_generator()
-    val_datagen = get_basic_generator()
-
-    train_generator = train_datagen.flow_from_directory(
-        os.path.join(processed_dir, 'train'),
-        target_size=img_size,
-        batch_size=batch_size,
-        class_mode='categorical'
-    )
+    # Input pipeline: tf.data over images or pre-resized shards, or the legacy ImageDataGenerator
+    if config['data'].get('loader', 'tf_data') in ('tf_data', 'shards'):
+        train_generator, labels, _ = load_split('train', training=True, config=config)
+        val_generator, _, _ = load_split('val', config=config)
+    else:
+        train_datagen = get_train_augmentation_generator()
+        val_datagen = get_basic_generator()
 
-    val_generator = val_datagen.flow_from_directory(
-        os.path.join(processed_dir, 'val'),
-        target_size=img_size,
-        batch_size=batch_size,
-        class_mode='categorical'
-    )
+        train_generator = train_datagen.flow_from_directory(
+            os.path.join(processed_dir, 'train'),
+            target_size=img_size,
+            batch_size=batch_size,
+            class_mode='categorical'
+        )
+
+        val_generator = val_datagen.flow_from_directory(
+            os.path.join(processed_dir, 'val'),
+            target_size=img_size,
+            batch_size=batch_size,
+            class_mode='categorical'
+        )
+        labels = train_generator.classes
 
     # Class Weights
-    labels = train_generator.classes
     class_weights = class_weight.compute_class_weight(
         'balanced', classes=np.unique(labels), y=labels
     )
     class_weights = dict(enumerate(class_weights))
     print(f"Computed Class Weights: {class_weights}")
 
-    # Build Model
-    model = build_classification_model(input_shape=img_size + (3,), num_classes=config['data']['num_classes'])
+    # Build Model (variables must be created under the strategy scope)
+    with strategy.scope():
+        model = build_classification_model(input_shape=img_size + (3,), num_classes=config['data']['num_classes'])
+        model = with_gradient_accumulation(model, accumulation_steps)
     
     # Callbacks
+    best_model_path = os.path.join(models_dir, 'best_classifier.keras')
     callbacks = [
-        ModelCheckpoint(os.path.join(models_dir, 'best_classifier.keras'), save_best_only=True, monitor='val_accuracy'),
+        BestModelCheckpoint(best_model_path, monitor='val_accuracy') if accumulation_steps > 1
+        else ModelCheckpoint(best_model_path, save_best_only=True, monitor='val_accuracy'),
         EarlyStopping(patience=10, restore_best_weights=True, monitor='val_loss'),
         ReduceLROnPlateau(factor=0.2, patience=5, min_lr=1e-7, monitor='val_loss'),
         TensorBoard(log_dir=logs_dir),
-        CSVLogger(os.path.join(logs_dir, 'training_log.csv'))
+        CSVLogger(os.path.join(logs_dir, 'training_log.csv'), append=resume)
     ]
 
+    def phase_callbacks(phase):
+        # BackupAndRestore resumes an interrupted fit() from its last completed epoch
+        if not resume:
+            return callbacks
+        return callbacks + [BackupAndRestore(os.path.join(logs_dir, 'backup', phase))]
+
+    phase1_weights = os.path.join(logs_dir, 'backup', 'phase1_complete.weights.h5')
+
     # --- PHASE 1: Feature Extraction (Frozen Base) ---
-    print("\nStarting Phase 1: Feature Extraction (Frozen Base)")
-    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=config['model']['learning_rate_frozen']),
-                  loss='categorical_crossentropy',
-                  metrics=['accuracy', tf.keras.metrics.Precision(), tf.keras.metrics.Recall()])
-    
-    model.fit(
-        train_generator,
-        validation_data=val_generator,
-        epochs=epochs_frozen,
-        class_weight=class_weights,
-        callbacks=callbacks
-    )
+    use_feature_cache = config['model'].get('feature_cache', False)
+    if use_feature_cache and config['data'].get('loader', 'tf_data') == 'generator':
+        print("Warning: model.feature_cache needs the tf_data or shards loader, training Phase 1 end-to-end.")
+        use_feature_cache = False
+
+    if resume and os.path.exists(phase1_weights):
+        print("\nSkipping Phase 1: restoring weights from a completed earlier run")
+        model.load_weights(phase1_weights)
+    elif use_feature_cache:
+        # The base is frozen, so run it once and train only the head on cached pooled features
+        print("\nStarting Phase 1: Feature Extraction (Frozen Base, cached features)")
+        num_classes = config['data']['num_classes']
+        (train_x,), train_y = load_or_build_feature_cache(
+            ['EfficientNetB3'], 'train', config, config['model'].get('feature_cache_augment_passes', 1))
+        (val_x,), val_y = load_or_build_feature_cache(['EfficientNetB3'], 'val', config)
+
+        with strategy.scope():
+            head = build_classification_head(train_x.shape[1], num_classes)
+            head.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=config['model']['learning_rate_frozen']),
+                         loss='categorical_crossentropy',
+                         metrics=classifier_metrics())
+        head.fit(
+            train_x, tf.keras.utils.to_categorical(train_y, num_classes),
+            validation_data=(val_x, tf.keras.utils.to_categorical(val_y, num_classes)),
+            batch_size=batch_size,
+            epochs=epochs_frozen,
+            class_weight=class_weights,
+            callbacks=[
+                EarlyStopping(patience=10, restore_best_weights=True, monitor='val_loss'),
+                ReduceLROnPlateau(factor=0.2, patience=5, min_lr=1e-7, monitor='val_loss'),
+                CSVLogger(os.path.join(logs_dir, 'training_log_head.csv'))
+            ]
+        )
+        transfer_head_weights(head, model)
+    else:
+        print("\nStarting Phase 1: Feature Extraction (Frozen Base)")
+        with strategy.scope():
+            model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=config['model']['learning_rate_frozen']),
+                          loss='categorical_crossentropy',
+                          metrics=classifier_metrics())
+        
+        model.fit(
+            train_generator,
+            validation_data=val_generator,
+            epochs=epochs_frozen,
+            class_weight=class_weights,
+            callbacks=phase_callbacks('phase1')
+        )
+
+    if resume:
+        os.makedirs(os.path.dirname(phase1_weights), exist_ok=True)
+        model.save_weights(phase1_weights)
 
     # --- PHASE 2: Fine Tuning ---
     print("\nStarting Phase 2: Fine Tuning")
     
-    # Unfreeze the last 30% of layers of the base model
-    base_model = model.layers[0] # EfficientNetB3 is the first layer in our Functional model ? 
-    # Actually, in our build function:
-    # model = Model(inputs=base_model.input, outputs=predictions)
-    # The layers of the model INCLUDE the base model's layers flattened out unless we wrapped it.
-    # Because we did: base_model = EfficientNetB3(...); x = base_model.output
-    # The 'model' has all the layers.
-    
-    # Let's unfreeze top layers. EfficientNetB3 has about 380+ layers.
-    # Simple strategy: allow all layers to be trainable, or look for specific blocks.
-    # The prompt asked for "last 30%".
-    
-    model.trainable = True # Unfreeze everything first
-    
-    # Count layers
-    num_layers = len(model.layers)
-    freeze_until = int(num_layers * 0.7)
-    
-    for layer in model.layers[:freeze_until]:
-        if not isinstance(layer, BatchNormalization): # Keep BatchNorm frozen usually, or unfreeze carefully.
-             layer.trainable = False
-             
-    # Recompile with lower learning rate
-    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=config['model']['learning_rate_finetune']),
-                  loss='categorical_crossentropy',
-                  metrics=['accuracy', tf.keras.metrics.Precision(), tf.keras.metrics.Recall()])
+    # Unfreeze the last 30% of layers and recompile with a lower learning rate
+    unfreeze_and_compile(model, learning_rate=config['model']['learning_rate_finetune'],
+                         unfreeze_percentage=0.3, strategy=strategy, metrics=classifier_metrics())
     
     model.fit(
         train_generator,
         validation_data=val_generator,
         epochs=epochs_finetune,
         class_weight=class_weights,
-        callbacks=callbacks
+        callbacks=phase_callbacks('phase2')
     )
 
+    if resume and os.path.exists(phase1_weights):
+        os.remove(phase1_weights)
+
     print("Training Complete. Model saved to models/saved/best_classifier.keras")
 
 if __name__ == "__main__":
@@ -0,0 +1,64 @@
+import os
+import sys
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tensorflow as tf
+from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau, CSVLogger
+from sklearn.utils import class_weight
+import numpy as np
+import yaml
+from models.ensemble_model import build_ensemble_model, build_ensemble_heads
+from training.feature_cache import load_or_build_feature_cache, transfer_head_weights
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+def train_ensemble():
+    """
+    Trains the EfficientNetB3 + ResNet50 ensemble. Both backbones are always frozen,
+    so only the heads are trained, on pooled features cached once per split.
+    """
+    config = load_config()
+    models_dir = config['paths']['models']
+    logs_dir = config['paths']['logs']
+    os.makedirs(models_dir, exist_ok=True)
+    os.makedirs(logs_dir, exist_ok=True)
+
+    num_classes = config['data']['num_classes']
+    img_size = tuple(config['data']['image_size'])
+    backbones = ['EfficientNetB3', 'ResNet50']
+
+    (train_eff, train_res), train_y = load_or_build_feature_cache(
+        backbones, 'train', config, config['model'].get('feature_cache_augment_passes', 1))
+    (val_eff, val_res), val_y = load_or_build_feature_cache(backbones, 'val', config)
+
+    class_weights = class_weight.compute_class_weight('balanced', classes=np.unique(train_y), y=train_y)
+    class_weights = dict(enumerate(class_weights))
+
+    heads = build_ensemble_heads(train_eff.shape[1], train_res.shape[1], num_classes)
+    heads.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=config['model']['learning_rate_frozen']),
+                  loss='categorical_crossentropy',
+                  metrics=['accuracy'])
+    heads.fit(
+        [train_eff, train_res], tf.keras.utils.to_categorical(train_y, num_classes),
+        validation_data=([val_eff, val_res], tf.keras.utils.to_categorical(val_y, num_classes)),
+        batch_size=config['data']['batch_size'],
+        epochs=config['model']['epochs_frozen'],
+        class_weight=class_weights,
+        callbacks=[
+            EarlyStopping(patience=10, restore_best_weights=True, monitor='val_loss'),
+            ReduceLROnPlateau(factor=0.2, patience=5, min_lr=1e-7, monitor='val_loss'),
+            CSVLogger(os.path.join(logs_dir, 'training_log_ensemble.csv'))
+        ]
+    )
+
+    model = build_ensemble_model(input_shape=img_size + (3,), num_classes=num_classes)
+    transfer_head_weights(heads, model)
+    output_path = os.path.join(models_dir, 'best_ensemble.keras')
+    model.save(output_path)
+    print(f"Ensemble model saved to {output_path}")
+
+if __name__ == "__main__":
+    train_ensemble()
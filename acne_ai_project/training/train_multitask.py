@@ -0,0 +1,72 @@
+import os
+import sys
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tensorflow as tf
+from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, ReduceLROnPlateau, CSVLogger
+from sklearn.utils import class_weight
+import numpy as np
+import yaml
+from models.multitask_model import build_multitask_model
+from data.tf_dataset import build_multitask_dataset
+from training.fine_tune import unfreeze_and_compile
+
+def load_config(config_path="config/config.yaml"):
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+def train_multitask():
+    """
+    Trains the shared-backbone model that predicts acne type and severity in one pass.
+    The loss is categorical cross-entropy on 'diagnosis' plus a weighted MSE on
+    'severity' (only for images that have a severity label).
+    Same two phases as the classifier: frozen backbone, then fine-tuning.
+    """
+    config = load_config()
+    mt_cfg = config.get('multitask', {})
+    models_dir = config['paths']['models']
+    logs_dir = config['paths']['logs']
+    os.makedirs(models_dir, exist_ok=True)
+    os.makedirs(logs_dir, exist_ok=True)
+
+    img_size = tuple(config['data']['image_size'])
+    num_classes = config['data']['num_classes']
+    severity_csv = config['paths'].get('severity_labels')
+
+    _, labels, _ = build_multitask_dataset('train', severity_csv, config=config)
+    weights = class_weight.compute_class_weight('balanced', classes=np.unique(labels), y=labels)
+    train_ds, _, _ = build_multitask_dataset('train', severity_csv, training=True, config=config,
+                                             class_weights=weights)
+    val_ds, _, _ = build_multitask_dataset('val', severity_csv, config=config)
+
+    model = build_multitask_model(input_shape=img_size + (3,), num_classes=num_classes)
+
+    loss = {'diagnosis': 'categorical_crossentropy', 'severity': 'mean_squared_error'}
+    # Severity MSE is on a 0-100 scale, so it's scaled down to be comparable to the cross-entropy
+    loss_weights = {'diagnosis': 1.0, 'severity': mt_cfg.get('severity_loss_weight', 0.001)}
+    metrics = {'diagnosis': ['accuracy'], 'severity': ['mae']}
+
+    output_path = os.path.join(models_dir, 'best_multitask.keras')
+    callbacks = [
+        ModelCheckpoint(output_path, save_best_only=True, monitor='val_loss'),
+        EarlyStopping(patience=10, restore_best_weights=True, monitor='val_loss'),
+        ReduceLROnPlateau(factor=0.2, patience=5, min_lr=1e-7, monitor='val_loss'),
+        CSVLogger(os.path.join(logs_dir, 'training_log_multitask.csv'))
+    ]
+
+    print("\nStarting Phase 1: Frozen Backbone")
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=config['model']['learning_rate_frozen']),
+                  loss=loss, loss_weights=loss_weights, metrics=metrics)
+    model.fit(train_ds, validation_data=val_ds, epochs=config['model']['epochs_frozen'], callbacks=callbacks)
+
+    print("\nStarting Phase 2: Fine Tuning")
+    unfreeze_and_compile(model, learning_rate=config['model']['learning_rate_finetune'], unfreeze_percentage=0.3,
+                         metrics=metrics, loss=loss, loss_weights=loss_weights)
+    model.fit(train_ds, validation_data=val_ds, epochs=config['model']['epochs_finetune'], callbacks=callbacks)
+
+    print(f"Training Complete. Model saved to {output_path}")
+    print("To serve it, set inference.keras_model: best_multitask.keras")
+
+if __name__ == "__main__":
+    train_multitask()
@@ -6,38 +6,86 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import tensorflow as tf
 import yaml
 from models.severity_model import build_severity_model
-from data.augment_data import get_train_augmentation_generator, get_basic_generator
+from data.tf_dataset import build_regression_dataset
+from data.prepare_dataset import MANIFEST_NAME, load_manifest
 
 def load_config(config_path="config/config.yaml"):
     with open(config_path, "r") as f:
         return yaml.safe_load(f)
 
-def train_severity_model():
+def split_severity_labels(csv_path, processed_dir):
+    """
+    Splits the severity CSV along the duplicate-aware train/val/test splits of
+    data/prepare_dataset.py (its manifest maps raw paths to splits), so the model never
+    trains on test images. Writes <processed_dir>/severity_splits/{train,val}.csv, never
+    next to the input CSV. Returns {split: csv path}, or None without a manifest.
+    """
+    import pandas as pd
+    manifest_path = os.path.join(processed_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        print(f"Note: {manifest_path} not found. Run data/prepare_dataset.py first, severity uses its splits.")
+        return None
+    splits = {os.path.normpath(p): r['split'] for p, r in load_manifest(manifest_path)['images'].items()
+              if r.get('split')}
+
+    df = pd.read_csv(csv_path)
+    df_split = df['filename'].map(lambda f: splits.get(os.path.normpath(f)))
+    unknown = int(df_split.isna().sum())
+    if unknown:
+        print(f"Skipping {unknown} severity labels for images not in {manifest_path} (missing or corrupt).")
+
+    output_dir = os.path.join(processed_dir, 'severity_splits')
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    for split in ['train', 'val']:
+        paths[split] = os.path.join(output_dir, f"{split}.csv")
+        df[df_split == split].to_csv(paths[split], index=False)
+        print(f"Severity {split}: {int((df_split == split).sum())} images")
+    return paths
+
+def train_severity_model(epochs=30):
     """
     Trains the severity regression model.
     Note: This requires specific 'severity' labels which standard classification datasets might not have.
-    We assume the generator yields (image, severity_score) if modeled differently, 
-    but for now we'll stick to standard flow and assume the user has formatted the data 
-    such that 'class indices' might map to severity, or needs custom data loader.
+    Expects a CSV (paths.severity_labels) with 'filename' (relative to data/raw) and
+    'severity' (0-100) columns, streamed with the tf.data regression pipeline.
+    Train/val follow the processed splits; test images are held out for evaluation.
     """
     print("Starting Severity Model Training...")
-    # Placeholder for custom regression data loading logic
-    # As standard ImageDataGenerator is for classification, we would need 
-    # flow_from_dataframe with a 'severity' column.
-    
-    print("Note: Severity training requires a CSV mapping images to severity scores (0-100).")
-    print("This script is a template. Please implement the 'flow_from_dataframe' logic with your specific CSV.")
+    config = load_config()
+    csv_path = config['paths'].get('severity_labels', 'data/severity_labels.csv')
+    models_dir = config['paths']['models']
     
-    # Example logic (commented out):
-    # df = pd.read_csv('data/severity_labels.csv')
-    # train_gen = datagen.flow_from_dataframe(df, x_col='filename', y_col='severity', class_mode='raw')
+    if not os.path.exists(csv_path):
+        print("Note: Severity training requires a CSV mapping images to severity scores (0-100).")
+        print(f"Expected it at {csv_path} with 'filename' and 'severity' columns.")
+        return
+
+    split_csvs = split_severity_labels(csv_path, config['paths']['processed_data'])
+    if split_csvs is None:
+        return
+
+    images_root = config['paths']['raw_data']
+    train_ds = build_regression_dataset(split_csvs['train'], images_root, training=True, config=config)
+    val_ds = build_regression_dataset(split_csvs['val'], images_root, config=config)
     
     # Build Model
-    model = build_severity_model()
+    img_size = tuple(config['data']['image_size'])
+    model = build_severity_model(input_shape=img_size + (3,))
     model.compile(optimizer='adam', loss='mean_squared_error', metrics=['mae'])
     
-    # model.fit(...)
-    print("Severity model built. Please configure data loading to proceed.")
+    os.makedirs(models_dir, exist_ok=True)
+    model.fit(
+        train_ds,
+        validation_data=val_ds,
+        epochs=epochs,
+        callbacks=[
+            tf.keras.callbacks.ModelCheckpoint(os.path.join(models_dir, 'best_severity.keras'),
+                                               save_best_only=True, monitor='val_mae'),
+            tf.keras.callbacks.EarlyStopping(patience=8, restore_best_weights=True, monitor='val_mae')
+        ]
+    )
+    print(f"Severity model saved to {os.path.join(models_dir, 'best_severity.keras')}")
 
 if __name__ == "__main__":
     train_severity_model()